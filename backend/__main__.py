@@ -1,38 +1,226 @@
-"""CLI helper to run API or worker from `python -m backend`."""
+"""CLI to run the API, Celery workers or beat: ``python -m backend <command>``.
+
+``api`` and ``worker`` are production runners sized from ``app.queue.config.Settings``
+(flags override the environment); ``api --reload`` is the single-process development
+server. Every server command replaces this process (exec), so SIGTERM from a process
+manager reaches uvicorn, gunicorn or Celery directly and they drain: the API stops
+accepting connections and gives in-flight requests ``API_GRACEFUL_TIMEOUT_SECONDS``,
+and Celery stops consuming and finishes the tasks it is running (late acks redeliver
+anything killed after the grace period).
+"""
 
 from __future__ import annotations
 
+import argparse
+import importlib.util
+import os
 import sys
-import subprocess
+from pathlib import Path
+from typing import Optional
+
+BACKEND_DIR = Path(__file__).resolve().parent
+CELERY_POOLS = ("prefork", "threads", "gevent", "solo")
+DEV_HOST = "127.0.0.1"
+
+
+def cpu_count() -> int:
+    """CPUs this process may run on (respects affinity masks such as ``taskset``)."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0)) or 1
+    return os.cpu_count() or 1
+
+
+def resolve_concurrency(pool: str, configured: int) -> int:
+    """``configured`` if set, else a size suited to the pool: one process per CPU for prefork."""
+    if configured > 0:
+        return configured
+    if pool == "solo":
+        return 1
+    if pool == "threads":
+        return cpu_count() * 4
+    if pool == "gevent":
+        return 100
+    return cpu_count()
+
+
+def api_command(
+    settings,
+    *,
+    server: Optional[str] = None,
+    workers: Optional[int] = None,
+    host: Optional[str] = None,
+    port: Optional[int] = None,
+    reload: bool = False,
+) -> list[str]:
+    """Command line for the API server.
+
+    The ``--reload`` development server listens on loopback unless ``host`` is given;
+    ``API_HOST`` only applies to the production runners.
+    """
+    port = str(port or settings.api_port)
+    if reload:
+        return ["uvicorn", "main:app", "--reload", "--host", host or DEV_HOST, "--port", port]
+    host = host or settings.api_host
+
+    server = server or settings.api_server
+    workers = str(workers or settings.api_workers or cpu_count())
+    graceful = str(settings.api_graceful_timeout)
+    if server == "uvicorn":
+        return [
+            "uvicorn", "main:app", "--host", host, "--port", port,
+            "--workers", workers, "--timeout-graceful-shutdown", graceful,
+        ]
+    if server == "gunicorn":
+        command = [
+            "gunicorn", "main:app", "--worker-class", "uvicorn.workers.UvicornWorker",
+            "--bind", f"{host}:{port}", "--workers", workers, "--graceful-timeout", graceful,
+        ]
+        if settings.api_max_requests > 0:
+            jitter = max(settings.api_max_requests // 10, 1)
+            command += ["--max-requests", str(settings.api_max_requests), "--max-requests-jitter", str(jitter)]
+        return command
+    raise ValueError(f"Unknown API server: {server!r} (choose uvicorn or gunicorn)")
+
+
+def worker_command(
+    settings,
+    group: Optional[str] = None,
+    *,
+    pool: Optional[str] = None,
+    concurrency: Optional[int] = None,
+    max_tasks_per_child: Optional[int] = None,
+    max_memory_per_child: Optional[int] = None,
+    loglevel: str = "info",
+) -> list[str]:
+    """Command line for a Celery worker serving one worker group, or every queue if ``group`` is None.
+
+    The ``intake`` group consumes the default queue and the fair-share lanes that
+    ``videos.generate`` is dispatched to; the others consume one stage queue each.
+    """
+    command = ["celery", "-A", "app.queue.celery_app", "worker", f"--loglevel={loglevel}"]
+    if group is None:
+        command += ["-Q", ",".join(settings.all_queues)]
+        pool = pool or settings.celery_worker_pool
+        configured = settings.celery_worker_concurrency
+    elif group in settings.worker_pools:
+        if group == "intake":
+            queues = [settings.celery_default_queue, *settings.lane_queues]
+        else:
+            queues = [settings.stage_queues[group]]
+        command += ["-Q", ",".join(queues), "-n", f"{group}@%h"]
+        pool = pool or settings.worker_pools[group]
+        configured = settings.worker_concurrency[group]
+    else:
+        raise ValueError(f"Unknown stage: {group} (choose from {', '.join(settings.worker_pools)})")
+
+    if pool not in CELERY_POOLS:
+        raise ValueError(f"Unknown Celery pool: {pool!r} (choose from {', '.join(CELERY_POOLS)})")
+    command += ["--pool", pool, "--concurrency", str(resolve_concurrency(pool, concurrency or configured))]
+    if pool == "prefork":
+        max_tasks = settings.celery_worker_max_tasks_per_child if max_tasks_per_child is None else max_tasks_per_child
+        max_memory = (
+            settings.celery_worker_max_memory_per_child if max_memory_per_child is None else max_memory_per_child
+        )
+        if max_tasks > 0:
+            command.append(f"--max-tasks-per-child={max_tasks}")
+        if max_memory > 0:
+            command.append(f"--max-memory-per-child={max_memory}")
+    return command
 
 
-def run_api() -> None:
+def _exec(command: list[str]) -> None:
+    """Replace this process with ``command``."""
+    if command[0] == "gunicorn" or "gevent" in command:
+        module = "gunicorn" if command[0] == "gunicorn" else "gevent"
+        if importlib.util.find_spec(module) is None:
+            print(f"{module} is not installed (pip install {module})")
+            sys.exit(1)
+    os.execvp(command[0], command)
+
+
+def run_api(args: argparse.Namespace) -> None:
     """Start the FastAPI server."""
-    subprocess.run(["uvicorn", "main:app", "--reload", "--port", "8000"])
+    from app.queue.config import get_settings
 
+    _exec(
+        api_command(
+            get_settings(), server=args.server, workers=args.workers, host=args.host, port=args.port, reload=args.reload
+        )
+    )
 
-def run_worker() -> None:
-    """Start the Celery worker."""
-    subprocess.run(["celery", "-A", "app.queue.celery_app", "worker", "--loglevel=info"])
 
+def run_worker(args: argparse.Namespace) -> None:
+    """Start a Celery worker for one worker group, or for every queue if no group is given."""
+    from app.queue.config import get_settings
 
-def main() -> None:
-    """Dispatch to API or worker based on command."""
-    if len(sys.argv) < 2:
-        print("Usage: python -m backend [api|worker]")
+    try:
+        command = worker_command(
+            get_settings(),
+            args.stage,
+            pool=args.pool,
+            concurrency=args.concurrency,
+            max_tasks_per_child=args.max_tasks_per_child,
+            max_memory_per_child=args.max_memory_per_child,
+            loglevel=args.loglevel,
+        )
+    except ValueError as exc:
+        print(exc)
         sys.exit(1)
+    _exec(command)
 
-    command = sys.argv[1]
-    if command == "api":
-        run_api()
-    elif command == "worker":
-        run_worker()
-    else:
-        print(f"Unknown command: {command}")
-        print("Usage: python -m backend [api|worker]")
+
+def run_beat(_: argparse.Namespace) -> None:
+    """Start Celery beat, which schedules the stale-job reaper."""
+    _exec(["celery", "-A", "app.queue.celery_app", "beat", "--loglevel=info"])
+
+
+def run_migrations(_: argparse.Namespace) -> None:
+    """Upgrade the database schema to the latest Alembic revision."""
+    from app.migrations import upgrade_database
+
+    try:
+        upgrade_database()
+    except RuntimeError as exc:
+        print(exc)
         sys.exit(1)
 
 
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m backend", description="Run the Hidden Hill API or workers.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    api = commands.add_parser("api", help="API server (multi-process; --reload for development)")
+    api.add_argument("--server", choices=("uvicorn", "gunicorn"), help="process supervisor (API_SERVER)")
+    api.add_argument("--workers", type=int, help="API processes; default API_WORKERS or one per CPU")
+    api.add_argument("--host", help="bind address (API_HOST; 127.0.0.1 with --reload)")
+    api.add_argument("--port", type=int, help="bind port (API_PORT)")
+    api.add_argument("--reload", action="store_true", help="single auto-reloading process for development")
+    api.set_defaults(handler=run_api)
+
+    worker = commands.add_parser("worker", help="Celery worker for one worker group, or all queues")
+    worker.add_argument("stage", nargs="?", help="intake or a pipeline stage; omit for every queue")
+    worker.add_argument("--pool", choices=CELERY_POOLS, help="Celery pool (CELERY_POOL_<STAGE>)")
+    worker.add_argument("--concurrency", type=int, help="pool size (CELERY_CONCURRENCY_<STAGE>)")
+    worker.add_argument("--max-tasks-per-child", type=int, help="recycle prefork children after N tasks")
+    worker.add_argument("--max-memory-per-child", type=int, help="recycle prefork children above N KiB resident")
+    worker.add_argument("--loglevel", default="info")
+    worker.set_defaults(handler=run_worker)
+
+    commands.add_parser("beat", help="Celery beat (periodic sweeps)").set_defaults(handler=run_beat)
+    commands.add_parser("migrate", help="upgrade the database schema").set_defaults(handler=run_migrations)
+    return parser
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Dispatch to the API, a worker, beat or migrations based on the command."""
+    args = build_parser().parse_args(argv)
+    # Run from the repository root too: import ``app`` and resolve relative paths
+    # (the default SQLite file, artifact and cache dirs) from the backend directory.
+    os.chdir(BACKEND_DIR)
+    if str(BACKEND_DIR) not in sys.path:
+        sys.path.insert(0, str(BACKEND_DIR))
+    args.handler(args)
+
+
 if __name__ == "__main__":
     main()
-
@@ -0,0 +1,252 @@
+"""Admission control for generation requests.
+
+Three layers protect the queue from any single caller:
+
+* token buckets per ``X-API-Key``, else per user (email, or client address
+  when anonymous), kept in Redis so every API process shares them; a batch
+  takes one token per paper;
+* a global check that rejects new work that would take the Celery backlog
+  above ``ADMISSION_MAX_QUEUE_DEPTH``;
+* fair-share lanes: each tenant hashes onto one of ``FAIR_SHARE_LANES`` queues
+  that workers poll round-robin, so a tenant's backlog delays only its lane.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+import time
+import zlib
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+from fastapi import HTTPException, Request, status
+
+from .queue.config import PRIORITY_STEPS, get_settings
+from .redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+API_KEY_HEADER = "X-API-Key"
+
+# KEYS[1] bucket; ARGV capacity, refill rate (tokens/s), cost. Returns {allowed, retry_after_seconds}.
+TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local retry_after = 0
+if tokens >= cost then
+  tokens = tokens - cost
+  allowed = 1
+else
+  retry_after = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000) + 1000)
+return {allowed, tostring(retry_after)}
+"""
+
+
+class RateDecision(NamedTuple):
+    allowed: bool
+    retry_after: float
+
+
+class LocalRateLimiter:
+    """In-process token buckets; enough for a single API process and tests."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._buckets: dict[str, tuple[float, float]] = {}
+
+    def acquire(self, key: str, capacity: int, per_second: float, cost: int = 1) -> RateDecision:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (float(capacity), now))
+            tokens = min(capacity, tokens + (now - updated) * per_second)
+            if tokens >= cost:
+                self._buckets[key] = (tokens - cost, now)
+                return RateDecision(True, 0.0)
+            self._buckets[key] = (tokens, now)
+            return RateDecision(False, (cost - tokens) / per_second)
+
+
+class RedisRateLimiter:
+    """Token buckets updated atomically by a Lua script, shared by every API process."""
+
+    KEY_PREFIX = "hidden-hill:ratelimit:"
+
+    def __init__(self) -> None:
+        self._script = get_redis().register_script(TOKEN_BUCKET_LUA)
+
+    def acquire(self, key: str, capacity: int, per_second: float, cost: int = 1) -> RateDecision:
+        try:
+            allowed, retry_after = self._script(keys=[self.KEY_PREFIX + key], args=[capacity, per_second, cost])
+        except Exception as exc:
+            # Fail open: a Redis outage should not stop generation outright.
+            logger.warning("Rate limiter unavailable, admitting request: %s", exc)
+            return RateDecision(True, 0.0)
+        return RateDecision(bool(allowed), float(retry_after))
+
+
+@lru_cache()
+def get_rate_limiter() -> LocalRateLimiter:
+    """Return the configured rate limiter for this process."""
+    if get_settings().rate_limit_backend == "local":
+        return LocalRateLimiter()
+    return RedisRateLimiter()
+
+
+# Separator kombu's Redis transport uses between a queue name and its priority step.
+PRIORITY_SEPARATOR = "\x06\x16"
+
+
+def queue_depths(queues: list[str]) -> dict[str, int]:
+    """Messages waiting in each Celery queue on the Redis broker, across all priority lists."""
+    pipe = get_redis().pipeline(transaction=False)
+    for queue in queues:
+        for step in PRIORITY_STEPS:
+            pipe.llen(f"{queue}{PRIORITY_SEPARATOR}{step}" if step else queue)
+    lengths = iter(pipe.execute())
+    return {queue: sum(next(lengths) for _ in PRIORITY_STEPS) for queue in queues}
+
+
+class QueueDepthGate:
+    """Cache the total backlog for ``ttl`` seconds so admission adds no per-request Redis call."""
+
+    def __init__(self, ttl: float = 1.0) -> None:
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._checked_at = float("-inf")
+        self._depth = 0
+
+    def depth(self) -> int:
+        now = time.monotonic()
+        if now - self._checked_at >= self.ttl:
+            with self._lock:
+                if now - self._checked_at >= self.ttl:
+                    settings = get_settings()
+                    if settings.celery_task_always_eager:
+                        self._depth = 0
+                    else:
+                        try:
+                            self._depth = sum(queue_depths(settings.all_queues).values())
+                        except Exception as exc:
+                            logger.warning("Unable to read queue depth for admission: %s", exc)
+                    self._checked_at = now
+        return self._depth
+
+
+@lru_cache()
+def get_queue_depth_gate() -> QueueDepthGate:
+    return QueueDepthGate()
+
+
+def _digest(value: str) -> str:
+    return hashlib.sha256(value.encode()).hexdigest()[:24]
+
+
+def _user_key(request: Request, user_email: Optional[str]) -> str:
+    if user_email:
+        return f"user:{_digest(user_email.lower())}"
+    return f"addr:{request.client.host if request.client else 'unknown'}"
+
+
+def tenant_key(request: Request, user_email: Optional[str]) -> str:
+    """Identity used for fair-share lanes: API key, else user email, else client address."""
+    api_key = request.headers.get(API_KEY_HEADER)
+    if api_key:
+        return f"key:{_digest(api_key)}"
+    return _user_key(request, user_email)
+
+
+def idempotency_scope(request: Request, user_email: Optional[str]) -> str:
+    """Owner of an ``Idempotency-Key``: API key, else user email, else client address.
+
+    The address is only used for anonymous callers, so a signed-in retry from a
+    phone that changed networks still matches its first attempt while unrelated
+    anonymous clients never share a key space.
+    """
+    return tenant_key(request, user_email)
+
+
+def lane_for(tenant: str) -> Optional[str]:
+    """Fair-share queue for ``tenant``, or ``None`` when lanes are disabled."""
+    lanes = get_settings().lane_queues
+    if not lanes:
+        return None
+    return lanes[zlib.crc32(tenant.encode()) % len(lanes)]
+
+
+def _too_many_requests(detail: str, retry_after: float) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=detail,
+        headers={"Retry-After": str(max(1, int(retry_after + 0.999)))},
+    )
+
+
+def _charge(key: str, capacity: int, per_minute: float, cost: int, label: str) -> None:
+    if cost > capacity:
+        # No amount of waiting refills a bucket past its capacity.
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Batch of {cost} papers exceeds the {label} burst of {capacity}",
+        )
+    decision = get_rate_limiter().acquire(key, capacity, per_minute / 60, cost)
+    if not decision.allowed:
+        raise _too_many_requests(f"{label[0].upper()}{label[1:]} exceeded", decision.retry_after)
+
+
+def check_batch_limits() -> None:
+    """Refuse to start when a full batch could never fit in an API key's bucket."""
+    settings = get_settings()
+    if settings.max_batch_size > settings.rate_limit_api_key_burst:
+        raise RuntimeError(
+            f"MAX_BATCH_SIZE ({settings.max_batch_size}) is larger than RATE_LIMIT_API_KEY_BURST "
+            f"({settings.rate_limit_api_key_burst}); lower it or raise the burst"
+        )
+
+
+def admit_generation(request: Request, user_email: Optional[str], cost: int = 1) -> Optional[str]:
+    """Apply queue-depth admission and rate limits; return the tenant's lane queue.
+
+    ``cost`` is the number of papers the request may queue: a batch takes that
+    many tokens and must fit under the queue-depth limit as a whole. A request
+    with an ``X-API-Key`` is charged to the key's bucket only; others to the
+    user (or client address) bucket.
+    Raises ``HTTPException(429)`` with ``Retry-After`` when the request must wait,
+    and ``HTTPException(413)`` when ``cost`` is larger than a bucket can ever hold.
+    """
+    settings = get_settings()
+    if settings.admission_max_queue_depth > 0:
+        if get_queue_depth_gate().depth() + cost > settings.admission_max_queue_depth:
+            raise _too_many_requests("Generation queue is full", settings.admission_retry_after_seconds)
+
+    api_key = request.headers.get(API_KEY_HEADER)
+    if api_key:
+        _charge(
+            f"key:{_digest(api_key)}",
+            settings.rate_limit_api_key_burst,
+            settings.rate_limit_api_key_per_minute,
+            cost,
+            "API key rate limit",
+        )
+    else:
+        _charge(
+            _user_key(request, user_email),
+            settings.rate_limit_user_burst,
+            settings.rate_limit_user_per_minute,
+            cost,
+            "user rate limit",
+        )
+
+    return lane_for(tenant_key(request, user_email))
@@ -2,11 +2,45 @@
 
 from __future__ import annotations
 
-from typing import Optional
+import base64
+import binascii
+import hashlib
+import json
+import re
+from datetime import datetime, timedelta
+from typing import Iterable, NamedTuple, Optional
+from uuid import uuid4
 
+from sqlalchemy import Select, select, tuple_, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session, joinedload
 
 from . import models
+from .tracing import traced
+
+# Jobs in these states can be shared by later requests for the same paper.
+REUSABLE_JOB_STATUSES = frozenset({"pending", "queued", "processing", "completed"})
+TERMINAL_JOB_STATUSES = frozenset({"completed", "failed", "cancelled"})
+CANCELLABLE_JOB_STATUSES = frozenset({"pending", "queued", "processing"})
+RETRYABLE_JOB_STATUSES = frozenset({"failed", "cancelled"})
+
+_PMID_PREFIX = re.compile(r"^PMID:?")
+_PUBMED_ID = re.compile(r"(PMC)?[0-9]+")
+
+
+def normalize_pubmed_id(pubmed_id: str) -> str:
+    """Canonical form used for dedup: upper-case, no whitespace, no ``PMID:`` prefix."""
+    cleaned = "".join(pubmed_id.split()).upper()
+    return _PMID_PREFIX.sub("", cleaned)
+
+
+def is_valid_pubmed_id(pubmed_id: str) -> bool:
+    """True for a PMID or PMCID: digits, optionally prefixed with ``PMC`` (after normalization)."""
+    return _PUBMED_ID.fullmatch(normalize_pubmed_id(pubmed_id)) is not None
+
+
+def generation_cache_key(pubmed_id: str, pipeline_version: str) -> str:
+    return f"v{pipeline_version}:{normalize_pubmed_id(pubmed_id)}"
 
 
 def get_or_create_user(db: Session, email: str) -> models.User:
@@ -22,7 +56,7 @@ def get_or_create_user(db: Session, email: str) -> models.User:
 
 
 def create_video_with_job(db: Session, pubmed_id: str, user: Optional[models.User]) -> models.Job:
-    video = models.Video(pubmed_id=pubmed_id, user=user)
+    video = models.Video(pubmed_id=normalize_pubmed_id(pubmed_id), user=user)
     job = models.Job(video=video)
     db.add(video)
     db.add(job)
@@ -32,6 +66,282 @@ def create_video_with_job(db: Session, pubmed_id: str, user: Optional[models.Use
     return job
 
 
+class IdempotencyClaim(NamedTuple):
+    """An ``Idempotency-Key`` a request wants to record for the job it returns."""
+
+    key: str
+    request_hash: str
+    expires_at: datetime
+
+
+def idempotency_claim(scope: str, key: str, request_body: dict, ttl_seconds: int) -> IdempotencyClaim:
+    """Hash the caller's ``scope`` with the header value and fingerprint the request body."""
+    return IdempotencyClaim(
+        key=hashlib.sha256(f"{scope}\n{key}".encode()).hexdigest(),
+        request_hash=hashlib.sha256(json.dumps(request_body, sort_keys=True).encode()).hexdigest(),
+        expires_at=datetime.utcnow() + timedelta(seconds=ttl_seconds),
+    )
+
+
+def get_idempotency_key(db: Session, key: str) -> Optional[models.IdempotencyKey]:
+    """Return the live record for ``key``; an expired one is deleted so the key can be reused."""
+    record = (
+        db.query(models.IdempotencyKey)
+        .options(joinedload(models.IdempotencyKey.job))
+        .filter(models.IdempotencyKey.key == key)
+        .one_or_none()
+    )
+    if record is not None and record.expires_at <= datetime.utcnow():
+        db.delete(record)
+        db.commit()
+        return None
+    return record
+
+
+def _idempotency_record(claim: IdempotencyClaim, job_id: str, cached: bool) -> models.IdempotencyKey:
+    return models.IdempotencyKey(
+        key=claim.key, request_hash=claim.request_hash, job_id=job_id, cached=cached, expires_at=claim.expires_at
+    )
+
+
+def claim_idempotency_key(
+    db: Session, claim: IdempotencyClaim, job_id: str, cached: bool
+) -> Optional[models.IdempotencyKey]:
+    """Store ``claim`` for ``job_id``. Returns ``None`` once stored, or the record a concurrent request stored first."""
+    db.add(_idempotency_record(claim, job_id, cached))
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return get_idempotency_key(db, claim.key)
+    return None
+
+
+def delete_idempotency_key(db: Session, key: str) -> None:
+    db.query(models.IdempotencyKey).filter(models.IdempotencyKey.key == key).delete(synchronize_session=False)
+    db.commit()
+
+
+def purge_expired_idempotency_keys(db: Session) -> int:
+    deleted = (
+        db.query(models.IdempotencyKey)
+        .filter(models.IdempotencyKey.expires_at <= datetime.utcnow())
+        .delete(synchronize_session=False)
+    )
+    db.commit()
+    return deleted
+
+
+@traced("crud.get_or_create_cached_job")
+def get_or_create_cached_job(
+    db: Session,
+    pubmed_id: str,
+    user: Optional[models.User],
+    pipeline_version: str,
+    priority: str = "normal",
+    idempotency: Optional[IdempotencyClaim] = None,
+) -> tuple[models.Job, bool]:
+    """Return ``(job, created)`` for a paper, reusing any live or completed job.
+
+    The cache row is committed in the same transaction as the new Video/Job, so
+    concurrent requests race on its primary key and the losers adopt the winner.
+    Failed and cancelled jobs are replaced with a compare-and-swap on the cached job id.
+    An ``idempotency`` claim is inserted in that same transaction, so a new job
+    never exists without the key that produced it; callers record the claim
+    themselves when an existing job is returned.
+    """
+    key = generation_cache_key(pubmed_id, pipeline_version)
+    entry = (
+        db.query(models.GenerationCache)
+        .options(joinedload(models.GenerationCache.job).joinedload(models.Job.video))
+        .filter(models.GenerationCache.cache_key == key)
+        .one_or_none()
+    )
+    if entry and entry.job.status in REUSABLE_JOB_STATUSES:
+        return entry.job, False
+
+    video = models.Video(pubmed_id=normalize_pubmed_id(pubmed_id), user=user)
+    job = models.Job(id=models.default_uuid(), video=video, priority=priority)
+    db.add(video)
+    db.add(job)
+    if idempotency is not None:
+        db.add(_idempotency_record(idempotency, job.id, cached=False))
+    try:
+        if entry is None:
+            db.add(models.GenerationCache(cache_key=key, job_id=job.id))
+            db.commit()
+        else:
+            db.flush()
+            swapped = db.execute(
+                update(models.GenerationCache)
+                .where(
+                    models.GenerationCache.cache_key == key,
+                    models.GenerationCache.job_id == entry.job_id,
+                )
+                .values(job_id=job.id)
+                .execution_options(synchronize_session=False)
+            )
+            if swapped.rowcount != 1:
+                raise IntegrityError("generation cache entry changed concurrently", None, None)
+            db.commit()
+    except IntegrityError:
+        db.rollback()
+        if idempotency is not None:
+            # A concurrent request with the same key may have won instead of the cache row.
+            record = get_idempotency_key(db, idempotency.key)
+            if record is not None:
+                return get_job_with_video(db, record.job_id), False
+        winner = (
+            db.query(models.GenerationCache)
+            .filter(models.GenerationCache.cache_key == key)
+            .one()
+        )
+        return get_job_with_video(db, winner.job_id), False
+
+    db.refresh(job)
+    return job, True
+
+
+class BatchJob(NamedTuple):
+    """Plain snapshot of a batch result, so callers never trigger per-row refreshes."""
+
+    pubmed_id: str
+    job_id: str
+    video_id: str
+    status: str
+    celery_task_id: Optional[str]
+    created: bool
+
+    @classmethod
+    def from_job(cls, pubmed_id: str, job: models.Job, created: bool) -> "BatchJob":
+        return cls(pubmed_id, job.id, job.video_id, job.status, job.celery_task_id, created)
+
+
+def get_or_create_cached_jobs(
+    db: Session,
+    pubmed_ids: Iterable[str],
+    user: Optional[models.User],
+    pipeline_version: str,
+    priority: str = "normal",
+    queue: Optional[str] = None,
+) -> list[BatchJob]:
+    """Bulk variant of :func:`get_or_create_cached_job` for batch submissions.
+
+    Cache lookups run as a single ``IN`` query and every new Video/Job/cache row
+    is inserted in one transaction. New jobs are created already ``queued`` on
+    ``queue`` with a pre-assigned ``celery_task_id`` so the caller can dispatch
+    without another write. Results follow the input order; repeated IDs map to the same job and
+    only the first occurrence is reported as created. If a concurrent request
+    wins any cache key, the batch falls back to the per-ID path, which resolves
+    each race individually.
+    """
+    pubmed_ids = list(pubmed_ids)
+    keys = [generation_cache_key(pubmed_id, pipeline_version) for pubmed_id in pubmed_ids]
+    entries = {
+        entry.cache_key: entry
+        for entry in db.query(models.GenerationCache)
+        .options(joinedload(models.GenerationCache.job))
+        .filter(models.GenerationCache.cache_key.in_(set(keys)))
+    }
+
+    resolved: dict[str, BatchJob] = {}
+    try:
+        for pubmed_id, key in zip(pubmed_ids, keys):
+            if key in resolved:
+                continue
+            entry = entries.get(key)
+            if entry and entry.job.status in REUSABLE_JOB_STATUSES:
+                resolved[key] = BatchJob.from_job(pubmed_id, entry.job, created=False)
+                continue
+
+            video = models.Video(
+                id=models.default_uuid(), pubmed_id=normalize_pubmed_id(pubmed_id), user=user, status="queued"
+            )
+            job = models.Job(
+                id=models.default_uuid(),
+                video=video,
+                status="queued",
+                celery_task_id=str(uuid4()),
+                priority=priority,
+                queue=queue,
+            )
+            db.add_all([video, job])
+            if entry is None:
+                db.add(models.GenerationCache(cache_key=key, job_id=job.id))
+            else:
+                db.flush()
+                swapped = db.execute(
+                    update(models.GenerationCache)
+                    .where(
+                        models.GenerationCache.cache_key == key,
+                        models.GenerationCache.job_id == entry.job_id,
+                    )
+                    .values(job_id=job.id)
+                    .execution_options(synchronize_session=False)
+                )
+                if swapped.rowcount != 1:
+                    raise IntegrityError("generation cache entry changed concurrently", None, None)
+            resolved[key] = BatchJob(pubmed_id, job.id, video.id, job.status, job.celery_task_id, True)
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return _get_or_create_cached_jobs_one_by_one(db, pubmed_ids, user, pipeline_version, priority, queue)
+
+    return _in_input_order(pubmed_ids, keys, resolved)
+
+
+def _get_or_create_cached_jobs_one_by_one(
+    db: Session,
+    pubmed_ids: list[str],
+    user: Optional[models.User],
+    pipeline_version: str,
+    priority: str = "normal",
+    queue: Optional[str] = None,
+) -> list[BatchJob]:
+    keys = [generation_cache_key(pubmed_id, pipeline_version) for pubmed_id in pubmed_ids]
+    resolved: dict[str, BatchJob] = {}
+    for pubmed_id, key in zip(pubmed_ids, keys):
+        if key in resolved:
+            continue
+        job, created = get_or_create_cached_job(db, pubmed_id, user, pipeline_version, priority)
+        if created:
+            job = update_job(db, job.id, status="queued", celery_task_id=str(uuid4()), queue=queue)
+        resolved[key] = BatchJob.from_job(pubmed_id, job, created)
+    return _in_input_order(pubmed_ids, keys, resolved)
+
+
+def _in_input_order(pubmed_ids: list[str], keys: list[str], resolved: dict[str, BatchJob]) -> list[BatchJob]:
+    results = []
+    returned: set[str] = set()
+    for pubmed_id, key in zip(pubmed_ids, keys):
+        result = resolved[key]._replace(pubmed_id=pubmed_id)
+        if key in returned:
+            result = result._replace(created=False)
+        results.append(result)
+        returned.add(key)
+    return results
+
+
+def mark_jobs_failed(db: Session, job_ids: list[str], error_message: str) -> None:
+    """Fail many jobs and their videos with two set-based UPDATEs."""
+    if not job_ids:
+        return
+    db.execute(
+        update(models.Job)
+        .where(models.Job.id.in_(job_ids))
+        .values(status="failed", version=models.Job.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    video_ids = select(models.Job.video_id).where(models.Job.id.in_(job_ids))
+    db.execute(
+        update(models.Video)
+        .where(models.Video.id.in_(video_ids))
+        .values(status="failed", error_message=error_message)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+
 def get_job_with_video(db: Session, job_id: str) -> Optional[models.Job]:
     return (
         db.query(models.Job)
@@ -41,15 +351,95 @@ def get_job_with_video(db: Session, job_id: str) -> Optional[models.Job]:
     )
 
 
-def list_videos(db: Session, limit: int = 50) -> list[models.Video]:
-    return (
-        db.query(models.Video)
-        .order_by(models.Video.created_at.desc())
+class VideoCursor(NamedTuple):
+    """Keyset position in the newest-first video listing."""
+
+    created_at: datetime
+    video_id: str
+
+
+def encode_video_cursor(cursor: VideoCursor) -> str:
+    raw = json.dumps([cursor.created_at.isoformat(), cursor.video_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_video_cursor(token: str) -> VideoCursor:
+    """Parse a token from :func:`encode_video_cursor`; raises ``ValueError`` if malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        created_at, video_id = json.loads(raw)
+        return VideoCursor(datetime.fromisoformat(created_at), str(video_id))
+    except (binascii.Error, TypeError, ValueError) as exc:
+        raise ValueError("invalid cursor") from exc
+
+
+def video_page_query(
+    limit: int,
+    *,
+    after: Optional[VideoCursor] = None,
+    user_email: Optional[str] = None,
+    status: Optional[str] = None,
+    pubmed_id: Optional[str] = None,
+) -> Select:
+    """Newest-first projection of videos and their jobs, keyset-paginated on ``(created_at, id)``.
+
+    Selects plain columns rather than ORM entities, and seeks past ``after``
+    instead of using OFFSET, so every page costs the same as the first one.
+    Videos store normalized PubMed IDs, so ``pubmed_id`` is normalized the same way.
+    """
+    query = (
+        select(
+            models.Video.id,
+            models.Video.pubmed_id,
+            models.Video.status,
+            models.Video.video_url,
+            models.Video.error_message,
+            models.Video.created_at,
+            models.Video.updated_at,
+            models.Job.id.label("job_id"),
+            models.Job.progress,
+        )
+        .outerjoin(models.Job, models.Job.video_id == models.Video.id)
+        .order_by(models.Video.created_at.desc(), models.Video.id.desc())
         .limit(limit)
-        .all()
     )
+    if after is not None:
+        query = query.where(tuple_(models.Video.created_at, models.Video.id) < tuple_(*after))
+    if user_email is not None:
+        user_id = select(models.User.id).where(models.User.email == user_email).scalar_subquery()
+        query = query.where(models.Video.user_id == user_id)
+    if status is not None:
+        query = query.where(models.Video.status == status)
+    if pubmed_id is not None:
+        query = query.where(models.Video.pubmed_id == normalize_pubmed_id(pubmed_id))
+    return query
 
 
+def list_videos(
+    db: Session,
+    limit: int = 50,
+    *,
+    after: Optional[VideoCursor] = None,
+    user_email: Optional[str] = None,
+    status: Optional[str] = None,
+    pubmed_id: Optional[str] = None,
+) -> tuple[list, Optional[VideoCursor]]:
+    """Return ``(rows, next_cursor)``; ``next_cursor`` is ``None`` on the last page."""
+    rows = db.execute(
+        video_page_query(limit + 1, after=after, user_email=user_email, status=status, pubmed_id=pubmed_id)
+    ).all()
+    return split_video_page(rows, limit)
+
+
+def split_video_page(rows: list, limit: int) -> tuple[list, Optional[VideoCursor]]:
+    """Trim a ``limit + 1`` fetch to ``limit`` rows and derive the next cursor from the last one."""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, VideoCursor(rows[-1].created_at, rows[-1].id)
+
+
+@traced("crud.update_job")
 def update_job(
     db: Session,
     job_id: str,
@@ -57,7 +447,9 @@ def update_job(
     status: Optional[str] = None,
     progress: Optional[int] = None,
     celery_task_id: Optional[str] = None,
+    queue: Optional[str] = None,
     video_url: Optional[str] = None,
+    storage_key: Optional[str] = None,
     error_message: Optional[str] = None,
 ) -> Optional[models.Job]:
     """Update job/video state and persist changes."""
@@ -78,10 +470,16 @@ def update_job(
         job.progress = progress
     if celery_task_id is not None:
         job.celery_task_id = celery_task_id
+    if queue is not None:
+        job.queue = queue
+
+    job.version = models.Job.version + 1
 
     if job.video:
         if video_url is not None:
             job.video.video_url = video_url
+        if storage_key is not None:
+            job.video.storage_key = storage_key
         if error_message is not None:
             job.video.error_message = error_message
 
@@ -89,3 +487,189 @@ def update_job(
     db.commit()
     db.refresh(job)
     return job
+
+
+def _set_video_status(db: Session, job_id: str, status: str, error_message: Optional[str] = None) -> None:
+    values = {"status": status}
+    if error_message is not None:
+        values["error_message"] = error_message
+    db.execute(
+        update(models.Video)
+        .where(models.Video.id == select(models.Job.video_id).where(models.Job.id == job_id).scalar_subquery())
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+
+
+@traced("crud.set_job_progress")
+def set_job_progress(
+    db: Session,
+    job_id: str,
+    *,
+    progress: Optional[int] = None,
+    status: Optional[str] = None,
+    celery_task_id: Optional[str] = None,
+) -> bool:
+    """Write progress/status with blind UPDATEs (no SELECT, no refresh).
+
+    Progress-only writes are a single statement; a status change also updates
+    the owning video. Cancelled jobs are left alone. Every write bumps
+    ``Job.version``. Returns ``False`` if the job does not exist or was cancelled.
+    """
+    values: dict = {}
+    if progress is not None:
+        values["progress"] = progress
+    if status is not None:
+        values["status"] = status
+    if celery_task_id is not None:
+        values["celery_task_id"] = celery_task_id
+    if not values:
+        return True
+
+    result = db.execute(
+        update(models.Job)
+        .where(models.Job.id == job_id, models.Job.status != "cancelled")
+        .values(**values, version=models.Job.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    if status is not None and result.rowcount == 1:
+        _set_video_status(db, job_id, status)
+    db.commit()
+    return result.rowcount == 1
+
+
+@traced("crud.save_checkpoint")
+def save_checkpoint(db: Session, job_id: str, stage: str, artifacts: dict[str, str]) -> None:
+    """Record ``stage`` as finished along with the artifact references produced so far."""
+    db.execute(
+        update(models.Job)
+        .where(models.Job.id == job_id)
+        .values(last_stage=stage, checkpoint=json.dumps(artifacts))
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+
+def load_checkpoint(job: models.Job) -> dict[str, str]:
+    return json.loads(job.checkpoint) if job.checkpoint else {}
+
+
+@traced("crud.start_attempt")
+def start_attempt(db: Session, job_id: str, *, progress: int, celery_task_id: str) -> Optional[models.Job]:
+    """Mark a job processing for a new pipeline attempt and bump its attempt counter."""
+    job = get_job_with_video(db, job_id)
+    if job is None:
+        return None
+    job.status = "processing"
+    job.progress = progress
+    job.celery_task_id = celery_task_id
+    job.attempts = (job.attempts or 0) + 1
+    job.version = models.Job.version + 1
+    if job.video:
+        job.video.status = "processing"
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def reset_job_for_retry(
+    db: Session, job_id: str, celery_task_id: str, queue: Optional[str] = None
+) -> Optional[models.Job]:
+    """Re-queue a failed or cancelled job in place, keeping its checkpoint so the retry resumes."""
+    job = get_job_with_video(db, job_id)
+    if job is None:
+        return None
+    job.status = "queued"
+    job.celery_task_id = celery_task_id
+    job.queue = queue
+    job.version = models.Job.version + 1
+    if job.video:
+        job.video.status = "queued"
+        job.video.error_message = None
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def touch_job(db: Session, job_id: str) -> bool:
+    """Heartbeat a processing job. Returns ``False`` once it is no longer processing."""
+    result = db.execute(
+        update(models.Job)
+        .where(models.Job.id == job_id, models.Job.status == "processing")
+        .values(updated_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount == 1
+
+
+def get_job_status(db: Session, job_id: str) -> Optional[str]:
+    return db.execute(select(models.Job.status).where(models.Job.id == job_id)).scalar_one_or_none()
+
+
+@traced("crud.cancel_job")
+def cancel_job(db: Session, job_id: str) -> bool:
+    """Mark a pending, queued or processing job cancelled. Returns ``False`` if it was not cancellable.
+
+    The status check is part of the UPDATE, so a job that finishes concurrently
+    keeps its terminal state.
+    """
+    result = db.execute(
+        update(models.Job)
+        .where(models.Job.id == job_id, models.Job.status.in_(CANCELLABLE_JOB_STATUSES))
+        .values(status="cancelled", version=models.Job.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        db.rollback()
+        return False
+    _set_video_status(db, job_id, "cancelled")
+    db.commit()
+    return True
+
+
+def find_stale_jobs(db: Session, older_than: datetime, limit: int) -> list[models.Job]:
+    """Processing jobs whose heartbeat is older than ``older_than``, oldest first."""
+    return (
+        db.query(models.Job)
+        .options(joinedload(models.Job.video))
+        .filter(models.Job.status == "processing", models.Job.updated_at < older_than)
+        .order_by(models.Job.updated_at)
+        .limit(limit)
+        .all()
+    )
+
+
+def claim_stale_job(
+    db: Session,
+    job: models.Job,
+    *,
+    status: str,
+    celery_task_id: Optional[str] = None,
+    error_message: Optional[str] = None,
+) -> bool:
+    """Move a job returned by :func:`find_stale_jobs` to ``status``.
+
+    Compare-and-swap on the heartbeat seen by the sweep: if the job has since
+    made progress, or another reaper already claimed it, nothing changes and
+    ``False`` is returned.
+    """
+    values: dict = {"status": status}
+    if celery_task_id is not None:
+        values["celery_task_id"] = celery_task_id
+    result = db.execute(
+        update(models.Job)
+        .where(
+            models.Job.id == job.id,
+            models.Job.status == "processing",
+            models.Job.updated_at == job.updated_at,
+        )
+        .values(**values, version=models.Job.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        db.rollback()
+        return False
+    _set_video_status(db, job.id, status, error_message)
+    db.commit()
+    return True
@@ -0,0 +1,35 @@
+"""Async counterparts of the read-heavy helpers in :mod:`app.crud`."""
+
+from __future__ import annotations
+
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+
+from . import crud, models
+
+
+async def get_job_with_video(db: AsyncSession, job_id: str) -> Optional[models.Job]:
+    return await db.scalar(
+        select(models.Job).options(joinedload(models.Job.video)).where(models.Job.id == job_id)
+    )
+
+
+async def list_videos(
+    db: AsyncSession,
+    limit: int = 50,
+    *,
+    after: Optional[crud.VideoCursor] = None,
+    user_email: Optional[str] = None,
+    status: Optional[str] = None,
+    pubmed_id: Optional[str] = None,
+) -> tuple[list, Optional[crud.VideoCursor]]:
+    """Async version of :func:`app.crud.list_videos`."""
+    result = await db.execute(
+        crud.video_page_query(
+            limit + 1, after=after, user_email=user_email, status=status, pubmed_id=pubmed_id
+        )
+    )
+    return crud.split_video_page(result.all(), limit)
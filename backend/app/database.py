@@ -3,21 +3,173 @@
 from __future__ import annotations
 
 import os
-from typing import Generator
+import threading
+from typing import Any, AsyncGenerator, Generator, Optional
 
-from dotenv import load_dotenv
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
-load_dotenv()
+from .queue.config import env_bool, load_environment
 
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./hidden_hill.db")
 
-connect_args = {"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
-engine = create_engine(DATABASE_URL, future=True, echo=False, connect_args=connect_args)
-SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False, future=True)
+def database_url() -> str:
+    load_environment()
+    return os.getenv("DATABASE_URL", "sqlite:///./hidden_hill.db")
+
+
+def async_db_enabled() -> bool:
+    """Serve read-heavy routes from the async engine when ``DB_ASYNC`` is enabled."""
+    load_environment()
+    return env_bool("DB_ASYNC")
+
+
+def _is_memory_sqlite(url: str) -> bool:
+    return url.startswith("sqlite") and (":memory:" in url or url.rstrip("/").endswith("sqlite:"))
+
+
+def engine_options(url: str) -> dict[str, Any]:
+    """Build ``create_engine`` keyword arguments for ``url`` from ``DB_*`` environment variables.
+
+    Pool sizing applies to every pooled engine; ``DB_STATEMENT_TIMEOUT_MS`` is sent
+    to PostgreSQL as ``statement_timeout``. In-memory SQLite keeps SQLAlchemy's
+    default single-connection pool.
+    """
+    options: dict[str, Any] = {"future": True, "echo": env_bool("DB_ECHO")}
+    dialect, _, driver = url.partition("://")[0].partition("+")
+    connect_args: dict[str, Any] = {}
+
+    if dialect == "sqlite":
+        if not driver:
+            connect_args["check_same_thread"] = False
+        if _is_memory_sqlite(url):
+            options["connect_args"] = connect_args
+            return options
+        if driver == "aiosqlite":
+            # SQLAlchemy defaults aiosqlite file databases to NullPool; pool them like the sync engine.
+            options["poolclass"] = AsyncAdaptedQueuePool
+
+    options.update(
+        pool_size=int(os.getenv("DB_POOL_SIZE", "5")),
+        max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        pool_recycle=int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        pool_pre_ping=env_bool("DB_POOL_PRE_PING", True),
+    )
+
+    statement_timeout_ms = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
+    if dialect == "postgresql" and statement_timeout_ms > 0:
+        if driver == "asyncpg":
+            connect_args["server_settings"] = {"statement_timeout": str(statement_timeout_ms)}
+        else:
+            connect_args["options"] = f"-c statement_timeout={statement_timeout_ms}"
+
+    options["connect_args"] = connect_args
+    return options
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """Enable WAL and relaxed fsync for local SQLite so readers do not block the writer."""
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA busy_timeout={int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000'))}")
+        cursor.execute(f"PRAGMA journal_mode={os.getenv('SQLITE_JOURNAL_MODE', 'WAL')}")
+        cursor.execute(f"PRAGMA synchronous={os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')}")
+    finally:
+        cursor.close()
+
+
+def create_db_engine(url: str) -> Engine:
+    """Create a sync engine tuned from the environment (see :func:`engine_options`)."""
+    db_engine = create_engine(url, **engine_options(url))
+    if url.startswith("sqlite") and not _is_memory_sqlite(url):
+        event.listen(db_engine, "connect", _apply_sqlite_pragmas)
+    return db_engine
+
+
+def pool_status(db_engine: Optional[Engine] = None) -> dict[str, Any]:
+    """Snapshot connection-pool counters for health/metrics endpoints."""
+    pool = (db_engine or get_engine()).pool
+    status: dict[str, Any] = {"pool": type(pool).__name__}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        counter = getattr(pool, name, None)
+        if callable(counter):
+            status[name] = counter()
+    return status
+
+
+class LazySessionmaker(sessionmaker):
+    """``sessionmaker`` that binds to :func:`get_engine` when the first unbound session is opened."""
+
+    def __call__(self, **local_kw: Any):
+        if self.kw.get("bind") is None and "bind" not in local_kw:
+            self.configure(bind=get_engine())
+        return super().__call__(**local_kw)
+
+
+SessionLocal = LazySessionmaker(autocommit=False, autoflush=False, future=True)
 Base = declarative_base()
 
+_engine: Optional[Engine] = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> Engine:
+    """Create the sync engine on first use, so importing the app opens no pool or driver."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = create_db_engine(database_url())
+        return _engine
+
+
+def to_async_url(url: str) -> str:
+    """Map a sync database URL onto its async driver (aiosqlite / asyncpg)."""
+    scheme, sep, rest = url.partition("://")
+    dialect = scheme.split("+", 1)[0]
+    driver = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}.get(dialect)
+    if driver is None:
+        raise ValueError(f"No async driver configured for database URL scheme {scheme!r}")
+    return f"{dialect}+{driver}{sep}{rest}"
+
+
+AsyncSessionLocal = async_sessionmaker(autoflush=False, expire_on_commit=False)
+_async_engine: Optional[AsyncEngine] = None
+
+
+def get_async_engine() -> AsyncEngine:
+    """Create the async engine on first use so sync-only processes never open it."""
+    global _async_engine
+    if _async_engine is None:
+        url = os.getenv("ASYNC_DATABASE_URL") or to_async_url(database_url())
+        _async_engine = create_async_engine(url, **engine_options(url))
+        if url.startswith("sqlite") and not _is_memory_sqlite(url):
+            event.listen(_async_engine.sync_engine, "connect", _apply_sqlite_pragmas)
+        AsyncSessionLocal.configure(bind=_async_engine)
+    return _async_engine
+
+
+def dispose_engines_after_fork() -> None:
+    """Drop pooled connections inherited from a parent process without closing them.
+
+    Call in a forked child (e.g. Celery prefork workers) so the child opens its
+    own connections instead of sharing sockets with the parent.
+    """
+    if _engine is not None:
+        _engine.dispose(close=False)
+    if _async_engine is not None:
+        _async_engine.sync_engine.dispose(close=False)
+
+
+async def dispose_engines() -> None:
+    """Close every pooled connection; called when the API shuts down."""
+    if _engine is not None:
+        _engine.dispose()
+    if _async_engine is not None:
+        await _async_engine.dispose()
+
 
 def get_db() -> Generator:
     """Yield a database session for dependency injection."""
@@ -26,3 +178,10 @@ def get_db() -> Generator:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """Yield an async database session for dependency injection."""
+    get_async_engine()
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,148 @@
+"""Publish/subscribe job progress events for streaming to clients."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Any, Iterator, Optional
+
+from .queue.config import get_settings
+from .redis_client import get_redis
+from .status_cache import get_status_cache
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = "hidden-hill:job-progress:"
+
+
+def channel_for(job_id: str) -> str:
+    return f"{CHANNEL_PREFIX}{job_id}"
+
+
+class Subscription:
+    """Receives events for one job on the subscriber's event loop."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._loop = loop
+        self._queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue()
+
+    def push(self, event: dict[str, Any]) -> None:
+        """Thread-safe hand-off from publishers or the Redis listener thread."""
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, event)
+
+    async def get(self, timeout: float) -> Optional[dict[str, Any]]:
+        """Return the next event, or ``None`` if none arrives within ``timeout`` seconds."""
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class LocalProgressBus:
+    """In-process fan-out; enough for a single process or eager Celery."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._subscribers: dict[str, set[Subscription]] = {}
+
+    def publish(self, job_id: str, event: dict[str, Any]) -> None:
+        self._dispatch(job_id, event)
+
+    @contextmanager
+    def subscribe(self, job_id: str) -> Iterator[Subscription]:
+        """Register a subscription; must be entered from a running event loop."""
+        subscription = Subscription(asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers.setdefault(job_id, set()).add(subscription)
+        try:
+            yield subscription
+        finally:
+            with self._lock:
+                subscribers = self._subscribers.get(job_id)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[job_id]
+
+    def _dispatch(self, job_id: str, event: dict[str, Any]) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers.get(job_id, ()))
+        for subscription in subscribers:
+            subscription.push(event)
+
+
+class RedisProgressBus(LocalProgressBus):
+    """Publish through Redis pub/sub; each API process holds one pattern subscription.
+
+    Workers only publish. API processes start a single listener thread on first
+    subscribe and fan messages out to local subscribers, so the Redis connection
+    count does not grow with the number of connected clients.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._listener: Optional[threading.Thread] = None
+
+    def publish(self, job_id: str, event: dict[str, Any]) -> None:
+        try:
+            get_redis().publish(channel_for(job_id), json.dumps(event))
+        except Exception as exc:  # pragma: no cover - progress streaming is best effort
+            logger.warning("Unable to publish progress for job %s: %s", job_id, exc)
+
+    @contextmanager
+    def subscribe(self, job_id: str) -> Iterator[Subscription]:
+        self._ensure_listener()
+        with super().subscribe(job_id) as subscription:
+            yield subscription
+
+    def _ensure_listener(self) -> None:
+        with self._lock:
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(
+                    target=self._listen, name="progress-bus-listener", daemon=True
+                )
+                self._listener.start()
+
+    def _listen(self) -> None:  # pragma: no cover - requires Redis
+        while True:
+            pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.psubscribe(f"{CHANNEL_PREFIX}*")
+                for message in pubsub.listen():
+                    channel = message["channel"].decode()
+                    self._dispatch(channel[len(CHANNEL_PREFIX):], json.loads(message["data"]))
+            except Exception as exc:
+                logger.warning("Progress listener lost Redis connection: %s", exc)
+                time.sleep(1)
+            finally:
+                pubsub.close()
+
+
+@lru_cache()
+def get_progress_bus() -> LocalProgressBus:
+    """Return the configured progress bus for this process."""
+    if get_settings().progress_bus == "local":
+        return LocalProgressBus()
+    return RedisProgressBus()
+
+
+def publish_progress(
+    job_id: str,
+    *,
+    progress: Optional[int] = None,
+    status: Optional[str] = None,
+    **extra: Any,
+) -> None:
+    """Publish a progress event; fields left as ``None`` are omitted.
+
+    Every visible job change is published here after it is committed, so this is
+    also where the cached status response is dropped.
+    """
+    get_status_cache().invalidate(job_id)
+    event = {"job_id": job_id, "progress": progress, "status": status, **extra}
+    get_progress_bus().publish(job_id, {key: value for key, value in event.items() if value is not None})
@@ -0,0 +1,124 @@
+"""Background dependency checks served from a cache to health probes."""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from datetime import datetime
+from functools import lru_cache
+from typing import Callable, NamedTuple, Optional
+
+from sqlalchemy import text
+
+from .database import SessionLocal
+from .queue.config import get_settings
+from .redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Dependencies the API cannot serve requests without; workers are reported but not required.
+READINESS_CHECKS = ("database", "redis")
+
+
+def check_database() -> bool:
+    with SessionLocal() as db:
+        db.execute(text("SELECT 1"))
+    return True
+
+
+def check_redis() -> bool:
+    return bool(get_redis().ping())
+
+
+def check_celery() -> bool:
+    """Ping Celery workers; the broadcast waits up to a second for replies."""
+    from .queue.celery_app import celery_app
+
+    result = celery_app.control.inspect(timeout=1.0).ping()
+    return bool(result)
+
+
+DEFAULT_CHECKS: dict[str, Callable[[], bool]] = {
+    "database": check_database,
+    "redis": check_redis,
+    "celery_ping": check_celery,
+}
+
+
+class HealthSnapshot(NamedTuple):
+    results: dict[str, bool]
+    checked_at: datetime
+    monotonic: float
+
+
+class HealthMonitor:
+    """Run dependency checks every ``interval`` seconds on a daemon thread.
+
+    Probes read the last snapshot instead of touching Redis or the broker, so
+    each request is O(1) however often the load balancer polls. A snapshot
+    older than ``ttl`` is reported as stale and fails readiness.
+    """
+
+    def __init__(
+        self,
+        checks: Optional[dict[str, Callable[[], bool]]] = None,
+        interval: Optional[float] = None,
+        ttl: Optional[float] = None,
+    ) -> None:
+        settings = get_settings()
+        self.checks = dict(checks if checks is not None else DEFAULT_CHECKS)
+        self.interval = settings.health_refresh_seconds if interval is None else interval
+        self.ttl = settings.health_cache_ttl_seconds if ttl is None else ttl
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._snapshot: Optional[HealthSnapshot] = None
+
+    def refresh(self) -> HealthSnapshot:
+        results = {}
+        for name, check in self.checks.items():
+            try:
+                results[name] = bool(check())
+            except Exception as exc:
+                logger.debug("Health check %s failed: %s", name, exc)
+                results[name] = False
+        snapshot = HealthSnapshot(results, datetime.utcnow(), time.monotonic())
+        self._snapshot = snapshot
+        return snapshot
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopped.clear()
+                self._thread = threading.Thread(target=self._run, name="health-monitor", daemon=True)
+                self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout=self.interval + 2)
+
+    def snapshot(self) -> HealthSnapshot:
+        """Return the cached snapshot, running the checks inline only before the first refresh."""
+        self.start()
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._lock:
+                snapshot = self._snapshot or self.refresh()
+        return snapshot
+
+    def is_stale(self, snapshot: HealthSnapshot) -> bool:
+        return time.monotonic() - snapshot.monotonic > self.ttl
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self.refresh()
+            self._stopped.wait(self.interval)
+
+
+@lru_cache()
+def get_health_monitor() -> HealthMonitor:
+    """Return the process-wide health monitor."""
+    return HealthMonitor()
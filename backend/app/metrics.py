@@ -0,0 +1,239 @@
+"""Prometheus metrics shared by the API and Celery workers.
+
+Metrics live in the default ``prometheus_client`` registry. When several
+processes serve one target (gunicorn workers, Celery prefork children), set
+``PROMETHEUS_MULTIPROC_DIR`` to an empty directory before start-up so
+:func:`render_latest` aggregates every process's samples.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import logging
+import os
+import time
+from typing import Callable, Optional
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+    start_http_server,
+)
+from prometheus_client.core import GaugeMetricFamily
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .routing import route_template
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["CONTENT_TYPE_LATEST", "MetricsMiddleware", "render_latest"]
+
+MULTIPROCESS = bool(os.getenv("PROMETHEUS_MULTIPROC_DIR"))
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "hidden_hill_http_request_duration_seconds",
+    "HTTP request latency by route template.",
+    ["method", "route", "status"],
+)
+HTTP_REQUEST_DB_QUERIES = Histogram(
+    "hidden_hill_http_request_db_queries",
+    "Database queries issued while serving one HTTP request.",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 50, 100),
+)
+HTTP_REQUEST_DB_SECONDS = Histogram(
+    "hidden_hill_http_request_db_seconds",
+    "Time spent in database queries while serving one HTTP request.",
+    ["route"],
+)
+DB_QUERY_SECONDS = Histogram(
+    "hidden_hill_db_query_duration_seconds",
+    "Duration of individual database statements.",
+    ["operation"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+TASK_SECONDS = Histogram(
+    "hidden_hill_task_duration_seconds",
+    "Celery task run time; pipeline stages are labelled by stage name.",
+    ["task", "state"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600),
+)
+JOB_START_DELAY_SECONDS = Histogram(
+    "hidden_hill_job_start_delay_seconds",
+    "Time from job creation until a worker starts its first attempt, by priority class.",
+    ["priority"],
+    buckets=(0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 900, 1800, 3600),
+)
+PROGRESS_WRITES = Counter(
+    "hidden_hill_progress_writes_total",
+    "Job progress rows written by JobProgressReporter.",
+    ["kind"],
+)
+PROGRESS_COALESCED = Counter(
+    "hidden_hill_progress_updates_coalesced_total",
+    "Progress updates merged into a later write instead of hitting the database.",
+)
+ARTIFACT_CACHE_LOOKUPS = Counter(
+    "hidden_hill_artifact_cache_lookups_total",
+    "Stage artifact cache lookups.",
+    ["stage", "result"],
+)
+GENERATION_CACHE_LOOKUPS = Counter(
+    "hidden_hill_generation_cache_lookups_total",
+    "Generation requests answered by an existing job (hit) or a new one (miss).",
+    ["result"],
+)
+PUBMED_REQUESTS = Counter(
+    "hidden_hill_pubmed_requests_total",
+    "E-utilities efetch requests by database and outcome.",
+    ["db", "result"],
+)
+PUBMED_PAPERS = Counter(
+    "hidden_hill_pubmed_papers_total",
+    "Papers requested from the PubMed client, served from its disk cache or fetched.",
+    ["source"],
+)
+
+# [query count, seconds] for the HTTP request being served in this context.
+_request_db: contextvars.ContextVar[Optional[list]] = contextvars.ContextVar("request_db", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    started = conn.info["query_started"].pop()
+    elapsed = time.perf_counter() - started
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+    DB_QUERY_SECONDS.labels(operation).observe(elapsed)
+    stats = _request_db.get()
+    if stats is not None:
+        stats[0] += 1
+        stats[1] += elapsed
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(context) -> None:
+    if context.connection is not None:
+        started = context.connection.info.get("query_started")
+        if started:
+            started.pop()
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency and database usage per route."""
+
+    def __init__(self, app: Callable) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        stats = [0, 0.0]
+        token = _request_db.set(stats)
+
+        async def send_wrapper(message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            _request_db.reset(token)
+            route = route_template(scope)
+            HTTP_REQUEST_SECONDS.labels(scope["method"], route, str(status_code)).observe(elapsed)
+            HTTP_REQUEST_DB_QUERIES.labels(route).observe(stats[0])
+            HTTP_REQUEST_DB_SECONDS.labels(route).observe(stats[1])
+
+
+class QueueDepthCollector:
+    """Report the broker backlog of every Celery queue at scrape time."""
+
+    def collect(self):
+        from .admission import queue_depths
+        from .queue.config import get_settings
+
+        family = GaugeMetricFamily(
+            "hidden_hill_queue_depth", "Messages waiting in each Celery queue.", labels=["queue"]
+        )
+        try:
+            depths = queue_depths(get_settings().all_queues)
+        except Exception as exc:
+            logger.debug("Unable to read queue depths: %s", exc)
+            return
+        for queue, depth in depths.items():
+            family.add_metric([queue], depth)
+        yield family
+
+
+_queue_registry = CollectorRegistry(auto_describe=False)
+_queue_registry.register(QueueDepthCollector())
+
+
+def _process_registry() -> CollectorRegistry:
+    if not MULTIPROCESS:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def render_latest(include_queues: bool = True) -> bytes:
+    """Exposition text for this process (or all processes in multiprocess mode)."""
+    output = generate_latest(_process_registry())
+    if include_queues:
+        output += generate_latest(_queue_registry)
+    return output
+
+
+def stage_label(task_name: str) -> str:
+    prefix = "videos.stage."
+    return task_name[len(prefix):] if task_name.startswith(prefix) else task_name
+
+
+_task_started: dict[str, float] = {}
+
+
+def task_started(task_id: str) -> None:
+    _task_started[task_id] = time.perf_counter()
+
+
+def task_finished(task_id: str, task_name: str, state: Optional[str]) -> None:
+    started = _task_started.pop(task_id, None)
+    if started is not None:
+        TASK_SECONDS.labels(stage_label(task_name), state or "UNKNOWN").observe(time.perf_counter() - started)
+
+
+def start_worker_exporter(port: int) -> None:
+    """Serve worker metrics over HTTP from the Celery main process."""
+    if not MULTIPROCESS:
+        logger.warning(
+            "PROMETHEUS_MULTIPROC_DIR is not set; metrics from prefork children will not be exported"
+        )
+    try:
+        start_http_server(port, registry=_process_registry())
+    except OSError as exc:
+        logger.warning("Worker metrics exporter could not bind port %s: %s", port, exc)
+        return
+    logger.info("Worker metrics exporter listening on :%s", port)
+
+
+def mark_process_dead(pid: int) -> None:
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(pid)
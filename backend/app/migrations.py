@@ -0,0 +1,48 @@
+"""Run Alembic migrations programmatically."""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Optional
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, inspect
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def alembic_config(database_url: Optional[str] = None) -> Config:
+    config = Config(str(BACKEND_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BACKEND_DIR / "migrations"))
+    if database_url:
+        config.set_main_option("sqlalchemy.url", database_url)
+    return config
+
+
+def unversioned_tables(database_url: str) -> list[str]:
+    """Tables of a database that Alembic has never versioned (built by ``create_all``), else []."""
+    engine = create_engine(database_url)
+    try:
+        tables = inspect(engine).get_table_names()
+    finally:
+        engine.dispose()
+    return [] if "alembic_version" in tables else sorted(tables)
+
+
+def upgrade_database(database_url: Optional[str] = None, revision: str = "head") -> None:
+    """Upgrade the schema at ``database_url`` (default: ``DATABASE_URL``) to ``revision``.
+
+    Raises ``RuntimeError`` for a database created by ``create_all`` before migrations
+    existed: revision 0001 would try to create its tables again.
+    """
+    from .database import database_url as default_database_url
+
+    existing = unversioned_tables(database_url or default_database_url())
+    if existing:
+        raise RuntimeError(
+            f"The database already has tables ({', '.join(existing)}) but no Alembic version. "
+            "If its schema matches revision 0001, mark it with `alembic stamp 0001` (from backend/) "
+            "and migrate again; otherwise recreate it. See 'Database Schema' in backend/README.md."
+        )
+    command.upgrade(alembic_config(database_url), revision)
@@ -5,7 +5,7 @@ from __future__ import annotations
 from datetime import datetime
 from uuid import uuid4
 
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import relationship
 
 from .database import Base
@@ -30,12 +30,21 @@ class User(Base):
 
 class Video(Base):
     __tablename__ = "videos"
+    __table_args__ = (
+        Index("ix_videos_pubmed_id", "pubmed_id"),
+        # Newest-first listings, globally, per status and per user, with id as keyset tiebreaker.
+        Index("ix_videos_created_at_id", "created_at", "id"),
+        Index("ix_videos_status_created_at_id", "status", "created_at", "id"),
+        Index("ix_videos_user_id_created_at", "user_id", "created_at", "id"),
+    )
 
     id = Column(String, primary_key=True, default=default_uuid)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     pubmed_id = Column(String, nullable=False)
     status = Column(String, nullable=False, default="pending")
     video_url = Column(String, nullable=True)
+    # Key of the finished video in the configured storage backend.
+    storage_key = Column(String, nullable=True)
     error_message = Column(String, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -49,15 +58,73 @@ class Video(Base):
 
 class Job(Base):
     __tablename__ = "jobs"
+    __table_args__ = (
+        # One job per video; also serves the job -> video join.
+        Index("uq_jobs_video_id", "video_id", unique=True),
+        Index("ix_jobs_status_created_at", "status", "created_at"),
+        Index("ix_jobs_celery_task_id", "celery_task_id"),
+        # Stale-job sweeps: oldest heartbeat among processing jobs.
+        Index("ix_jobs_status_updated_at", "status", "updated_at"),
+    )
 
     id = Column(String, primary_key=True, default=default_uuid)
     video_id = Column(String, ForeignKey("videos.id"), nullable=False)
     status = Column(String, nullable=False, default="pending")
     progress = Column(Integer, nullable=False, default=0)
     celery_task_id = Column(String, nullable=True)
+    # Resume point: last finished pipeline stage and a JSON map of its artifact references.
+    last_stage = Column(String, nullable=True)
+    checkpoint = Column(Text, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    # Scheduling class from queue.config.PRIORITY_LEVELS ("high", "normal", "low").
+    priority = Column(String, nullable=False, default="normal", server_default="normal")
+    # Fair-share lane the job was dispatched to (None without lanes); the reaper requeues it there.
+    queue = Column(String, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Heartbeat: bumped by every write and periodically while a stage runs.
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Bumped by every write that changes the status response (not by heartbeats); the status ETag.
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
     video = relationship("Video", back_populates="job")
 
     def __repr__(self) -> str:
         return f"<Job id={self.id} status={self.status} progress={self.progress}>"
+
+
+class GenerationCache(Base):
+    """Maps a normalized pubmed_id + pipeline version to the job that owns its video."""
+
+    __tablename__ = "generation_cache"
+    __table_args__ = (Index("ix_generation_cache_job_id", "job_id"),)
+
+    cache_key = Column(String, primary_key=True)
+    job_id = Column(String, ForeignKey("jobs.id"), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    job = relationship("Job")
+
+    def __repr__(self) -> str:
+        return f"<GenerationCache key={self.cache_key} job_id={self.job_id}>"
+
+
+class IdempotencyKey(Base):
+    """Job returned for an ``Idempotency-Key``, so client retries replay it instead of enqueueing again."""
+
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (Index("ix_idempotency_keys_expires_at", "expires_at"),)
+
+    # SHA-256 of the caller's scope and the header value.
+    key = Column(String, primary_key=True)
+    # SHA-256 of the request body; reusing a key for a different request is rejected.
+    request_hash = Column(String, nullable=False)
+    job_id = Column(String, ForeignKey("jobs.id"), nullable=False)
+    # True when the original request was answered by an existing job (HTTP 200).
+    cached = Column(Boolean, nullable=False, default=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False)
+
+    job = relationship("Job")
+
+    def __repr__(self) -> str:
+        return f"<IdempotencyKey job_id={self.job_id} expires_at={self.expires_at}>"
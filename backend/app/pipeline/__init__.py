@@ -0,0 +1,5 @@
+"""Video generation pipeline stages and their artifact storage."""
+
+from .stages import STAGE_PROGRESS, STAGES, TRANSIENT_ERRORS, TransientStageError, resume_point, run_stage
+
+__all__ = ["STAGES", "STAGE_PROGRESS", "TRANSIENT_ERRORS", "TransientStageError", "resume_point", "run_stage"]
@@ -0,0 +1,141 @@
+"""On-disk cache for intermediate pipeline outputs.
+
+Stages hand each other *references* (paths relative to the store root) rather
+than file contents, so Celery messages stay small no matter how large the
+script, audio or video gets. Artifacts are addressed by ``(pubmed_id, stage,
+input_hash)``: a retried or regenerated job whose stage inputs are unchanged
+finds the existing artifact and skips the stage. The store is bounded by
+``ARTIFACT_CACHE_MAX_BYTES`` and evicts least-recently-used artifacts.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+import time
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+from .. import metrics
+from ..crud import normalize_pubmed_id
+from ..queue.config import get_settings
+
+
+class ArtifactStore:
+    """Size-bounded, content-addressed artifact directory with LRU eviction.
+
+    Recency is tracked through file mtimes (bumped on every hit), so several
+    worker processes can share one directory. Artifacts used within the last
+    ``protect_seconds`` are never evicted, which keeps in-flight pipelines from
+    losing the inputs of their next stage.
+    """
+
+    def __init__(self, root: str | Path, max_bytes: int, protect_seconds: float = 600) -> None:
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.protect_seconds = protect_seconds
+        self.hits: Counter[str] = Counter()
+        self.misses: Counter[str] = Counter()
+        self._lock = threading.Lock()
+        self._size: Optional[int] = None
+        # When a scan could not get under budget because every file was protected: the
+        # time the oldest of them stops being protected. No point rescanning before then.
+        self._rescan_at = 0.0
+
+    @staticmethod
+    def ref_for(pubmed_id: str, stage: str, input_hash: str, name: str) -> str:
+        key = f"{normalize_pubmed_id(pubmed_id)}\0{stage}\0{input_hash}"
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        return f"{stage}/{digest[:2]}/{digest}/{name}"
+
+    def lookup(self, pubmed_id: str, stage: str, input_hash: str, name: str) -> Optional[str]:
+        """Return the reference of a cached artifact, counting the hit or miss."""
+        ref = self.ref_for(pubmed_id, stage, input_hash, name)
+        path = self.path(ref)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses[stage] += 1
+            metrics.ARTIFACT_CACHE_LOOKUPS.labels(stage, "miss").inc()
+            return None
+        self.hits[stage] += 1
+        metrics.ARTIFACT_CACHE_LOOKUPS.labels(stage, "hit").inc()
+        return ref
+
+    def put_bytes(self, pubmed_id: str, stage: str, input_hash: str, name: str, data: bytes) -> str:
+        ref = self.ref_for(pubmed_id, stage, input_hash, name)
+        path = self.path(ref)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        tmp.replace(path)
+        with self._lock:
+            if self._size is not None:
+                self._size += len(data)
+        self._evict_if_needed()
+        return ref
+
+    def read_bytes(self, ref: str) -> bytes:
+        return self.path(ref).read_bytes()
+
+    def path(self, ref: str) -> Path:
+        path = (self.root / ref).resolve()
+        if self.root.resolve() not in path.parents:
+            raise ValueError(f"Artifact reference escapes store root: {ref!r}")
+        return path
+
+    def stats(self) -> dict:
+        """Hit/miss counters per stage plus totals, for logs and metrics."""
+        hits, misses = sum(self.hits.values()), sum(self.misses.values())
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": hits / (hits + misses) if hits + misses else 0.0,
+            "by_stage": {
+                stage: {"hits": self.hits[stage], "misses": self.misses[stage]}
+                for stage in sorted(set(self.hits) | set(self.misses))
+            },
+        }
+
+    def _evict_if_needed(self) -> None:
+        with self._lock:
+            # Other processes write to the same directory, so the running total is
+            # only a hint; rescan whenever it says we are over budget.
+            if self._size is not None and (self._size <= self.max_bytes or time.time() < self._rescan_at):
+                return
+            files = []
+            for path in self.root.rglob("*"):
+                if path.is_file() and not path.name.startswith("."):
+                    stat = path.stat()
+                    files.append((stat.st_mtime, stat.st_size, path))
+            total = sum(size for _, size, _ in files)
+            cutoff = time.time() - self.protect_seconds
+            self._rescan_at = 0.0
+            for mtime, size, path in sorted(files):
+                if total <= self.max_bytes:
+                    break
+                if mtime > cutoff:
+                    self._rescan_at = mtime + self.protect_seconds
+                    break
+                path.unlink(missing_ok=True)
+                for parent in (path.parent, path.parent.parent):
+                    try:
+                        parent.rmdir()
+                    except OSError:
+                        break
+                total -= size
+            self._size = total
+
+
+@lru_cache()
+def get_artifact_store() -> ArtifactStore:
+    """Return the process-wide artifact store rooted at ``ARTIFACT_DIR``."""
+    settings = get_settings()
+    return ArtifactStore(
+        settings.artifact_dir,
+        max_bytes=settings.artifact_cache_max_bytes,
+        protect_seconds=settings.artifact_cache_protect_seconds,
+    )
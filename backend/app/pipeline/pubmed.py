@@ -0,0 +1,325 @@
+"""Async client for NCBI E-utilities (PubMed and PubMed Central ``efetch``).
+
+One :class:`PubMedClient` per process keeps a pooled ``httpx.AsyncClient`` and
+bounds how many requests are in flight. Papers requested within
+``batch_window`` seconds of each other are coalesced into one ``efetch`` call
+of up to ``batch_size`` IDs, and requests are spaced by a token bucket keyed
+on the NCBI account (3 requests/s without an API key, 10 with one), shared
+across processes when ``RATE_LIMIT_BACKEND=redis``. Fetched article XML is kept
+in an on-disk cache, so a paper is downloaded once per deployment.
+
+``PUBMED_TRANSPORT=fake`` swaps the network for :mod:`.pubmed_fake`, an
+in-process stand-in that serves synthetic articles (local development, tests).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import os
+import threading
+import xml.etree.ElementTree as ET
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, Optional
+
+import httpx
+
+from .. import metrics
+from ..admission import get_rate_limiter
+from ..crud import is_valid_pubmed_id, normalize_pubmed_id
+from ..queue.config import get_settings
+
+EUTILS_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils"
+
+
+class PubMedError(Exception):
+    """E-utilities rejected a request."""
+
+
+class PubMedUnavailable(PubMedError):
+    """A failure worth retrying: rate limited, server error, network or truncated response."""
+
+
+class PaperNotFound(PubMedError):
+    pass
+
+
+def database_for(pubmed_id: str) -> tuple[str, str]:
+    """Map an identifier onto its E-utilities database and UID: ``PMC123`` -> ``("pmc", "123")``.
+
+    Raises :class:`PaperNotFound` for anything that is not a PMID or PMCID, so
+    arbitrary strings never reach the cache path or an ``efetch`` ID list.
+    """
+    if not is_valid_pubmed_id(pubmed_id):
+        raise PaperNotFound(f"Not a PubMed or PMC identifier: {pubmed_id!r}")
+    normalized = normalize_pubmed_id(pubmed_id)
+    if normalized.startswith("PMC"):
+        return "pmc", normalized[3:]
+    return "pubmed", normalized
+
+
+def split_articles(db: str, content: bytes) -> dict[str, bytes]:
+    """Split an ``efetch`` response into one XML document per article, keyed by UID."""
+    try:
+        root = ET.fromstring(content)
+    except ET.ParseError as exc:
+        raise PubMedUnavailable(f"Malformed efetch response: {exc}") from exc
+    articles: dict[str, bytes] = {}
+    if db == "pmc":
+        for article in root.iter("article"):
+            for article_id in article.iter("article-id"):
+                if article_id.get("pub-id-type") in {"pmc", "pmcid"} and article_id.text:
+                    articles[article_id.text.strip().upper().removeprefix("PMC")] = ET.tostring(article)
+                    break
+    else:
+        for article in root.iter("PubmedArticle"):
+            pmid = article.findtext("MedlineCitation/PMID")
+            if pmid:
+                articles[pmid.strip()] = ET.tostring(article)
+    return articles
+
+
+def parse_paper(db: str, xml: bytes) -> dict:
+    """Title and abstract of one article returned by :func:`split_articles`."""
+    article = ET.fromstring(xml)
+    if db == "pmc":
+        title = article.find("front/article-meta/title-group/article-title")
+        abstract = article.find("front/article-meta/abstract")
+    else:
+        title = article.find("MedlineCitation/Article/ArticleTitle")
+        abstract = article.find("MedlineCitation/Article/Abstract")
+    return {
+        "title": " ".join("".join(title.itertext()).split()) if title is not None else "",
+        "abstract": " ".join("".join(abstract.itertext()).split()) if abstract is not None else "",
+    }
+
+
+class PaperCache:
+    """Article XML on disk, one file per ``(db, uid)``; writes are atomic renames."""
+
+    def __init__(self, root: str | Path) -> None:
+        self.root = Path(root)
+
+    def path(self, db: str, uid: str) -> Path:
+        path = (self.root / db / uid[-2:] / f"{uid}.xml").resolve()
+        if self.root.resolve() not in path.parents:
+            raise ValueError(f"Paper UID escapes the cache root: {uid!r}")
+        return path
+
+    def get(self, db: str, uid: str) -> Optional[bytes]:
+        try:
+            return self.path(db, uid).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def put(self, db: str, uid: str, xml: bytes) -> None:
+        path = self.path(db, uid)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(xml)
+        tmp.replace(path)
+
+
+class PubMedClient:
+    """Batched, rate-limited ``efetch`` client; see the module docstring.
+
+    ``transport`` is passed to ``httpx.AsyncClient``, so tests and local runs can
+    use ``httpx.MockTransport`` or any other stand-in for the NCBI servers.
+    """
+
+    def __init__(
+        self,
+        cache: PaperCache,
+        *,
+        base_url: str = EUTILS_URL,
+        api_key: str = "",
+        email: str = "",
+        tool: str = "hidden-hill",
+        max_connections: int = 10,
+        max_concurrency: int = 4,
+        requests_per_second: Optional[float] = None,
+        batch_size: int = 200,
+        batch_window: float = 0.05,
+        timeout: float = 30.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ) -> None:
+        self.cache = cache
+        self.base_url = base_url.rstrip("/")
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.requests_per_second = requests_per_second or (10.0 if api_key else 3.0)
+        self._params = {"retmode": "xml", "tool": tool}
+        if email:
+            self._params["email"] = email
+        if api_key:
+            self._params["api_key"] = api_key
+        self._rate_key = f"ncbi-eutils:{api_key or 'anonymous'}"
+        self._http = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            transport=transport,
+        )
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        # Papers waiting for the next batch of their database, and every unresolved request.
+        self._waiting: dict[str, dict[str, asyncio.Future]] = {}
+        self._inflight: dict[tuple[str, str], asyncio.Future] = {}
+        self._timers: dict[str, asyncio.TimerHandle] = {}
+        self._batches: set[asyncio.Task] = set()
+
+    async def fetch(self, pubmed_id: str) -> bytes:
+        """Article XML for one PubMed or PMC identifier; raises :class:`PaperNotFound`."""
+        db, uid = database_for(pubmed_id)
+        xml = self.cache.get(db, uid)
+        if xml is not None:
+            metrics.PUBMED_PAPERS.labels("cache").inc()
+            return xml
+        return await self._request(db, uid)
+
+    async def fetch_many(self, pubmed_ids: Iterable[str]) -> dict[str, bytes]:
+        """Article XML for every identifier that exists; missing papers are left out."""
+        ids = list(dict.fromkeys(pubmed_ids))
+        results = await asyncio.gather(*(self.fetch(pubmed_id) for pubmed_id in ids), return_exceptions=True)
+        found: dict[str, bytes] = {}
+        for pubmed_id, result in zip(ids, results):
+            if isinstance(result, PaperNotFound):
+                continue
+            if isinstance(result, BaseException):
+                raise result
+            found[pubmed_id] = result
+        return found
+
+    async def aclose(self) -> None:
+        for db in list(self._timers):
+            self._flush(db)
+        if self._batches:
+            await asyncio.gather(*self._batches, return_exceptions=True)
+        await self._http.aclose()
+
+    def _request(self, db: str, uid: str) -> asyncio.Future:
+        future = self._inflight.get((db, uid))
+        if future is not None:
+            return future
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[(db, uid)] = future
+        waiting = self._waiting.setdefault(db, {})
+        waiting[uid] = future
+        if len(waiting) >= self.batch_size:
+            self._flush(db)
+        elif db not in self._timers:
+            self._timers[db] = asyncio.get_running_loop().call_later(self.batch_window, self._flush, db)
+        return future
+
+    def _flush(self, db: str) -> None:
+        timer = self._timers.pop(db, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._waiting.pop(db, None)
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._fetch_batch(db, batch))
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+
+    async def _fetch_batch(self, db: str, batch: dict[str, asyncio.Future]) -> None:
+        # Every future must be resolved whatever fails here, or its callers wait forever.
+        try:
+            articles = await self._efetch(db, list(batch))
+            for uid, future in batch.items():
+                if future.done():
+                    continue
+                xml = articles.get(uid)
+                if xml is None:
+                    future.set_exception(PaperNotFound(f"{db} has no article {uid}"))
+                    continue
+                self.cache.put(db, uid, xml)
+                metrics.PUBMED_PAPERS.labels("fetched").inc()
+                future.set_result(xml)
+        except Exception as exc:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(exc)
+        finally:
+            for uid, future in batch.items():
+                self._inflight.pop((db, uid), None)
+                if not future.done():
+                    future.cancel()
+
+    async def _efetch(self, db: str, uids: list[str]) -> dict[str, bytes]:
+        # POST keeps long ID lists out of the URL, as NCBI recommends for batches.
+        data = {**self._params, "db": db, "id": ",".join(uids)}
+        async with self._semaphore:
+            await self._throttle()
+            try:
+                response = await self._http.post(f"{self.base_url}/efetch.fcgi", data=data)
+            except httpx.TransportError as exc:
+                metrics.PUBMED_REQUESTS.labels(db, "error").inc()
+                raise PubMedUnavailable(f"E-utilities request failed: {exc}") from exc
+        metrics.PUBMED_REQUESTS.labels(db, str(response.status_code)).inc()
+        if response.status_code == 429 or response.status_code >= 500:
+            raise PubMedUnavailable(f"E-utilities returned HTTP {response.status_code}")
+        if response.status_code >= 400:
+            raise PubMedError(f"E-utilities returned HTTP {response.status_code}: {response.text[:200]}")
+        return split_articles(db, response.content)
+
+    async def _throttle(self) -> None:
+        capacity = max(1, int(self.requests_per_second))
+        limiter = get_rate_limiter()
+        while True:
+            # The Redis limiter blocks on a network round trip; keep it off the client's event loop.
+            decision = await asyncio.to_thread(limiter.acquire, self._rate_key, capacity, self.requests_per_second)
+            if decision.allowed:
+                return
+            await asyncio.sleep(decision.retry_after)
+
+
+# lru_cache does not stop two threads from both building the loop/client on first use.
+_client_lock = threading.Lock()
+
+
+@lru_cache()
+def _client_loop() -> asyncio.AbstractEventLoop:
+    """Event loop that owns this process's client; Celery tasks submit work to it from their threads."""
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="pubmed-client", daemon=True).start()
+    return loop
+
+
+@lru_cache()
+def get_pubmed_client() -> PubMedClient:
+    """Return this process's client, configured from ``PUBMED_*``/``NCBI_*`` settings."""
+    settings = get_settings()
+    transport = None
+    if settings.pubmed_transport == "fake":
+        from .pubmed_fake import fake_eutils_transport
+
+        transport = fake_eutils_transport()
+    elif settings.pubmed_transport != "http":
+        raise ValueError(f"Unknown PUBMED_TRANSPORT: {settings.pubmed_transport!r}")
+    return PubMedClient(
+        PaperCache(settings.pubmed_cache_dir),
+        base_url=settings.pubmed_base_url,
+        api_key=settings.ncbi_api_key,
+        email=settings.ncbi_email,
+        tool=settings.ncbi_tool,
+        max_connections=settings.pubmed_max_connections,
+        max_concurrency=settings.pubmed_max_concurrency,
+        requests_per_second=settings.pubmed_requests_per_second or None,
+        batch_size=settings.pubmed_batch_size,
+        batch_window=settings.pubmed_batch_window_seconds,
+        timeout=settings.pubmed_timeout_seconds,
+        transport=transport,
+    )
+
+
+def fetch_paper_xml(pubmed_id: str) -> tuple[str, bytes]:
+    """Blocking fetch for worker code: ``(db, article XML)`` via the shared client loop."""
+    db, _ = database_for(pubmed_id)
+    with _client_lock:
+        loop, client = _client_loop(), get_pubmed_client()
+    future = asyncio.run_coroutine_threadsafe(client.fetch(pubmed_id), loop)
+    timeout = get_settings().pubmed_fetch_timeout_seconds
+    try:
+        return db, future.result(timeout=timeout)
+    except concurrent.futures.TimeoutError as exc:
+        future.cancel()
+        raise PubMedUnavailable(f"No answer for {pubmed_id} within {timeout:g}s") from exc
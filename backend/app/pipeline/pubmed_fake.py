@@ -0,0 +1,50 @@
+"""In-process stand-in for the E-utilities ``efetch`` endpoint.
+
+Serves a synthetic article for every requested UID in the same XML shapes as
+NCBI (``PubmedArticleSet`` for PubMed, ``pmc-articles`` for PMC), so the
+pipeline runs end to end without network access. UIDs starting with ``0`` are
+treated as unknown and left out of the response, like retracted or mistyped IDs.
+"""
+
+from __future__ import annotations
+
+from urllib.parse import parse_qs
+from xml.sax.saxutils import escape
+
+import httpx
+
+
+def _pubmed_article(uid: str) -> str:
+    return (
+        "<PubmedArticle><MedlineCitation><PMID>{uid}</PMID><Article>"
+        "<ArticleTitle>Paper {uid}</ArticleTitle>"
+        "<Abstract><AbstractText>Synthetic abstract for PMID {uid}.</AbstractText></Abstract>"
+        "</Article></MedlineCitation></PubmedArticle>"
+    ).format(uid=escape(uid))
+
+
+def _pmc_article(uid: str) -> str:
+    return (
+        "<article><front><article-meta>"
+        '<article-id pub-id-type="pmc">PMC{uid}</article-id>'
+        "<title-group><article-title>Paper PMC{uid}</article-title></title-group>"
+        "<abstract><p>Synthetic abstract for PMC{uid}.</p></abstract>"
+        "</article-meta></front></article>"
+    ).format(uid=escape(uid))
+
+
+def fake_efetch(request: httpx.Request) -> httpx.Response:
+    params = {key: values[-1] for key, values in parse_qs(request.content.decode()).items()}
+    params.update(request.url.params)
+    if not request.url.path.endswith("/efetch.fcgi") or "id" not in params:
+        return httpx.Response(400, text="Unsupported request")
+    uids = [uid for uid in params["id"].split(",") if uid and not uid.startswith("0")]
+    if params.get("db") == "pmc":
+        body = "<pmc-articles>" + "".join(_pmc_article(uid) for uid in uids) + "</pmc-articles>"
+    else:
+        body = "<PubmedArticleSet>" + "".join(_pubmed_article(uid) for uid in uids) + "</PubmedArticleSet>"
+    return httpx.Response(200, content=body.encode(), headers={"content-type": "text/xml"})
+
+
+def fake_eutils_transport() -> httpx.MockTransport:
+    return httpx.MockTransport(fake_efetch)
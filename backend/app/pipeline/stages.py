@@ -0,0 +1,132 @@
+"""Pipeline stage implementations.
+
+Each stage reads its inputs from the artifact store through the references in
+``ctx["artifacts"]`` and returns the bytes of its own output; :func:`run_stage`
+stores them and records the reference. A stage whose inputs are unchanged since
+an earlier run is skipped and the cached artifact is reused.
+
+The fetch stage downloads the paper through :mod:`.pubmed`. The script, audio,
+render and captions stages produce small stand-in artifacts derived from their
+inputs (a one-line script, a WAV/MP4 header around it, a single WebVTT cue), so
+the chain, caching and storage run end to end.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+from typing import Callable
+
+from ..queue.config import PIPELINE_STAGES as STAGES
+from ..queue.config import get_settings
+from .artifacts import ArtifactStore
+from .pubmed import PubMedUnavailable, fetch_paper_xml, parse_paper
+
+logger = logging.getLogger(__name__)
+
+
+class TransientStageError(Exception):
+    """A stage failure worth retrying (rate limit, upstream timeout, flaky network)."""
+
+
+# Exceptions that trigger an automatic retry with backoff instead of failing the job.
+TRANSIENT_ERRORS = (TransientStageError, PubMedUnavailable, ConnectionError, TimeoutError)
+
+# Job.progress range covered by each stage (start, end).
+STAGE_PROGRESS = {
+    "fetch": (5, 20),
+    "script": (20, 45),
+    "audio": (45, 65),
+    "render": (65, 90),
+    "captions": (90, 95),
+}
+
+# Upstream stages whose outputs each stage reads; they make up its cache key.
+STAGE_INPUTS = {
+    "fetch": (),
+    "script": ("fetch",),
+    "audio": ("script",),
+    "render": ("audio",),
+    "captions": ("script",),
+}
+
+STAGE_OUTPUT_NAMES = {
+    "fetch": "paper.json",
+    "script": "script.txt",
+    "audio": "narration.wav",
+    "render": "video.mp4",
+    "captions": "captions.vtt",
+}
+
+
+def fetch_paper(ctx: dict, store: ArtifactStore) -> bytes:
+    db, xml = fetch_paper_xml(ctx["pubmed_id"])
+    paper = {"pubmed_id": ctx["pubmed_id"], "source": db, **parse_paper(db, xml)}
+    return json.dumps(paper).encode()
+
+
+def write_script(ctx: dict, store: ArtifactStore) -> bytes:
+    paper = json.loads(store.read_bytes(ctx["artifacts"]["fetch"]))
+    return f"Today we look at {paper['title']}.".encode()
+
+
+def synthesize_audio(ctx: dict, store: ArtifactStore) -> bytes:
+    return b"RIFF" + store.read_bytes(ctx["artifacts"]["script"])
+
+
+def render_video(ctx: dict, store: ArtifactStore) -> bytes:
+    return b"\x00\x00\x00\x18ftypmp42" + store.read_bytes(ctx["artifacts"]["audio"])
+
+
+def add_captions(ctx: dict, store: ArtifactStore) -> bytes:
+    script = store.read_bytes(ctx["artifacts"]["script"]).decode()
+    return f"WEBVTT\n\n00:00.000 --> 00:05.000\n{script}\n".encode()
+
+
+STAGE_FUNCTIONS: dict[str, Callable[[dict, ArtifactStore], bytes]] = {
+    "fetch": fetch_paper,
+    "script": write_script,
+    "audio": synthesize_audio,
+    "render": render_video,
+    "captions": add_captions,
+}
+
+
+def stage_input_hash(stage: str, ctx: dict) -> str:
+    """Hash the pipeline version and upstream references a stage depends on.
+
+    Upstream references are themselves derived from their inputs, so the hash
+    changes whenever anything earlier in the pipeline would.
+    """
+    inputs = {name: ctx["artifacts"][name] for name in STAGE_INPUTS[stage]}
+    payload = json.dumps({"version": get_settings().pipeline_version, "inputs": inputs}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def run_stage(stage: str, ctx: dict, store: ArtifactStore) -> dict:
+    """Run ``stage`` (or reuse its cached output) and return a context with its reference added."""
+    input_hash = stage_input_hash(stage, ctx)
+    name = STAGE_OUTPUT_NAMES[stage]
+    ref = store.lookup(ctx["pubmed_id"], stage, input_hash, name)
+    if ref is None:
+        data = STAGE_FUNCTIONS[stage](ctx, store)
+        ref = store.put_bytes(ctx["pubmed_id"], stage, input_hash, name, data)
+    else:
+        logger.info("Reusing cached %s artifact for job %s", stage, ctx["job_id"])
+    return {**ctx, "artifacts": {**ctx.get("artifacts", {}), stage: ref}}
+
+
+def resume_point(artifacts: dict[str, str], store: ArtifactStore) -> dict[str, str]:
+    """Return the leading run of checkpointed artifacts that still exist on disk.
+
+    A resumed job restarts at the first stage missing from the result, so an
+    artifact evicted since the checkpoint is rebuilt rather than read.
+    """
+    usable: dict[str, str] = {}
+    for stage in STAGES:
+        ref = artifacts.get(stage)
+        if ref is None or not store.path(ref).exists():
+            break
+        usable[stage] = ref
+    return usable
@@ -0,0 +1,65 @@
+"""Opt-in cProfile capture of Celery tasks (``TASK_PROFILING``).
+
+Each profiled task writes ``<TASK_PROFILE_DIR>/<job id>/<task>-<task id>.prof``,
+readable with ``python -m pstats`` or snakeviz. A task run inline by another
+profiled task (eager mode, or a stage executed in-process) is included in the
+outer task's profile, because only one profiler can be active per thread.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import logging
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+from .metrics import stage_label
+from .queue.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class TaskProfiler:
+    def __init__(self, directory: str | Path, tasks: set[str]) -> None:
+        self.directory = Path(directory)
+        self.tasks = tasks
+        self._local = threading.local()
+        self._profiles: dict[str, cProfile.Profile] = {}
+
+    def wants(self, task_name: str) -> bool:
+        return not self.tasks or task_name in self.tasks or stage_label(task_name) in self.tasks
+
+    def start(self, task_id: str, task_name: str) -> None:
+        if not self.wants(task_name) or getattr(self._local, "active", False):
+            return
+        profile = cProfile.Profile()
+        profile.enable()
+        self._local.active = True
+        self._profiles[task_id] = profile
+
+    def stop(self, task_id: str, task_name: str, job_id: Optional[str]) -> Optional[Path]:
+        """Stop profiling ``task_id`` and write its stats; returns the file written, if any."""
+        profile = self._profiles.pop(task_id, None)
+        if profile is None:
+            return None
+        profile.disable()
+        self._local.active = False
+        path = self.directory / (job_id or "no-job") / f"{stage_label(task_name)}-{task_id}.prof"
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            profile.dump_stats(str(path))
+        except OSError as exc:
+            logger.warning("Unable to write task profile %s: %s", path, exc)
+            return None
+        return path
+
+
+@lru_cache()
+def get_task_profiler() -> Optional[TaskProfiler]:
+    """The process profiler, or None unless ``TASK_PROFILING`` is enabled."""
+    settings = get_settings()
+    if not settings.task_profiling:
+        return None
+    return TaskProfiler(settings.task_profile_dir, settings.task_profile_tasks)
@@ -1,5 +1,16 @@
 """Celery queue package."""
 
-from .celery_app import celery_app
+from __future__ import annotations
+
+from typing import Any
 
 __all__ = ["celery_app"]
+
+
+def __getattr__(name: str) -> Any:
+    # Importing app.queue.config (as the API does) must not build the Celery app.
+    if name == "celery_app":
+        from .celery_app import celery_app
+
+        return celery_app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -3,8 +3,19 @@
 from __future__ import annotations
 
 from celery import Celery
+from celery.signals import (
+    before_task_publish,
+    task_postrun,
+    task_prerun,
+    worker_init,
+    worker_process_init,
+    worker_process_shutdown,
+)
 
-from .config import get_settings
+from .. import metrics, tracing
+from ..database import dispose_engines_after_fork
+from ..profiling import get_task_profiler
+from .config import DEFAULT_PRIORITY, PRIORITY_LEVELS, PRIORITY_STEPS, get_settings
 
 settings = get_settings()
 
@@ -14,4 +25,77 @@ celery_app = Celery(
     backend=settings.celery_result_backend,
 )
 celery_app.conf.task_default_queue = settings.celery_default_queue
+celery_app.conf.task_routes = {
+    f"videos.stage.{stage}": {"queue": queue} for stage, queue in settings.stage_queues.items()
+}
+celery_app.conf.broker_transport_options = {
+    "priority_steps": list(PRIORITY_STEPS),
+    "visibility_timeout": settings.celery_visibility_timeout,
+}
+celery_app.conf.task_default_priority = PRIORITY_LEVELS[DEFAULT_PRIORITY]
+# Stage tasks sent by a running task (replace/chain) keep the job's priority.
+celery_app.conf.task_inherit_parent_priority = True
+celery_app.conf.worker_prefetch_multiplier = settings.celery_worker_prefetch_multiplier
+celery_app.conf.task_acks_late = settings.celery_task_acks_late
+celery_app.conf.worker_max_tasks_per_child = settings.celery_worker_max_tasks_per_child or None
+celery_app.conf.worker_max_memory_per_child = settings.celery_worker_max_memory_per_child or None
+celery_app.conf.task_serializer = settings.celery_serializer
+celery_app.conf.result_serializer = settings.celery_serializer
+celery_app.conf.accept_content = sorted({settings.celery_serializer, "json"})
+celery_app.conf.task_ignore_result = settings.celery_task_ignore_result
+celery_app.conf.result_expires = settings.celery_result_expires_seconds
+celery_app.amqp.argsrepr_maxsize = settings.celery_argsrepr_maxsize
+celery_app.conf.task_always_eager = settings.celery_task_always_eager
+celery_app.conf.task_eager_propagates = settings.celery_task_eager_propagates
+# Run `celery beat` (python -m backend beat) alongside the workers for periodic sweeps.
+celery_app.conf.beat_schedule = {
+    "purge-idempotency-keys": {"task": "videos.purge_idempotency_keys", "schedule": 3600.0},
+}
+if settings.reaper_interval_seconds > 0:
+    celery_app.conf.beat_schedule["reap-stale-jobs"] = {
+        "task": "videos.reap_stale_jobs",
+        "schedule": settings.reaper_interval_seconds,
+    }
 celery_app.autodiscover_tasks(["app.queue"])
+
+
+@worker_process_init.connect
+def _reset_db_pools(**_: object) -> None:
+    """Give each prefork child its own database connections."""
+    dispose_engines_after_fork()
+
+
+@worker_init.connect
+def _start_metrics_exporter(**_: object) -> None:
+    """Expose worker metrics from the main worker process."""
+    settings = get_settings()
+    if settings.metrics_enabled and settings.worker_metrics_port:
+        metrics.start_worker_exporter(settings.worker_metrics_port)
+
+
+@worker_process_shutdown.connect
+def _drop_child_metrics(pid: int, **_: object) -> None:
+    metrics.mark_process_dead(pid)
+
+
+@before_task_publish.connect
+def _propagate_trace(headers=None, **_: object) -> None:
+    tracing.inject_task_headers(headers)
+
+
+@task_prerun.connect
+def _record_task_start(task_id: str, task, args=None, **_: object) -> None:
+    metrics.task_started(task_id)
+    tracing.task_started(task_id, task, args)
+    profiler = get_task_profiler()
+    if profiler is not None:
+        profiler.start(task_id, task.name)
+
+
+@task_postrun.connect
+def _record_task_duration(task_id: str, task, args=None, retval=None, state=None, **_: object) -> None:
+    metrics.task_finished(task_id, task.name, state)
+    profiler = get_task_profiler()
+    if profiler is not None:
+        profiler.stop(task_id, task.name, tracing.job_id_from_args(args))
+    tracing.task_finished(task_id, state, retval)
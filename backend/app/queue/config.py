@@ -5,18 +5,206 @@ from __future__ import annotations
 import os
 from functools import lru_cache
 
+# Execution order of the generation pipeline; each stage consumes the outputs of the ones before it.
+PIPELINE_STAGES = ("fetch", "script", "audio", "render", "captions")
+
+# Job priority classes mapped to Redis-transport message priorities (0 is served first).
+PRIORITY_LEVELS = {"high": 0, "normal": 3, "low": 6}
+DEFAULT_PRIORITY = "normal"
+# Each queue is split into one Redis list per step; workers drain lower steps first.
+PRIORITY_STEPS = (0, 3, 6, 9)
+
+# Worker groups started by `python -m backend worker <name>`: intake consumes the default
+# queue and fair-share lanes, every other group one stage queue.
+WORKER_GROUPS = ("intake", *PIPELINE_STAGES)
+# Celery pool used for a group unless CELERY_POOL_<GROUP> says otherwise. Fetch is network
+# bound, and threads share one batching PubMed client per process.
+DEFAULT_WORKER_POOLS = {"fetch": "threads"}
+
+
+def env_bool(name: str, default: bool = False) -> bool:
+    """Interpret common truthy strings from the environment."""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in {"1", "true", "yes", "on"}
+
+
+@lru_cache()
+def load_environment() -> None:
+    """Load ``backend/.env`` into the process environment, once, before settings are first read."""
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
 
 class Settings:
     """Load queue-related configuration from environment variables."""
 
     def __init__(self) -> None:
         redis_url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+        self.redis_url = redis_url
+        self.redis_max_connections = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
         self.celery_broker_url = os.getenv("CELERY_BROKER_URL", redis_url)
         self.celery_result_backend = os.getenv("CELERY_RESULT_BACKEND", redis_url)
         self.celery_default_queue = os.getenv("CELERY_DEFAULT_QUEUE", "hidden-hill")
+        # One queue per pipeline stage so each can run on its own worker pool.
+        self.stage_queues = {
+            stage: os.getenv(f"CELERY_QUEUE_{stage.upper()}", f"{self.celery_default_queue}.{stage}")
+            for stage in PIPELINE_STAGES
+        }
+        # Generation requests are spread over fair-share lanes by tenant; workers poll the
+        # lanes round-robin, so one tenant's backlog only ever fills its own lane.
+        self.fair_share_lanes = int(os.getenv("FAIR_SHARE_LANES", "8"))
+        lanes = range(self.fair_share_lanes) if self.fair_share_lanes > 1 else ()
+        self.lane_queues = [f"{self.celery_default_queue}.lane{index}" for index in lanes]
+        # One prefetched message per worker process and ack after the task runs, so a
+        # high-priority job never waits behind bulk work already reserved by a worker.
+        self.celery_worker_prefetch_multiplier = int(os.getenv("CELERY_WORKER_PREFETCH_MULTIPLIER", "1"))
+        self.celery_task_acks_late = env_bool("CELERY_TASK_ACKS_LATE", True)
+        # Must exceed the longest task, or Redis redelivers late-acked messages still running.
+        self.celery_visibility_timeout = int(os.getenv("CELERY_VISIBILITY_TIMEOUT", "7200"))
+        # msgpack messages are smaller and faster to encode than JSON. Workers also accept
+        # JSON, so messages queued before a serializer change still run.
+        self.celery_serializer = os.getenv("CELERY_SERIALIZER", "msgpack")
+        # Job state lives in the database, so task return values are not stored by default;
+        # results that are stored (CELERY_TASK_IGNORE_RESULT=false) expire after this long.
+        self.celery_task_ignore_result = env_bool("CELERY_TASK_IGNORE_RESULT", True)
+        self.celery_result_expires_seconds = int(os.getenv("CELERY_RESULT_EXPIRES_SECONDS", "3600"))
+        # Compression for pipeline messages (stages and finalize), which carry the stage context
+        # and the rest of the chain ("zlib", "gzip", "bzip2"; empty disables). Other task
+        # messages are too small to benefit.
+        self.celery_stage_compression = os.getenv("CELERY_STAGE_COMPRESSION", "zlib") or None
+        # Messages also carry a plain-text repr of their arguments for logs and Flower; it is
+        # cut to this many characters (Celery's default is 1024), enough to show the job id.
+        self.celery_argsrepr_maxsize = int(os.getenv("CELERY_ARGSREPR_MAXSIZE", "128"))
+        self.celery_task_always_eager = env_bool("CELERY_TASK_ALWAYS_EAGER")
+        self.celery_task_eager_propagates = env_bool("CELERY_TASK_EAGER_PROPAGATES")
+        # Bump when the generation pipeline changes output so cached videos are rebuilt.
+        self.pipeline_version = os.getenv("PIPELINE_VERSION", "1")
+        self.batch_dispatch_chunk_size = int(os.getenv("BATCH_DISPATCH_CHUNK_SIZE", "500"))
+        # Largest POST /generate/batch; must fit in RATE_LIMIT_API_KEY_BURST (checked at startup).
+        self.max_batch_size = int(os.getenv("MAX_BATCH_SIZE", "5000"))
+        # How long an Idempotency-Key on POST /generate keeps replaying its first response.
+        self.idempotency_ttl_seconds = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+        # "redis" fans progress out across processes; "local" keeps it in-process (tests, eager mode).
+        self.progress_bus = os.getenv("PROGRESS_BUS", "redis")
+        # Non-terminal progress writes closer together than this are merged.
+        self.progress_min_interval = float(os.getenv("PROGRESS_MIN_INTERVAL_SECONDS", "1.0"))
+        self.sse_heartbeat_seconds = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+        # Serialized GET /api/videos/{job_id} payloads, dropped on every progress event; the TTL
+        # bounds staleness when a write's invalidation is missed. STATUS_CACHE_TTL_SECONDS=0 disables.
+        self.status_cache_backend = os.getenv("STATUS_CACHE_BACKEND", "redis")
+        self.status_cache_ttl_seconds = float(os.getenv("STATUS_CACHE_TTL_SECONDS", "2"))
+        self.status_cache_max_entries = int(os.getenv("STATUS_CACHE_MAX_ENTRIES", "10000"))
+        # Cache-Control max-age for finished jobs: completed ones never change again, while
+        # failed and cancelled ones can still be retried.
+        self.status_completed_max_age_seconds = int(os.getenv("STATUS_COMPLETED_MAX_AGE_SECONDS", "86400"))
+        self.status_finished_max_age_seconds = int(os.getenv("STATUS_FINISHED_MAX_AGE_SECONDS", "30"))
+        # Transient stage failures retry with exponential backoff and full jitter.
+        self.task_max_retries = int(os.getenv("TASK_MAX_RETRIES", "3"))
+        self.retry_backoff_seconds = int(os.getenv("RETRY_BACKOFF_SECONDS", "2"))
+        self.retry_backoff_max_seconds = int(os.getenv("RETRY_BACKOFF_MAX_SECONDS", "300"))
+        # Running stages bump Job.updated_at every JOB_HEARTBEAT_SECONDS; the reaper treats
+        # processing jobs silent for JOB_STALE_SECONDS as lost and requeues them until
+        # JOB_MAX_ATTEMPTS, then fails them. REAPER_INTERVAL_SECONDS=0 disables the sweep.
+        self.job_heartbeat_seconds = float(os.getenv("JOB_HEARTBEAT_SECONDS", "30"))
+        self.job_stale_seconds = int(os.getenv("JOB_STALE_SECONDS", "300"))
+        self.job_max_attempts = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+        self.reaper_interval_seconds = float(os.getenv("REAPER_INTERVAL_SECONDS", "60"))
+        self.reaper_batch_size = int(os.getenv("REAPER_BATCH_SIZE", "100"))
+        self.artifact_dir = os.getenv("ARTIFACT_DIR", "./artifacts")
+        self.artifact_cache_max_bytes = int(os.getenv("ARTIFACT_CACHE_MAX_BYTES", str(5 * 1024**3)))
+        self.artifact_cache_protect_seconds = float(os.getenv("ARTIFACT_CACHE_PROTECT_SECONDS", "600"))
+        # Paper fetches: "http" talks to NCBI E-utilities, "fake" serves synthetic articles in-process.
+        self.pubmed_transport = os.getenv("PUBMED_TRANSPORT", "http")
+        self.pubmed_base_url = os.getenv("PUBMED_BASE_URL", "https://eutils.ncbi.nlm.nih.gov/entrez/eutils")
+        self.pubmed_cache_dir = os.getenv("PUBMED_CACHE_DIR", "./pubmed-cache")
+        self.ncbi_api_key = os.getenv("NCBI_API_KEY", "")
+        self.ncbi_email = os.getenv("NCBI_EMAIL", "")
+        self.ncbi_tool = os.getenv("NCBI_TOOL", "hidden-hill")
+        self.pubmed_max_connections = int(os.getenv("PUBMED_MAX_CONNECTIONS", "10"))
+        self.pubmed_max_concurrency = int(os.getenv("PUBMED_MAX_CONCURRENCY", "4"))
+        # 0 uses NCBI's published limit: 3 requests/s, or 10 with NCBI_API_KEY.
+        self.pubmed_requests_per_second = float(os.getenv("PUBMED_REQUESTS_PER_SECOND", "0"))
+        self.pubmed_batch_size = int(os.getenv("PUBMED_BATCH_SIZE", "200"))
+        self.pubmed_batch_window_seconds = float(os.getenv("PUBMED_BATCH_WINDOW_SECONDS", "0.05"))
+        self.pubmed_timeout_seconds = float(os.getenv("PUBMED_TIMEOUT_SECONDS", "30"))
+        # Longest a worker thread waits for one paper, including batching and rate-limit waits.
+        self.pubmed_fetch_timeout_seconds = float(os.getenv("PUBMED_FETCH_TIMEOUT_SECONDS", "120"))
+        # Dependency checks run in a background thread; probes read the last result.
+        self.health_refresh_seconds = float(os.getenv("HEALTH_REFRESH_SECONDS", "5"))
+        self.health_cache_ttl_seconds = float(os.getenv("HEALTH_CACHE_TTL_SECONDS", "15"))
+        # Token buckets on generation requests; "redis" shares them across API processes.
+        self.rate_limit_backend = os.getenv("RATE_LIMIT_BACKEND", "redis")
+        self.rate_limit_user_per_minute = float(os.getenv("RATE_LIMIT_USER_PER_MINUTE", "30"))
+        self.rate_limit_user_burst = int(os.getenv("RATE_LIMIT_USER_BURST", "10"))
+        self.rate_limit_api_key_per_minute = float(os.getenv("RATE_LIMIT_API_KEY_PER_MINUTE", "300"))
+        # Sized for one full batch; the per-minute rate still bounds a partner's sustained load.
+        self.rate_limit_api_key_burst = int(os.getenv("RATE_LIMIT_API_KEY_BURST", "5000"))
+        # Reject new generations while this many messages are queued (0 disables).
+        self.admission_max_queue_depth = int(os.getenv("ADMISSION_MAX_QUEUE_DEPTH", "10000"))
+        self.admission_retry_after_seconds = int(os.getenv("ADMISSION_RETRY_AFTER_SECONDS", "30"))
+        # Finished videos: "local" files under STORAGE_LOCAL_DIR or an S3-compatible bucket.
+        self.storage_backend = os.getenv("STORAGE_BACKEND", "local")
+        self.storage_local_dir = os.getenv("STORAGE_LOCAL_DIR", "./media")
+        self.s3_bucket = os.getenv("S3_BUCKET", "hidden-hill-videos")
+        self.s3_endpoint_url = os.getenv("S3_ENDPOINT_URL", "")
+        self.s3_region = os.getenv("S3_REGION", "")
+        self.storage_presign_seconds = int(os.getenv("STORAGE_PRESIGN_SECONDS", "3600"))
+        # When set (e.g. "/protected-media/"), local downloads are handed to nginx via X-Accel-Redirect.
+        self.storage_accel_redirect_prefix = os.getenv("STORAGE_ACCEL_REDIRECT_PREFIX", "")
+        # Production runner (`python -m backend api|worker`); command-line flags override these.
+        # API_SERVER=gunicorn runs uvicorn workers under gunicorn's supervisor instead.
+        self.api_server = os.getenv("API_SERVER", "uvicorn")
+        self.api_host = os.getenv("API_HOST", "0.0.0.0")
+        self.api_port = int(os.getenv("API_PORT", "8000"))
+        # 0 starts one API process per CPU.
+        self.api_workers = int(os.getenv("API_WORKERS", "0"))
+        # Seconds in-flight requests get to finish after SIGTERM before connections are closed.
+        self.api_graceful_timeout = int(os.getenv("API_GRACEFUL_TIMEOUT_SECONDS", "30"))
+        # gunicorn only: replace a worker after this many requests, with jitter (0 disables).
+        self.api_max_requests = int(os.getenv("API_MAX_REQUESTS", "0"))
+        # Celery pool (prefork, threads, gevent, solo) and concurrency (0 sizes it to the CPU
+        # count) for each worker group; CELERY_POOL_<GROUP> / CELERY_CONCURRENCY_<GROUP> override.
+        self.celery_worker_pool = os.getenv("CELERY_WORKER_POOL", "prefork")
+        self.celery_worker_concurrency = int(os.getenv("CELERY_WORKER_CONCURRENCY", "0"))
+        self.worker_pools = {
+            group: os.getenv(f"CELERY_POOL_{group.upper()}", DEFAULT_WORKER_POOLS.get(group, self.celery_worker_pool))
+            for group in WORKER_GROUPS
+        }
+        self.worker_concurrency = {
+            group: int(os.getenv(f"CELERY_CONCURRENCY_{group.upper()}", str(self.celery_worker_concurrency)))
+            for group in WORKER_GROUPS
+        }
+        # Prefork children are replaced after this many tasks or once their resident memory
+        # exceeds this many KiB (0 disables either limit), bounding leaks in render libraries.
+        self.celery_worker_max_tasks_per_child = int(os.getenv("CELERY_WORKER_MAX_TASKS_PER_CHILD", "100"))
+        self.celery_worker_max_memory_per_child = int(os.getenv("CELERY_WORKER_MAX_MEMORY_PER_CHILD", "0"))
+        self.metrics_enabled = env_bool("METRICS_ENABLED", True)
+        # Port for the Celery worker's metrics endpoint; 0 disables it.
+        self.worker_metrics_port = int(os.getenv("WORKER_METRICS_PORT", "9808"))
+        # Span tracing: one JSON-lines file of finished spans per process under TRACE_DIR.
+        self.tracing_enabled = env_bool("TRACING_ENABLED")
+        self.trace_dir = os.getenv("TRACE_DIR", "./traces")
+        self.trace_service_name = os.getenv("TRACE_SERVICE_NAME", "hidden-hill")
+        # cProfile Celery tasks into TASK_PROFILE_DIR/<job id>/<task>-<task id>.prof. Profiling
+        # slows tasks noticeably; TASK_PROFILE_TASKS (e.g. "render,captions") limits it to
+        # the named tasks or stages, empty profiles every task.
+        self.task_profiling = env_bool("TASK_PROFILING")
+        self.task_profile_dir = os.getenv("TASK_PROFILE_DIR", "./profiles")
+        self.task_profile_tasks = {
+            name.strip() for name in os.getenv("TASK_PROFILE_TASKS", "").split(",") if name.strip()
+        }
+
+    @property
+    def all_queues(self) -> list[str]:
+        """Every queue a full worker consumes: default, fair-share lanes and stage queues."""
+        return [self.celery_default_queue, *self.lane_queues, *self.stage_queues.values()]
 
 
 @lru_cache()
 def get_settings() -> Settings:
     """Return cached settings instance."""
+    load_environment()
     return Settings()
@@ -2,21 +2,130 @@
 
 from __future__ import annotations
 
+import threading
+import time
 from typing import Optional
 
-from .. import crud
+from sqlalchemy.orm import Session
+
+from .. import crud, metrics
 from ..database import SessionLocal
+from ..events import publish_progress
+from .config import get_settings
 
 
 class JobProgressReporter:
-    """Persist incremental job progress updates."""
+    """Persist incremental job progress updates and publish them to stream subscribers.
+
+    Writes reuse one session for the life of the reporter and are blind UPDATEs.
+    Progress-only updates arriving within ``min_interval`` seconds of the last
+    write are merged (the latest value wins) and written on the next allowed
+    update or on :meth:`flush`/:meth:`close`. Status changes and terminal states
+    are always written immediately. ``celery_task_id`` is recorded with the first
+    write so cancelling the job revokes the task that is actually running it.
+    """
 
-    def __init__(self, job_id: str) -> None:
+    def __init__(
+        self,
+        job_id: str,
+        session: Optional[Session] = None,
+        min_interval: Optional[float] = None,
+        celery_task_id: Optional[str] = None,
+    ) -> None:
         self.job_id = job_id
+        self._task_id = celery_task_id
+        self.min_interval = get_settings().progress_min_interval if min_interval is None else min_interval
+        self._session = session
+        self._owns_session = session is None
+        self._last_write: Optional[float] = None
+        self._last_status: Optional[str] = None
+        self._pending: Optional[int] = None
 
     def update(self, progress: int, status: Optional[str] = None) -> None:
+        urgent = status is not None and (
+            status in crud.TERMINAL_JOB_STATUSES or status != self._last_status
+        )
+        if not urgent and self._last_write is not None:
+            if time.monotonic() - self._last_write < self.min_interval:
+                self._pending = progress
+                metrics.PROGRESS_COALESCED.inc()
+                return
+        self._write(progress, status)
+
+    def flush(self) -> None:
+        """Write any merged progress that has not been persisted yet."""
+        if self._pending is not None:
+            self._write(self._pending, None)
+
+    def discard(self) -> None:
+        """Drop merged progress that a final write is about to supersede."""
+        self._pending = None
+
+    def close(self) -> None:
+        """Flush pending progress and release the session if the reporter opened it."""
+        try:
+            self.flush()
+        finally:
+            if self._owns_session and self._session is not None:
+                self._session.close()
+                self._session = None
+
+    def _write(self, progress: int, status: Optional[str]) -> None:
+        if self._session is None:
+            self._session = SessionLocal()
+        crud.set_job_progress(
+            self._session, self.job_id, progress=progress, status=status, celery_task_id=self._task_id
+        )
+        self._task_id = None
+        metrics.PROGRESS_WRITES.labels("status" if status is not None else "progress").inc()
+        self._last_write = time.monotonic()
+        self._pending = None
+        if status is not None:
+            self._last_status = status
+        publish_progress(self.job_id, progress=progress, status=status)
+
+
+class JobHeartbeat:
+    """Bump ``Job.updated_at`` from a background thread while a stage runs.
+
+    The reaper only requeues jobs whose heartbeat has gone stale, so a long
+    render is never mistaken for a dead worker. Once the job stops being
+    ``processing`` (cancelled, or claimed by the reaper) the heartbeat stops and
+    sets :attr:`stopped` so the stage can discard its work.
+    """
+
+    def __init__(self, job_id: str, interval: Optional[float] = None) -> None:
+        self.job_id = job_id
+        self.interval = get_settings().job_heartbeat_seconds if interval is None else interval
+        self.stopped = threading.Event()
+        self._done = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "JobHeartbeat":
+        if self.interval > 0:
+            self._thread = threading.Thread(target=self._run, name=f"heartbeat-{self.job_id}", daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self._done.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def beat(self) -> bool:
         session = SessionLocal()
         try:
-            crud.update_job(session, self.job_id, progress=progress, status=status)
+            alive = crud.touch_job(session, self.job_id)
         finally:
             session.close()
+        if not alive:
+            self.stopped.set()
+        return alive
+
+    def _run(self) -> None:
+        while not self._done.wait(self.interval):
+            try:
+                if not self.beat():
+                    return
+            except Exception:  # pragma: no cover - a missed beat is retried next interval
+                continue
@@ -1,44 +1,328 @@
-"""Celery task definitions."""
+"""Celery task definitions.
+
+``generate_video_task`` is the entry point enqueued by the API. It marks the job
+as processing and replaces itself with a chain of per-stage tasks, each routed
+to its own queue (see ``Settings.stage_queues``) so cheap fetch workers never
+wait behind render workers. Stages pass a small context dict of artifact
+references down the chain; the artifacts themselves stay on disk.
+
+Every finished stage is checkpointed on the Job row. Transient stage errors
+retry with exponential backoff and jitter; a job that is retried after failing
+resumes after its last checkpointed stage instead of starting over.
+
+Running stages heartbeat ``Job.updated_at``. ``reap_stale_jobs_task`` runs on
+Celery beat and requeues (or finally fails) processing jobs whose worker has
+stopped heartbeating. Cancelled jobs are skipped by every stage that has not
+started yet; the running stage is revoked by the API.
+"""
 
 from __future__ import annotations
 
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+from uuid import uuid4
+
+from celery import chain, group
+from celery.exceptions import Ignore
 from celery.utils.log import get_task_logger
+from celery.utils.time import get_exponential_backoff_interval
 
-from .. import crud
+from .. import crud, metrics
 from ..database import SessionLocal
+from ..events import publish_progress
+from ..pipeline import STAGE_PROGRESS, STAGES, TRANSIENT_ERRORS, resume_point, run_stage
+from ..pipeline.artifacts import get_artifact_store
+from ..storage import get_storage
 from .celery_app import celery_app
-from .progress import JobProgressReporter
+from .config import PRIORITY_LEVELS, get_settings
+from .progress import JobHeartbeat, JobProgressReporter
 
 logger = get_task_logger(__name__)
 
 
+def build_pipeline(job_id: str, pubmed_id: str, artifacts: Optional[dict[str, str]] = None) -> chain:
+    """Chain the stages not yet covered by ``artifacts``, followed by the finalizer."""
+    artifacts = artifacts or {}
+    ctx = {"job_id": job_id, "pubmed_id": pubmed_id, "artifacts": artifacts}
+    remaining = [STAGE_TASKS[stage] for stage in STAGES if stage not in artifacts]
+    tasks = [task.s() for task in remaining] + [finalize_video_task.s()]
+    tasks[0] = tasks[0].clone(args=(ctx,))
+    return chain(*tasks)
+
+
+def _mark_failed(job_id: str, exc: Exception) -> None:
+    session = SessionLocal()
+    try:
+        crud.update_job(session, job_id, status="failed", error_message=str(exc))
+    finally:
+        session.close()
+    publish_progress(job_id, status="failed", error_message=str(exc))
+
+
+def revoke_job_task(celery_task_id: Optional[str]) -> None:
+    """Revoke a job's task, terminating it if a worker is already running it.
+
+    Best effort: eager mode has nothing to revoke, and an unreachable broker
+    only means the stage finishes before noticing the job's new status.
+    """
+    if not celery_task_id or celery_app.conf.task_always_eager:
+        return
+    try:
+        celery_app.control.revoke(celery_task_id, terminate=True)
+    except Exception as exc:  # pragma: no cover - broker connectivity
+        logger.warning("Could not revoke task %s: %s", celery_task_id, exc)
+
+
 @celery_app.task(bind=True, name="videos.generate")
 def generate_video_task(self, job_id: str, pubmed_id: str) -> dict:
-    """Skeleton video generation task (Task 2)."""
+    """Start (or resume) a generation and hand off to the stage chain."""
     session = SessionLocal()
-    reporter = JobProgressReporter(job_id)
+    try:
+        job = crud.get_job_with_video(session, job_id)
+        if job is not None and (
+            job.status == "cancelled" or job.celery_task_id not in (None, self.request.id)
+        ):
+            # Cancelled while queued, or superseded by a retry/reaper requeue under a new task id.
+            logger.info("Skipping job %s (status=%s)", job_id, job.status)
+            return {"job_id": job_id, "status": job.status}
+        artifacts = resume_point(crud.load_checkpoint(job), get_artifact_store()) if job else {}
+        done = [stage for stage in STAGES if stage in artifacts]
+        progress = STAGE_PROGRESS[done[-1]][1] if done else STAGE_PROGRESS[STAGES[0]][0]
+        job = crud.start_attempt(session, job_id, progress=progress, celery_task_id=self.request.id)
+        if job is not None and job.attempts == 1 and job.created_at is not None:
+            delay = (datetime.utcnow() - job.created_at).total_seconds()
+            metrics.JOB_START_DELAY_SECONDS.labels(job.priority).observe(delay)
+    except Exception as exc:  # pragma: no cover - defensive logging
+        logger.exception("Job %s failed to start: %s", job_id, exc)
+        _mark_failed(job_id, exc)
+        raise
+    finally:
+        session.close()
+
+    if done:
+        logger.info("Resuming job %s after stage %s", job_id, done[-1])
+    publish_progress(job_id, progress=progress, status="processing")
+    if self.request.is_eager:
+        # Celery's eager chain.apply() calls .get() inside the task and trips its own
+        # "never block in a task" guard, so run the stages inline instead. throw=False
+        # lets apply() re-run retried stages; .get() still raises the final failure.
+        ctx = {"job_id": job_id, "pubmed_id": pubmed_id, "artifacts": artifacts}
+        for stage in STAGES:
+            if stage not in artifacts:
+                result = STAGE_TASKS[stage].apply(args=(ctx,), throw=False)
+                ctx = result.get(disable_sync_subtasks=False)
+                if result.state == "IGNORED":
+                    return {"job_id": job_id, "status": "cancelled"}
+        return finalize_video_task(ctx)
+    return self.replace(build_pipeline(job_id, pubmed_id, artifacts))
+
+
+def _execute_stage(task, stage: str, ctx: dict) -> dict:
+    """Run one stage, mapping it onto its slice of Job.progress and checkpointing it."""
+    job_id = ctx["job_id"]
+    start, end = STAGE_PROGRESS[stage]
+    session = SessionLocal()
+    reporter = JobProgressReporter(job_id, session=session, celery_task_id=task.request.id)
+    try:
+        if crud.get_job_status(session, job_id) == "cancelled":
+            logger.info("Job %s was cancelled; skipping stage %s", job_id, stage)
+            raise Ignore()
+        reporter.update(progress=start)
+        with JobHeartbeat(job_id) as heartbeat:
+            ctx = run_stage(stage, ctx, get_artifact_store())
+        if heartbeat.stopped.is_set():
+            logger.info("Job %s left processing during stage %s; dropping its output", job_id, stage)
+            raise Ignore()
+        crud.save_checkpoint(session, job_id, stage, ctx["artifacts"])
+        reporter.update(progress=end)
+        return ctx
+    except Ignore:
+        reporter.discard()
+        raise
+    except TRANSIENT_ERRORS as exc:
+        reporter.discard()
+        if task.request.retries < task.max_retries:
+            settings = get_settings()
+            countdown = get_exponential_backoff_interval(
+                settings.retry_backoff_seconds,
+                task.request.retries,
+                settings.retry_backoff_max_seconds,
+                full_jitter=True,
+            )
+            logger.warning(
+                "Job %s stage %s hit a transient error (%s); retry %d/%d in %ss",
+                job_id, stage, exc, task.request.retries + 1, task.max_retries, countdown,
+            )
+            raise task.retry(exc=exc, countdown=countdown)
+        logger.exception("Job %s failed in stage %s after %d retries", job_id, stage, task.request.retries)
+        _mark_failed(job_id, exc)
+        raise
+    except Exception as exc:
+        logger.exception("Job %s failed in stage %s: %s", job_id, stage, exc)
+        reporter.discard()
+        _mark_failed(job_id, exc)
+        raise
+    finally:
+        reporter.close()
+        session.close()
+
+
+_STAGE_TASK_OPTIONS = {
+    "bind": True,
+    "max_retries": get_settings().task_max_retries,
+    "compression": get_settings().celery_stage_compression,
+}
 
+
+@celery_app.task(name="videos.stage.fetch", **_STAGE_TASK_OPTIONS)
+def fetch_paper_task(self, ctx: dict) -> dict:
+    return _execute_stage(self, "fetch", ctx)
+
+
+@celery_app.task(name="videos.stage.script", **_STAGE_TASK_OPTIONS)
+def write_script_task(self, ctx: dict) -> dict:
+    return _execute_stage(self, "script", ctx)
+
+
+@celery_app.task(name="videos.stage.audio", **_STAGE_TASK_OPTIONS)
+def synthesize_audio_task(self, ctx: dict) -> dict:
+    return _execute_stage(self, "audio", ctx)
+
+
+@celery_app.task(name="videos.stage.render", **_STAGE_TASK_OPTIONS)
+def render_video_task(self, ctx: dict) -> dict:
+    return _execute_stage(self, "render", ctx)
+
+
+@celery_app.task(name="videos.stage.captions", **_STAGE_TASK_OPTIONS)
+def add_captions_task(self, ctx: dict) -> dict:
+    return _execute_stage(self, "captions", ctx)
+
+
+STAGE_TASKS = {
+    "fetch": fetch_paper_task,
+    "script": write_script_task,
+    "audio": synthesize_audio_task,
+    "render": render_video_task,
+    "captions": add_captions_task,
+}
+
+
+@celery_app.task(name="videos.finalize", compression=get_settings().celery_stage_compression)
+def finalize_video_task(ctx: dict) -> dict:
+    """Upload the rendered video to storage and record it on the job."""
+    job_id = ctx["job_id"]
+    artifact_store = get_artifact_store()
+    session = SessionLocal()
     try:
+        job = crud.get_job_with_video(session, job_id)
+        if job is None:
+            logger.info("Job %s no longer exists; not storing its video", job_id)
+            return {"job_id": job_id, "status": "missing"}
+        if job.status == "cancelled":
+            return {"job_id": job_id, "status": "cancelled"}
+        storage_key = f"videos/{job.video_id}.mp4"
+        storage = get_storage()
+        storage.put_file(storage_key, artifact_store.path(ctx["artifacts"]["render"]))
+        video_url = storage.uri(storage_key)
         crud.update_job(
-            session,
-            job_id,
-            status="processing",
-            progress=5,
-            celery_task_id=self.request.id,
+            session, job_id, status="completed", progress=100, video_url=video_url, storage_key=storage_key
         )
-        reporter.update(progress=25)
+    except Exception as exc:
+        logger.exception("Job %s failed to store its video: %s", job_id, exc)
+        _mark_failed(job_id, exc)
+        raise
+    finally:
+        session.close()
+    publish_progress(job_id, progress=100, status="completed", video_url=video_url)
+    logger.info(
+        "Completed job %s for pubmed_id=%s (artifact cache: %s)",
+        job_id,
+        ctx["pubmed_id"],
+        artifact_store.stats(),
+    )
+    return {"job_id": job_id, "status": "completed"}
 
-        # TODO: Integrate professor's video generation pipeline.
-        # For now, use a mock video URL
-        video_url = "s3://fake/video.mp4"
-        reporter.update(progress=90)
 
-        crud.update_job(session, job_id, status="completed", progress=100, video_url=video_url)
-        logger.info("Completed job %s for pubmed_id=%s", job_id, pubmed_id)
-        return {"job_id": job_id, "status": "completed"}
-    except Exception as exc:  # pragma: no cover - defensive logging
-        logger.exception("Job %s failed: %s", job_id, exc)
-        crud.update_job(session, job_id, status="failed", error_message=str(exc))
-        raise
+@celery_app.task(name="videos.reap_stale_jobs")
+def reap_stale_jobs_task() -> dict:
+    """Requeue processing jobs whose heartbeat went stale, failing those out of attempts.
+
+    Runs on Celery beat every ``REAPER_INTERVAL_SECONDS``. Each job is claimed
+    with a compare-and-swap on its heartbeat, so overlapping sweeps are safe.
+    Only after a successful claim is the lost task revoked, so a redelivered
+    copy of it is discarded, and the job requeued on the lane it was first
+    dispatched to.
+    """
+    settings = get_settings()
+    cutoff = datetime.utcnow() - timedelta(seconds=settings.job_stale_seconds)
+    requeued: list[str] = []
+    failed: list[str] = []
+    session = SessionLocal()
+    try:
+        for job in crud.find_stale_jobs(session, cutoff, limit=settings.reaper_batch_size):
+            lost_task_id = job.celery_task_id
+            if job.attempts < settings.job_max_attempts:
+                task_id = str(uuid4())
+                if crud.claim_stale_job(session, job, status="queued", celery_task_id=task_id):
+                    revoke_job_task(lost_task_id)
+                    publish_progress(job.id, status="queued")
+                    try:
+                        generate_video_task.apply_async(
+                            args=(job.id, job.video.pubmed_id),
+                            task_id=task_id,
+                            # A lane dropped since (fewer FAIR_SHARE_LANES) has no consumers left.
+                            queue=job.queue if job.queue in settings.all_queues else None,
+                            priority=PRIORITY_LEVELS[job.priority],
+                        )
+                    except Exception as exc:
+                        # Otherwise the job waits, queued under a task id nobody holds, for another stale window.
+                        logger.error("Unable to requeue stale job %s: %s", job.id, exc)
+                        error = "Unable to enqueue job"
+                        crud.update_job(session, job.id, status="failed", error_message=error)
+                        publish_progress(job.id, status="failed", error_message=error)
+                        failed.append(job.id)
+                        continue
+                    requeued.append(job.id)
+            else:
+                error = f"Worker stopped responding after {job.attempts} attempts"
+                if crud.claim_stale_job(session, job, status="failed", error_message=error):
+                    revoke_job_task(lost_task_id)
+                    publish_progress(job.id, status="failed", error_message=error)
+                    failed.append(job.id)
     finally:
         session.close()
+    if requeued or failed:
+        logger.warning("Reaped stale jobs: requeued=%s failed=%s", requeued, failed)
+    return {"requeued": requeued, "failed": failed}
+
+
+@celery_app.task(name="videos.purge_idempotency_keys")
+def purge_idempotency_keys_task() -> dict:
+    """Delete expired ``Idempotency-Key`` records; runs hourly on Celery beat.
+
+    Lookups already ignore expired keys, so this only bounds the table's size.
+    """
+    session = SessionLocal()
+    try:
+        deleted = crud.purge_expired_idempotency_keys(session)
+    finally:
+        session.close()
+    return {"deleted": deleted}
+
+
+def enqueue_batch(jobs: Iterable[crud.BatchJob], *, queue: Optional[str], priority: str) -> None:
+    """Send ``videos.generate`` for every job as one group.
+
+    The group reuses one producer and broker connection for the whole chunk,
+    but the Redis transport still publishes one message (one ``LPUSH``) per job.
+    """
+    group(
+        generate_video_task.signature(
+            args=(job.job_id, job.pubmed_id),
+            task_id=job.celery_task_id,
+            queue=queue,
+            priority=PRIORITY_LEVELS[priority],
+        )
+        for job in jobs
+    ).apply_async()
@@ -0,0 +1,33 @@
+"""Shared, pooled Redis client."""
+
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+from .queue.config import get_settings
+
+if TYPE_CHECKING:
+    import redis
+
+
+@lru_cache()
+def get_redis() -> redis.Redis:
+    """Return a process-wide Redis client backed by a bounded connection pool."""
+    import redis
+
+    settings = get_settings()
+    pool = redis.ConnectionPool.from_url(
+        settings.redis_url,
+        max_connections=settings.redis_max_connections,
+        socket_connect_timeout=1,
+        health_check_interval=30,
+    )
+    return redis.Redis(connection_pool=pool)
+
+
+def close_redis() -> None:
+    """Disconnect the pooled client, if one was created; called when the API shuts down."""
+    if get_redis.cache_info().currsize:
+        get_redis().connection_pool.disconnect()
+        get_redis.cache_clear()
@@ -1,3 +1,4 @@
 from . import health, videos
 
+# videos_async is imported by main.create_app only when DB_ASYNC is enabled.
 __all__ = ["health", "videos"]
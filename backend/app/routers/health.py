@@ -1,44 +1,60 @@
-"""Health check endpoint."""
+"""Health check endpoints.
+
+Dependency checks run on a background thread (:mod:`app.health`); these
+handlers only read the cached snapshot, so frequent load-balancer probes add
+no Redis or broker traffic.
+"""
 
 from __future__ import annotations
 
-import redis
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, Response, status
 
 from .. import schemas
-from ..queue.celery_app import celery_app
-from ..queue.config import get_settings
+from ..database import pool_status
+from ..health import READINESS_CHECKS, HealthMonitor, get_health_monitor
 
 router = APIRouter(prefix="/api/health", tags=["health"])
 
 
-def _check_redis() -> bool:
-    """Ping Redis with a short timeout."""
-    try:
-        settings = get_settings()
-        client = redis.from_url(settings.celery_broker_url, socket_connect_timeout=1)
-        client.ping()
-        client.close()
-        return True
-    except Exception:
-        return False
+def _detailed(monitor: HealthMonitor) -> schemas.HealthDetailedResponse:
+    snapshot = monitor.snapshot()
+    stale = monitor.is_stale(snapshot)
+    results = snapshot.results
+    return schemas.HealthDetailedResponse(
+        api="ok",
+        database=results.get("database", False),
+        redis=results.get("redis", False),
+        celery_ping=results.get("celery_ping", False),
+        ready=not stale and all(results.get(name, False) for name in READINESS_CHECKS),
+        stale=stale,
+        checked_at=snapshot.checked_at,
+    )
 
 
-def _check_celery() -> bool:
-    """Ping Celery workers with a small timeout."""
-    try:
-        inspect = celery_app.control.inspect(timeout=1.0)
-        result = inspect.ping()
-        return result is not None and len(result) > 0
-    except Exception:
-        return False
+@router.get("/", response_model=schemas.HealthDetailedResponse)
+def health_check(monitor: HealthMonitor = Depends(get_health_monitor)) -> schemas.HealthDetailedResponse:
+    """Return the most recent database, Redis and Celery check results."""
+    return _detailed(monitor)
 
 
-@router.get("/", response_model=schemas.HealthDetailedResponse)
-def health_check() -> schemas.HealthDetailedResponse:
-    """Return detailed health status including Redis and Celery connectivity."""
-    return schemas.HealthDetailedResponse(
-        api="ok",
-        redis=_check_redis(),
-        celery_ping=_check_celery(),
-    )
+@router.get("/live", response_model=schemas.HealthResponse)
+def liveness() -> schemas.HealthResponse:
+    """Process is up and serving requests; touches no dependencies."""
+    return schemas.HealthResponse()
+
+
+@router.get("/ready", response_model=schemas.HealthDetailedResponse)
+def readiness(
+    response: Response, monitor: HealthMonitor = Depends(get_health_monitor)
+) -> schemas.HealthDetailedResponse:
+    """503 until the database and Redis are reachable according to a fresh snapshot."""
+    result = _detailed(monitor)
+    if not result.ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return result
+
+
+@router.get("/db", response_model=schemas.DatabasePoolResponse)
+def database_pool() -> schemas.DatabasePoolResponse:
+    """Return connection-pool counters for this API process."""
+    return schemas.DatabasePoolResponse(**pool_status())
@@ -1,55 +1,407 @@
 """Video-related API endpoints."""
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.responses import RedirectResponse
+import json
+from contextlib import ExitStack
+from typing import AsyncIterator, Optional
+from uuid import uuid4
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import RedirectResponse, StreamingResponse
 from sqlalchemy.orm import Session
+from starlette.background import BackgroundTask
 
-from .. import crud, schemas
-from ..database import get_db
-from ..queue.tasks import generate_video_task
+from .. import admission, crud, metrics, models, schemas, tracing
+from ..database import SessionLocal, get_db
+from ..events import get_progress_bus, publish_progress
+from ..queue.config import PRIORITY_LEVELS, get_settings
+from ..status_cache import CachedStatus, get_status_cache
+from ..storage import get_storage
+from ..streaming import FileRangeResponse, RangeNotSatisfiable, etag_matches, object_headers, parse_range
 
 router = APIRouter(prefix="/api/videos", tags=["videos"])
 
 
+def _tasks():
+    """The Celery task module, imported on first dispatch so the API starts without loading Celery."""
+    from ..queue import tasks
+
+    return tasks
+
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+MAX_IDEMPOTENCY_KEY_LENGTH = 255
+
+
+def _enqueue_failed(db: Session, job_ids: list[str]) -> None:
+    """Fail jobs whose dispatch raised, publishing it so cached status bodies and SSE streams update."""
+    error = "Unable to enqueue job"
+    crud.mark_jobs_failed(db, job_ids, error_message=error)
+    for job_id in job_ids:
+        publish_progress(job_id, status="failed", error_message=error)
+
+
+def _replay(
+    record: models.IdempotencyKey, claim: crud.IdempotencyClaim, response: Response
+) -> schemas.JobCreateResponse:
+    """Answer a repeated request with the job its key was first used for."""
+    if record.request_hash != claim.request_hash:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"{IDEMPOTENCY_HEADER} was already used for a different request",
+        )
+    response.status_code = status.HTTP_200_OK if record.cached else status.HTTP_201_CREATED
+    response.headers["Idempotent-Replayed"] = "true"
+    job = record.job
+    return schemas.JobCreateResponse(job_id=job.id, video_id=job.video_id, status=job.status, cached=record.cached)
+
+
 @router.post("/generate", response_model=schemas.JobCreateResponse, status_code=status.HTTP_201_CREATED)
-def generate_video(payload: schemas.VideoGenerateRequest, db: Session = Depends(get_db)) -> schemas.JobCreateResponse:
-    """Create a Video + Job record and enqueue Celery work."""
+def generate_video(
+    payload: schemas.VideoGenerateRequest,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER),
+) -> schemas.JobCreateResponse:
+    """Create a Video + Job record and enqueue Celery work.
+
+    Requests for a paper that already has a completed or in-flight job return
+    that job (HTTP 200, ``cached=true``) instead of generating it again.
+    Rate-limited callers and a full queue get HTTP 429 with ``Retry-After``.
+
+    A repeated ``Idempotency-Key`` from the same caller replays the original
+    status code and job (flagged by ``Idempotent-Replayed: true``) without
+    admission checks or dispatch; reusing it for a different body is a 422.
+    """
+    settings = get_settings()
+    claim = None
+    if idempotency_key is not None:
+        if not 0 < len(idempotency_key) <= MAX_IDEMPOTENCY_KEY_LENGTH:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"{IDEMPOTENCY_HEADER} must be 1-{MAX_IDEMPOTENCY_KEY_LENGTH} characters",
+            )
+        claim = crud.idempotency_claim(
+            admission.idempotency_scope(request, payload.user_email),
+            idempotency_key,
+            payload.model_dump(),
+            settings.idempotency_ttl_seconds,
+        )
+        record = crud.get_idempotency_key(db, claim.key)
+        if record is not None:
+            return _replay(record, claim, response)
+
+    lane = admission.admit_generation(request, payload.user_email)
     user = None
     if payload.user_email:
         user = crud.get_or_create_user(db, payload.user_email)
 
-    job = crud.create_video_with_job(db, pubmed_id=payload.pubmed_id, user=user)
+    job, created = crud.get_or_create_cached_job(
+        db,
+        pubmed_id=payload.pubmed_id,
+        user=user,
+        pipeline_version=settings.pipeline_version,
+        priority=payload.priority,
+        idempotency=claim,
+    )
+    metrics.GENERATION_CACHE_LOOKUPS.labels("miss" if created else "hit").inc()
+    if not created:
+        if claim is not None:
+            record = crud.claim_idempotency_key(db, claim, job.id, cached=True)
+            if record is not None:
+                return _replay(record, claim, response)
+        response.status_code = status.HTTP_200_OK
+        return schemas.JobCreateResponse(job_id=job.id, video_id=job.video_id, status=job.status, cached=True)
+
+    # Mark the job queued before dispatch so an eager or very fast worker cannot
+    # have its progress overwritten by this request.
+    task_id = str(uuid4())
+    job = crud.update_job(db, job.id, status="queued", celery_task_id=task_id, queue=lane)
+    queued = schemas.JobCreateResponse(job_id=job.id, video_id=job.video_id, status=job.status)
 
+    tracing.current_span().set_attribute("job.id", job.id)
     try:
-        async_result = generate_video_task.delay(job.id, job.video.pubmed_id)
+        with tracing.span("enqueue", kind="producer", attributes={"job.id": job.id, "celery.queue": lane}):
+            _tasks().generate_video_task.apply_async(
+                args=(job.id, job.video.pubmed_id),
+                task_id=task_id,
+                queue=lane,
+                priority=PRIORITY_LEVELS[job.priority],
+            )
     except Exception as exc:  # pragma: no cover - broker connectivity
-        crud.update_job(db, job.id, status="failed", error_message="Unable to enqueue job")
+        _enqueue_failed(db, [job.id])
+        if claim is not None:
+            # Let the client's retry try again instead of replaying a job that never ran.
+            crud.delete_idempotency_key(db, claim.key)
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="Queue temporarily unavailable",
         ) from exc
 
-    job = crud.update_job(db, job.id, status="queued", celery_task_id=async_result.id)
-    return schemas.JobCreateResponse(job_id=job.id, video_id=job.video_id, status=job.status)
+    return queued
+
+
+@router.post(
+    "/generate/batch",
+    response_model=schemas.BatchJobCreateResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+def generate_videos_batch(
+    payload: schemas.VideoBatchGenerateRequest, request: Request, db: Session = Depends(get_db)
+) -> schemas.BatchJobCreateResponse:
+    """Create Video + Job records for many papers in one transaction and enqueue them as groups."""
+    papers = len({crud.normalize_pubmed_id(pubmed_id) for pubmed_id in payload.pubmed_ids})
+    lane = admission.admit_generation(request, payload.user_email, cost=papers)
+    settings = get_settings()
+    user = None
+    if payload.user_email:
+        user = crud.get_or_create_user(db, payload.user_email)
+
+    results = crud.get_or_create_cached_jobs(
+        db,
+        pubmed_ids=payload.pubmed_ids,
+        user=user,
+        pipeline_version=settings.pipeline_version,
+        priority=payload.priority,
+        queue=lane,
+    )
+    items = [
+        schemas.BatchJobCreateItem(
+            pubmed_id=result.pubmed_id,
+            job_id=result.job_id,
+            video_id=result.video_id,
+            status=result.status,
+            cached=not result.created,
+        )
+        for result in results
+    ]
+    new_jobs = [result for result in results if result.created]
+    metrics.GENERATION_CACHE_LOOKUPS.labels("miss").inc(len(new_jobs))
+    metrics.GENERATION_CACHE_LOOKUPS.labels("hit").inc(len(results) - len(new_jobs))
+
+    chunk_size = max(settings.batch_dispatch_chunk_size, 1)
+    for start in range(0, len(new_jobs), chunk_size):
+        chunk = new_jobs[start : start + chunk_size]
+        try:
+            with tracing.span("enqueue", kind="producer", attributes={"celery.queue": lane, "batch.size": len(chunk)}):
+                _tasks().enqueue_batch(chunk, queue=lane, priority=payload.priority)
+        except Exception as exc:  # pragma: no cover - broker connectivity
+            undispatched = [job.job_id for job in new_jobs[start:]]
+            _enqueue_failed(db, undispatched)
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Queue temporarily unavailable",
+            ) from exc
+
+    return schemas.BatchJobCreateResponse(jobs=items, created=len(new_jobs))
+
+
+def video_cursor(cursor: Optional[str] = Query(default=None, description="Opaque token from next_cursor")):
+    """Dependency decoding the listing ``cursor`` query parameter; 400 on a malformed token."""
+    if cursor is None:
+        return None
+    try:
+        return crud.decode_video_cursor(cursor)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor") from exc
+
+
+def video_page_response(rows: list, next_cursor: Optional[crud.VideoCursor]) -> schemas.VideoListResponse:
+    return schemas.VideoListResponse(
+        items=[schemas.VideoListItem.model_validate(row) for row in rows],
+        next_cursor=crud.encode_video_cursor(next_cursor) if next_cursor else None,
+    )
+
+
+@router.get("", response_model=schemas.VideoListResponse)
+def list_videos(
+    limit: int = Query(default=50, ge=1, le=schemas.MAX_PAGE_SIZE),
+    after: Optional[crud.VideoCursor] = Depends(video_cursor),
+    user_email: Optional[str] = None,
+    status_filter: Optional[str] = Query(default=None, alias="status"),
+    pubmed_id: Optional[str] = None,
+    db: Session = Depends(get_db),
+) -> schemas.VideoListResponse:
+    """List videos newest first, paging with the ``next_cursor`` token from the previous page."""
+    rows, next_cursor = crud.list_videos(
+        db, limit, after=after, user_email=user_email, status=status_filter, pubmed_id=pubmed_id
+    )
+    return video_page_response(rows, next_cursor)
+
+
+def status_cache_control(job_status: str) -> str:
+    """Let shared caches absorb polling of finished jobs; running ones are revalidated every time."""
+    settings = get_settings()
+    if job_status == "completed":
+        return f"public, max-age={settings.status_completed_max_age_seconds}"
+    if job_status in crud.TERMINAL_JOB_STATUSES:
+        return f"public, max-age={settings.status_finished_max_age_seconds}"
+    return "no-cache"
+
+
+def job_status_entry(job: models.Job) -> CachedStatus:
+    """Serialized status response for ``job``; the ETag is derived from ``Job.version``."""
+    return CachedStatus(
+        etag=f'"{job.id}.{job.version}"',
+        status=job.status,
+        body=schemas.JobStatusResponse.from_job(job).model_dump_json().encode(),
+    )
+
+
+def job_status_response(request: Request, cached: CachedStatus) -> Response:
+    """Status response with its ETag and Cache-Control; an empty 304 when ``If-None-Match`` matches."""
+    headers = {"etag": cached.etag, "cache-control": status_cache_control(cached.status)}
+    if etag_matches(request.headers.get("if-none-match"), cached.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(cached.body, media_type="application/json", headers=headers)
 
 
 @router.get("/{job_id}", response_model=schemas.JobStatusResponse)
-def get_job_status(job_id: str, db: Session = Depends(get_db)) -> schemas.JobStatusResponse:
+def get_job_status(job_id: str, request: Request, db: Session = Depends(get_db)) -> Response:
+    """Current job status, served from the status cache when possible.
+
+    A poll with a matching ``If-None-Match`` gets an empty 304 until the job changes.
+    """
+    cache = get_status_cache()
+    cached = cache.get(job_id)
+    if cached is None:
+        job = crud.get_job_with_video(db, job_id)
+        if not job:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+        cached = job_status_entry(job)
+        cache.set(job_id, cached)
+    return job_status_response(request, cached)
+
+
+@router.post("/{job_id}/retry", response_model=schemas.JobCreateResponse, status_code=status.HTTP_202_ACCEPTED)
+def retry_job(job_id: str, request: Request, db: Session = Depends(get_db)) -> schemas.JobCreateResponse:
+    """Re-queue a failed or cancelled job under the same job ID, resuming after its last finished stage."""
     job = crud.get_job_with_video(db, job_id)
     if not job:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    if job.status not in crud.RETRYABLE_JOB_STATUSES:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail="Only failed or cancelled jobs can be retried"
+        )
+    lane = admission.admit_generation(request, job.video.user.email if job.video.user else None)
 
-    video = job.video
-    return schemas.JobStatusResponse(
-        job_id=job.id,
-        status=job.status,
-        progress=job.progress,
-        video=schemas.VideoMetadata.model_validate(video),
+    task_id = str(uuid4())
+    job = crud.reset_job_for_retry(db, job_id, celery_task_id=task_id, queue=lane)
+    get_status_cache().invalidate(job_id)
+    queued = schemas.JobCreateResponse(job_id=job.id, video_id=job.video_id, status=job.status)
+
+    tracing.current_span().set_attribute("job.id", job.id)
+    try:
+        with tracing.span("enqueue", kind="producer", attributes={"job.id": job.id, "celery.queue": lane}):
+            _tasks().generate_video_task.apply_async(
+                args=(job.id, job.video.pubmed_id),
+                task_id=task_id,
+                queue=lane,
+                priority=PRIORITY_LEVELS[job.priority],
+            )
+    except Exception as exc:
+        _enqueue_failed(db, [job.id])
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Queue temporarily unavailable",
+        ) from exc
+
+    return queued
+
+
+@router.post("/{job_id}/cancel", response_model=schemas.JobStatusResponse)
+def cancel_job(job_id: str, db: Session = Depends(get_db)) -> schemas.JobStatusResponse:
+    """Cancel a pending, queued or processing job.
+
+    The job's current Celery task is revoked (terminating it if a worker is
+    running it) and later stages skip themselves. Finished stages stay
+    checkpointed, so a cancelled job can be resumed with ``/retry``.
+    """
+    job = crud.get_job_with_video(db, job_id)
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    if not crud.cancel_job(db, job_id):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail="Only pending, queued or processing jobs can be cancelled"
+        )
+    db.refresh(job)
+    db.refresh(job.video)
+    _tasks().revoke_job_task(job.celery_task_id)
+    publish_progress(job_id, progress=job.progress, status="cancelled")
+    return schemas.JobStatusResponse.from_job(job)
+
+
+def _job_snapshot(job_id: str) -> Optional[dict]:
+    """Read the job once for the opening stream event, releasing the connection immediately."""
+    db = SessionLocal()
+    try:
+        job = crud.get_job_with_video(db, job_id)
+        if not job:
+            return None
+        return {
+            "job_id": job.id,
+            "status": job.status,
+            "progress": job.progress,
+            "video_url": job.video.video_url if job.video else None,
+        }
+    finally:
+        db.close()
+
+
+def _sse(event: dict) -> str:
+    return f"event: progress\ndata: {json.dumps(event)}\n\n"
+
+
+@router.get("/{job_id}/events")
+async def stream_job_progress(job_id: str, request: Request) -> StreamingResponse:
+    """Stream job progress as server-sent events until the job reaches a terminal state.
+
+    The job is read from the database once; later events arrive over the progress
+    bus, so connected clients cost no database reads per update.
+    """
+    heartbeat = get_settings().sse_heartbeat_seconds
+    cleanup = ExitStack()
+    # Subscribe before reading the snapshot so no update can slip between the two.
+    subscription = cleanup.enter_context(get_progress_bus().subscribe(job_id))
+    snapshot = await run_in_threadpool(_job_snapshot, job_id)
+    if snapshot is None:
+        cleanup.close()
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+
+    async def events() -> AsyncIterator[str]:
+        try:
+            yield _sse(snapshot)
+            if snapshot["status"] in crud.TERMINAL_JOB_STATUSES:
+                return
+            while not await request.is_disconnected():
+                event = await subscription.get(timeout=heartbeat)
+                if event is None:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield _sse(event)
+                if event.get("status") in crud.TERMINAL_JOB_STATUSES:
+                    return
+        finally:
+            cleanup.close()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # Also runs if the client disconnects before the stream starts.
+        background=BackgroundTask(cleanup.close),
     )
 
 
-@router.get("/{job_id}/download")
-def download_video(job_id: str, db: Session = Depends(get_db)) -> RedirectResponse:
+@router.api_route("/{job_id}/download", methods=["GET", "HEAD"])
+def download_video(job_id: str, request: Request, db: Session = Depends(get_db)) -> Response:
+    """Serve the finished video.
+
+    Object storage answers with a redirect to a presigned URL. Local files are
+    streamed with Range, ETag/If-None-Match support and zero-copy sends where the
+    server allows, or handed to nginx when ``STORAGE_ACCEL_REDIRECT_PREFIX`` is set.
+    """
     job = crud.get_job_with_video(db, job_id)
     if not job or not job.video:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
@@ -57,5 +409,40 @@ def download_video(job_id: str, db: Session = Depends(get_db)) -> RedirectRespon
     video = job.video
     if video.status != "completed" or not video.video_url:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Video not ready for download")
+    if not video.storage_key:
+        return RedirectResponse(url=video.video_url)
 
-    return RedirectResponse(url=video.video_url)
+    settings = get_settings()
+    storage = get_storage()
+    presigned = storage.presigned_url(video.storage_key, settings.storage_presign_seconds)
+    if presigned:
+        return RedirectResponse(url=presigned, status_code=status.HTTP_307_TEMPORARY_REDIRECT)
+
+    obj = storage.stat(video.storage_key)
+    path = storage.local_path(video.storage_key)
+    if obj is None or path is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Video file missing")
+    if etag_matches(request.headers.get("if-none-match"), obj.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=object_headers(obj))
+
+    disposition = {"content-disposition": f'inline; filename="{video.id}.mp4"'}
+    if settings.storage_accel_redirect_prefix:
+        return Response(
+            headers={
+                "x-accel-redirect": settings.storage_accel_redirect_prefix + video.storage_key,
+                **object_headers(obj),
+                **disposition,
+            },
+            media_type=obj.content_type,
+        )
+
+    if_range = request.headers.get("if-range")
+    range_header = request.headers.get("range") if not if_range or if_range == obj.etag else None
+    try:
+        byte_range = parse_range(range_header, obj.size)
+    except RangeNotSatisfiable:
+        return Response(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            headers={"content-range": f"bytes */{obj.size}"},
+        )
+    return FileRangeResponse(path, obj, byte_range, headers=disposition)
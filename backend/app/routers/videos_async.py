@@ -0,0 +1,49 @@
+"""Async variants of the read-heavy video endpoints.
+
+Mounted ahead of :mod:`app.routers.videos` when ``DB_ASYNC`` is enabled, so
+status polling runs on the event loop instead of tying up a threadpool slot
+per request while it waits on the database.
+"""
+
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import crud, crud_async, schemas
+from ..database import get_async_db
+from ..status_cache import get_status_cache
+from .videos import job_status_entry, job_status_response, video_cursor, video_page_response
+
+router = APIRouter(prefix="/api/videos", tags=["videos"])
+
+
+@router.get("", response_model=schemas.VideoListResponse)
+async def list_videos(
+    limit: int = Query(default=50, ge=1, le=schemas.MAX_PAGE_SIZE),
+    after: Optional[crud.VideoCursor] = Depends(video_cursor),
+    user_email: Optional[str] = None,
+    status_filter: Optional[str] = Query(default=None, alias="status"),
+    pubmed_id: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+) -> schemas.VideoListResponse:
+    rows, next_cursor = await crud_async.list_videos(
+        db, limit, after=after, user_email=user_email, status=status_filter, pubmed_id=pubmed_id
+    )
+    return video_page_response(rows, next_cursor)
+
+
+@router.get("/{job_id}", response_model=schemas.JobStatusResponse)
+async def get_job_status(job_id: str, request: Request, db: AsyncSession = Depends(get_async_db)) -> Response:
+    """Async twin of :func:`app.routers.videos.get_job_status`: same cache, ETag and Cache-Control."""
+    cache = get_status_cache()
+    # The Redis-backed cache is a blocking client; keep its round trips off the event loop.
+    cached = await run_in_threadpool(cache.get, job_id)
+    if cached is None:
+        job = await crud_async.get_job_with_video(db, job_id)
+        if not job:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+        cached = job_status_entry(job)
+        await run_in_threadpool(cache.set, job_id, cached)
+    return job_status_response(request, cached)
@@ -0,0 +1,16 @@
+"""Helpers for ASGI middleware shared by metrics and tracing."""
+
+from __future__ import annotations
+
+from typing import Any
+
+
+def route_template(scope: dict[str, Any]) -> str:
+    """Path template of the matched route, so labels stay bounded (``/api/videos/{job_id}``)."""
+    endpoint = scope.get("endpoint")
+    app = scope.get("app")
+    if endpoint is not None and app is not None:
+        for route in app.routes:
+            if getattr(route, "endpoint", None) is endpoint:
+                return route.path
+    return "unmatched"
@@ -4,10 +4,15 @@ from __future__ import annotations
 
 from datetime import datetime
 
-from typing import Optional
+from typing import Literal, Optional
 
 from pydantic import BaseModel, EmailStr, Field, field_validator
 
+from .crud import is_valid_pubmed_id
+from .queue.config import get_settings
+
+INVALID_PUBMED_ID = "PubMed IDs must be digits, optionally prefixed with PMC or PMID"
+
 
 class HealthResponse(BaseModel):
     status: str = "ok"
@@ -15,8 +20,23 @@ class HealthResponse(BaseModel):
 
 class HealthDetailedResponse(BaseModel):
     api: str = "ok"
+    database: bool
     redis: bool
     celery_ping: bool
+    ready: bool
+    stale: bool = Field(description="True when the cached checks are older than HEALTH_CACHE_TTL_SECONDS")
+    checked_at: datetime
+
+
+class DatabasePoolResponse(BaseModel):
+    pool: str
+    size: Optional[int] = None
+    checkedin: Optional[int] = None
+    checkedout: Optional[int] = None
+    overflow: Optional[int] = None
+
+
+Priority = Literal["high", "normal", "low"]
 
 
 class VideoGenerateRequest(BaseModel):
@@ -24,6 +44,9 @@ class VideoGenerateRequest(BaseModel):
     user_email: Optional[EmailStr] = Field(
         default=None, description="Optional email to tie the video to a user"
     )
+    priority: Priority = Field(
+        default="normal", description="high: interactive/paid, low: bulk backfills"
+    )
 
     @field_validator("pubmed_id")
     @classmethod
@@ -31,6 +54,33 @@ class VideoGenerateRequest(BaseModel):
         cleaned = value.strip()
         if not cleaned:
             raise ValueError("PubMed ID cannot be empty")
+        if not is_valid_pubmed_id(cleaned):
+            raise ValueError(INVALID_PUBMED_ID)
+        return cleaned
+
+
+class VideoBatchGenerateRequest(BaseModel):
+    pubmed_ids: list[str] = Field(
+        ..., min_length=1, description="PubMed, PMC, or PMID identifiers (at most MAX_BATCH_SIZE)"
+    )
+    user_email: Optional[EmailStr] = Field(
+        default=None, description="Optional email to tie the videos to a user"
+    )
+    priority: Priority = Field(
+        default="normal", description="high: interactive/paid, low: bulk backfills"
+    )
+
+    @field_validator("pubmed_ids")
+    @classmethod
+    def _normalize_pubmed_ids(cls, values: list[str]) -> list[str]:
+        max_batch_size = get_settings().max_batch_size
+        if len(values) > max_batch_size:
+            raise ValueError(f"At most {max_batch_size} PubMed IDs per batch")
+        cleaned = [value.strip() for value in values]
+        if any(len(value) < 3 for value in cleaned):
+            raise ValueError("PubMed IDs must be at least 3 characters")
+        if not all(is_valid_pubmed_id(value) for value in cleaned):
+            raise ValueError(INVALID_PUBMED_ID)
         return cleaned
 
 
@@ -38,6 +88,16 @@ class JobCreateResponse(BaseModel):
     job_id: str
     video_id: str
     status: str
+    cached: bool = Field(default=False, description="True when an existing job was reused")
+
+
+class BatchJobCreateItem(JobCreateResponse):
+    pubmed_id: str
+
+
+class BatchJobCreateResponse(BaseModel):
+    jobs: list[BatchJobCreateItem]
+    created: int = Field(description="Number of newly enqueued jobs")
 
 
 class VideoMetadata(BaseModel):
@@ -54,11 +114,47 @@ class VideoMetadata(BaseModel):
         populate_by_name = True
 
 
+MAX_PAGE_SIZE = 200
+
+
+class VideoListItem(BaseModel):
+    id: str
+    job_id: Optional[str] = None
+    pubmed_id: str
+    status: str
+    progress: Optional[int] = None
+    video_url: Optional[str] = None
+    error_message: Optional[str] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class VideoListResponse(BaseModel):
+    items: list[VideoListItem]
+    next_cursor: Optional[str] = Field(
+        default=None, description="Pass as ``cursor`` to fetch the next page; null on the last page"
+    )
+
+
 class JobStatusResponse(BaseModel):
     job_id: str
     status: str
     progress: int
+    priority: str = "normal"
     video: VideoMetadata
 
     class Config:
         from_attributes = True
+
+    @classmethod
+    def from_job(cls, job) -> "JobStatusResponse":
+        return cls(
+            job_id=job.id,
+            status=job.status,
+            progress=job.progress,
+            priority=job.priority,
+            video=VideoMetadata.model_validate(job.video),
+        )
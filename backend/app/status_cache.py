@@ -0,0 +1,109 @@
+"""Read-through cache of serialized job status responses.
+
+Clients poll ``GET /api/videos/{job_id}`` far more often than a job changes,
+so the rendered JSON body is cached per job together with its ETag. Every
+progress event (see :func:`app.events.publish_progress`) drops the entry; the
+short TTL bounds staleness when an invalidation is missed, e.g. by the local
+backend in a process other than the worker's.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+from .queue.config import get_settings
+from .redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+class CachedStatus(NamedTuple):
+    etag: str
+    status: str
+    body: bytes
+
+
+class LocalStatusCache:
+    """In-process LRU with per-entry expiry; enough for a single API process and tests."""
+
+    def __init__(self, ttl: float, max_entries: int) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, tuple[float, CachedStatus]] = OrderedDict()
+
+    def get(self, job_id: str) -> Optional[CachedStatus]:
+        with self._lock:
+            entry = self._entries.get(job_id)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[job_id]
+                return None
+            self._entries.move_to_end(job_id)
+            return entry[1]
+
+    def set(self, job_id: str, value: CachedStatus) -> None:
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[job_id] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(job_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, job_id: str) -> None:
+        with self._lock:
+            self._entries.pop(job_id, None)
+
+
+class RedisStatusCache:
+    """Entries shared by every API process and invalidated directly by the workers."""
+
+    KEY_PREFIX = "hidden-hill:job-status:"
+
+    def __init__(self, ttl: float) -> None:
+        self.ttl = ttl
+
+    def get(self, job_id: str) -> Optional[CachedStatus]:
+        try:
+            raw = get_redis().get(self.KEY_PREFIX + job_id)
+        except Exception as exc:  # pragma: no cover - the cache is best effort
+            logger.warning("Status cache unavailable: %s", exc)
+            return None
+        if raw is None:
+            return None
+        etag, status, body = json.loads(raw)
+        return CachedStatus(etag, status, body.encode())
+
+    def set(self, job_id: str, value: CachedStatus) -> None:
+        if self.ttl <= 0:
+            return
+        payload = json.dumps([value.etag, value.status, value.body.decode()])
+        try:
+            get_redis().set(self.KEY_PREFIX + job_id, payload, px=int(self.ttl * 1000))
+        except Exception as exc:  # pragma: no cover - the cache is best effort
+            logger.warning("Unable to cache status for job %s: %s", job_id, exc)
+
+    def invalidate(self, job_id: str) -> None:
+        if self.ttl <= 0:
+            return
+        try:
+            get_redis().delete(self.KEY_PREFIX + job_id)
+        except Exception as exc:  # pragma: no cover - the TTL still expires the entry
+            logger.warning("Unable to invalidate status for job %s: %s", job_id, exc)
+
+
+@lru_cache()
+def get_status_cache() -> LocalStatusCache:
+    """Return the configured status cache for this process."""
+    settings = get_settings()
+    if settings.status_cache_backend == "local":
+        return LocalStatusCache(settings.status_cache_ttl_seconds, settings.status_cache_max_entries)
+    return RedisStatusCache(settings.status_cache_ttl_seconds)
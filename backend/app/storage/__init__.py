@@ -0,0 +1,22 @@
+"""Pluggable storage for finished videos."""
+
+from functools import lru_cache
+
+from ..queue.config import get_settings
+from .base import StorageBackend, StoredObject
+from .local import LocalStorage
+from .s3 import S3Storage
+
+
+@lru_cache()
+def get_storage() -> StorageBackend:
+    """Return the backend selected by ``STORAGE_BACKEND``."""
+    settings = get_settings()
+    if settings.storage_backend == "s3":
+        return S3Storage(settings.s3_bucket, endpoint_url=settings.s3_endpoint_url, region=settings.s3_region)
+    if settings.storage_backend == "local":
+        return LocalStorage(settings.storage_local_dir)
+    raise ValueError(f"Unknown STORAGE_BACKEND: {settings.storage_backend!r}")
+
+
+__all__ = ["LocalStorage", "S3Storage", "StorageBackend", "StoredObject", "get_storage"]
@@ -0,0 +1,51 @@
+"""Interface shared by the storage backends for finished videos."""
+
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from datetime import datetime
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+
+class StoredObject(NamedTuple):
+    key: str
+    size: int
+    etag: str
+    content_type: str
+    last_modified: datetime
+
+
+class StorageBackend(ABC):
+    """Where finished videos live once the pipeline is done with them.
+
+    Uploads read from a file on disk and downloads are served either straight
+    from a local path or through a presigned URL, so no backend ever holds a
+    whole video in memory.
+    """
+
+    scheme = ""
+
+    @abstractmethod
+    def put_file(self, key: str, source: Path, content_type: str = "video/mp4") -> StoredObject:
+        """Store the file at ``source`` under ``key``."""
+
+    @abstractmethod
+    def stat(self, key: str) -> Optional[StoredObject]:
+        """Metadata for ``key``, or ``None`` if it does not exist."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Remove ``key``; a missing key is not an error."""
+
+    def uri(self, key: str) -> str:
+        """Stable identifier recorded as ``Video.video_url``."""
+        return f"{self.scheme}://{key}"
+
+    def local_path(self, key: str) -> Optional[Path]:
+        """Filesystem path the API can stream from, if the backend has one."""
+        return None
+
+    def presigned_url(self, key: str, expires_in: int) -> Optional[str]:
+        """Time-limited URL a client can download from directly, if supported."""
+        return None
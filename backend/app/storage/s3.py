@@ -0,0 +1,68 @@
+"""S3-compatible object storage backend (AWS S3, MinIO, ...)."""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Optional
+
+from .base import StorageBackend, StoredObject
+
+
+class S3Storage(StorageBackend):
+    """Store objects in an S3 bucket; clients download through presigned URLs.
+
+    ``endpoint_url`` points the client at any S3-compatible service, e.g. a
+    local MinIO container during development. Credentials come from the usual
+    boto3 sources (``AWS_ACCESS_KEY_ID``/``AWS_SECRET_ACCESS_KEY``, profiles, roles).
+    """
+
+    scheme = "s3"
+
+    def __init__(
+        self,
+        bucket: str,
+        endpoint_url: Optional[str] = None,
+        region: Optional[str] = None,
+        client=None,
+    ) -> None:
+        if client is None:
+            try:
+                import boto3
+            except ImportError as exc:  # pragma: no cover - depends on the environment
+                raise RuntimeError("STORAGE_BACKEND=s3 requires the boto3 package") from exc
+            client = boto3.client("s3", endpoint_url=endpoint_url or None, region_name=region or None)
+        self.bucket = bucket
+        self.client = client
+
+    def put_file(self, key: str, source: Path, content_type: str = "video/mp4") -> StoredObject:
+        # upload_file streams from disk and switches to multipart for large files.
+        self.client.upload_file(str(source), self.bucket, key, ExtraArgs={"ContentType": content_type})
+        return self.stat(key)
+
+    def stat(self, key: str) -> Optional[StoredObject]:
+        from botocore.exceptions import ClientError
+
+        try:
+            head = self.client.head_object(Bucket=self.bucket, Key=key)
+        except ClientError as exc:
+            if exc.response.get("Error", {}).get("Code") in {"404", "NoSuchKey", "NotFound"}:
+                return None
+            raise
+        return StoredObject(
+            key=key,
+            size=head["ContentLength"],
+            etag=head["ETag"],
+            content_type=head.get("ContentType", "application/octet-stream"),
+            last_modified=head["LastModified"],
+        )
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    def uri(self, key: str) -> str:
+        return f"s3://{self.bucket}/{key}"
+
+    def presigned_url(self, key: str, expires_in: int) -> Optional[str]:
+        return self.client.generate_presigned_url(
+            "get_object", Params={"Bucket": self.bucket, "Key": key}, ExpiresIn=expires_in
+        )
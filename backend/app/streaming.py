@@ -0,0 +1,111 @@
+"""HTTP delivery of stored files: byte ranges, conditional requests, zero-copy sends."""
+
+from __future__ import annotations
+
+import os
+from email.utils import format_datetime
+from pathlib import Path
+from typing import Optional
+
+import anyio
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from .storage import StoredObject
+
+CHUNK_SIZE = 256 * 1024
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[tuple[int, int]]:
+    """Return the inclusive ``(start, end)`` of a single ``bytes=`` range, or ``None`` for the whole file.
+
+    Multi-range and malformed headers are ignored, as RFC 9110 allows; ranges
+    that start past the end of the file raise :class:`RangeNotSatisfiable`.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, _, last = header[len("bytes="):].strip().partition("-")
+    try:
+        if first == "":
+            length = int(last)
+            if length <= 0:
+                raise RangeNotSatisfiable
+            return max(size - length, 0), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size or start > end:
+        raise RangeNotSatisfiable
+    return start, min(end, size - 1)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag.removeprefix("W/") in candidates
+
+
+def object_headers(obj: StoredObject) -> dict[str, str]:
+    return {
+        "accept-ranges": "bytes",
+        "etag": obj.etag,
+        "last-modified": format_datetime(obj.last_modified, usegmt=True),
+    }
+
+
+class FileRangeResponse(Response):
+    """Stream ``path[start:end]`` without loading it into memory.
+
+    Uses the ASGI ``http.response.zerocopysend`` extension (``sendfile``) when the
+    server offers it, and otherwise sends fixed-size chunks read in a worker thread.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        obj: StoredObject,
+        byte_range: Optional[tuple[int, int]] = None,
+        headers: Optional[dict[str, str]] = None,
+    ) -> None:
+        self.path = path
+        self.start, self.end = byte_range if byte_range else (0, obj.size - 1)
+        all_headers = {**object_headers(obj), **(headers or {})}
+        all_headers["content-length"] = str(max(self.end - self.start + 1, 0))
+        if byte_range:
+            all_headers["content-range"] = f"bytes {self.start}-{self.end}/{obj.size}"
+        super().__init__(
+            status_code=206 if byte_range else 200, headers=all_headers, media_type=obj.content_type
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        count = self.end - self.start + 1
+        if scope["method"] == "HEAD" or count <= 0:
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        fd = await anyio.to_thread.run_sync(os.open, self.path, os.O_RDONLY)
+        try:
+            if "http.response.zerocopysend" in scope.get("extensions", {}):
+                await send({"type": "http.response.zerocopysend", "file": fd, "offset": self.start, "count": count})
+                return
+            offset = self.start
+            while count > 0:
+                chunk = await anyio.to_thread.run_sync(os.pread, fd, min(CHUNK_SIZE, count), offset)
+                if not chunk:
+                    break
+                offset += len(chunk)
+                count -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": count > 0})
+            if count > 0:
+                await send({"type": "http.response.body", "body": b""})
+        finally:
+            os.close(fd)
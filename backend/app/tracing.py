@@ -0,0 +1,474 @@
+"""Span tracing for the API and Celery workers, in OpenTelemetry's data model.
+
+Spans (trace id, span id, parent, kind, start/end in Unix nanoseconds,
+attributes, status) are written as JSON lines to one file per process under
+``TRACE_DIR``, so a job can be followed offline without a collector:
+
+* ``HTTP <method> <route>`` server spans from :class:`TracingMiddleware`,
+  honouring an incoming W3C ``traceparent`` header;
+* ``enqueue`` producer spans around dispatch, whose context travels to the
+  worker in the task message's ``traceparent`` header;
+* ``queue.wait`` spans from publish to pick-up and ``task <name>`` consumer
+  spans for every Celery task, including each pipeline stage;
+* ``db <OPERATION>`` client spans for every statement, and internal spans for
+  :func:`traced` functions such as the job writes in :mod:`app.crud`.
+
+Every span of a generation carries a ``job.id`` attribute. Tracing is off
+unless ``TRACING_ENABLED`` is set; disabled, each hook is a single check.
+"""
+
+from __future__ import annotations
+
+import atexit
+import contextvars
+import functools
+import json
+import os
+import secrets
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Iterator, NamedTuple, Optional, TextIO, TypeVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .routing import route_template
+from .queue.config import get_settings
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+TRACEPARENT_HEADER = "traceparent"
+# Wall-clock publish time (ns) carried next to traceparent, for queue.wait spans.
+ENQUEUED_AT_HEADER = "trace_enqueued_at"
+MAX_STATEMENT_LENGTH = 500
+
+
+class SpanContext(NamedTuple):
+    trace_id: str
+    span_id: str
+
+
+class Span:
+    """One timed operation; exported when :meth:`end` is called."""
+
+    __slots__ = ("tracer", "name", "kind", "context", "parent_id", "start_ns", "end_ns", "attributes", "status")
+
+    def __init__(
+        self,
+        tracer: "Tracer",
+        name: str,
+        kind: str,
+        context: SpanContext,
+        parent_id: Optional[str],
+        start_ns: int,
+        attributes: dict[str, Any],
+    ) -> None:
+        self.tracer = tracer
+        self.name = name
+        self.kind = kind
+        self.context = context
+        self.parent_id = parent_id
+        self.start_ns = start_ns
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes
+        self.status = "ok"
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def record_error(self, error: BaseException | str) -> None:
+        self.status = "error"
+        self.attributes["error.message"] = str(error)
+        if isinstance(error, BaseException):
+            self.attributes["error.type"] = type(error).__name__
+
+    def end(self, end_ns: Optional[int] = None) -> None:
+        if self.end_ns is None:
+            self.end_ns = end_ns or time.time_ns()
+            self.tracer.export(self)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "trace_id": self.context.trace_id,
+            "span_id": self.context.span_id,
+            "parent_span_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": self.end_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3) if self.end_ns else None,
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    """Stands in for a span when tracing is disabled."""
+
+    context = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def record_error(self, error: BaseException | str) -> None:
+        pass
+
+    def end(self, end_ns: Optional[int] = None) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+_current: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+
+
+class JsonlSpanExporter:
+    """Append finished spans to ``<directory>/<service>-<pid>.jsonl`` through one buffered handle.
+
+    One file per process keeps prefork children from interleaving writes; a
+    child opens its own file on its first span. The buffer is flushed when a
+    server or consumer span ends (a request or task is done), at least every
+    ``FLUSH_INTERVAL_SECONDS`` otherwise, before a fork and at exit.
+    """
+
+    BUFFER_SIZE = 64 * 1024
+    FLUSH_INTERVAL_SECONDS = 1.0
+    FLUSH_KINDS = frozenset({"server", "consumer"})
+
+    def __init__(self, directory: str | Path, service: str) -> None:
+        self.directory = Path(directory)
+        self.service = service
+        self._lock = threading.Lock()
+        self._handle: Optional[TextIO] = None
+        self._pid: Optional[int] = None
+        self._flushed_at = time.monotonic()
+        _install_exporter_hooks()
+        _exporters.add(self)
+
+    def path(self) -> Path:
+        return self.directory / f"{self.service}-{os.getpid()}.jsonl"
+
+    def export(self, span: Span) -> None:
+        record = span.to_dict()
+        record["resource"] = {"service.name": self.service, "process.pid": os.getpid()}
+        line = json.dumps(record, default=str) + "\n"
+        with self._lock:
+            if self._pid != os.getpid():
+                self.directory.mkdir(parents=True, exist_ok=True)
+                self._handle = self.path().open("a", encoding="utf-8", buffering=self.BUFFER_SIZE)
+                self._pid = os.getpid()
+            self._handle.write(line)
+            now = time.monotonic()
+            if span.kind in self.FLUSH_KINDS or now - self._flushed_at >= self.FLUSH_INTERVAL_SECONDS:
+                self._handle.flush()
+                self._flushed_at = now
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._handle is not None and self._pid == os.getpid():
+                self._handle.flush()
+                self._flushed_at = time.monotonic()
+
+    def _after_fork_in_child(self) -> None:
+        # The parent may have forked while another thread held the lock.
+        self._lock = threading.Lock()
+
+
+_exporters: "weakref.WeakSet[JsonlSpanExporter]" = weakref.WeakSet()
+_hooks_installed = False
+_hooks_lock = threading.Lock()
+
+
+def _flush_exporters() -> None:
+    for exporter in list(_exporters):
+        exporter.flush()
+
+
+def _reset_exporters_in_child() -> None:
+    for exporter in list(_exporters):
+        exporter._after_fork_in_child()
+
+
+def _install_exporter_hooks() -> None:
+    """Flush exporters at exit and around forks; installed with the first exporter."""
+    global _hooks_installed
+    with _hooks_lock:
+        if _hooks_installed:
+            return
+        atexit.register(_flush_exporters)
+        # Flushing before a fork means a child never inherits, and later rewrites, the parent's buffered spans.
+        os.register_at_fork(before=_flush_exporters, after_in_child=_reset_exporters_in_child)
+        _hooks_installed = True
+
+
+class Tracer:
+    def __init__(self, exporter: Optional[JsonlSpanExporter]) -> None:
+        self.exporter = exporter
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def start_span(
+        self,
+        name: str,
+        *,
+        kind: str = "internal",
+        parent: Optional[SpanContext] = None,
+        attributes: Optional[dict[str, Any]] = None,
+        start_ns: Optional[int] = None,
+    ) -> Span | _NoopSpan:
+        """Start a span under ``parent`` (default: the current span) without activating it."""
+        if not self.enabled:
+            return NOOP_SPAN
+        current = _current.get()
+        if parent is None and current is not None:
+            parent = current.context
+        attributes = dict(attributes or {})
+        if current is not None and "job.id" in current.attributes:
+            attributes.setdefault("job.id", current.attributes["job.id"])
+        context = SpanContext(parent.trace_id if parent else secrets.token_hex(16), secrets.token_hex(8))
+        return Span(
+            self, name, kind, context, parent.span_id if parent else None, start_ns or time.time_ns(), attributes
+        )
+
+    @contextmanager
+    def span(self, name: str, **options: Any) -> Iterator[Span | _NoopSpan]:
+        """Run the block inside a new current span, recording any exception on it."""
+        span = self.start_span(name, **options)
+        if span is NOOP_SPAN:
+            yield span
+            return
+        token = _current.set(span)
+        try:
+            yield span
+        except BaseException as exc:
+            span.record_error(exc)
+            raise
+        finally:
+            _current.reset(token)
+            span.end()
+
+    def export(self, span: Span) -> None:
+        if self.exporter is not None:
+            self.exporter.export(span)
+
+
+_listeners_installed = False
+_listeners_lock = threading.Lock()
+
+
+@lru_cache()
+def get_tracer() -> Tracer:
+    """Return this process's tracer, configured from ``TRACING_ENABLED``/``TRACE_*``."""
+    settings = get_settings()
+    if not settings.tracing_enabled:
+        return Tracer(None)
+    _install_db_listeners()
+    return Tracer(JsonlSpanExporter(settings.trace_dir, settings.trace_service_name))
+
+
+def span(name: str, **options: Any):
+    """``with span("name", attributes={...}):`` on the process tracer."""
+    return get_tracer().span(name, **options)
+
+
+def current_span() -> Span | _NoopSpan:
+    return _current.get() or NOOP_SPAN
+
+
+def activate(span: Span | _NoopSpan) -> Optional[contextvars.Token]:
+    """Make ``span`` current until :func:`deactivate` is called with the returned token."""
+    return _current.set(span) if isinstance(span, Span) else None
+
+
+def deactivate(token: Optional[contextvars.Token]) -> None:
+    if token is not None:
+        _current.reset(token)
+
+
+def traced(name: str) -> Callable[[F], F]:
+    """Decorator running the function inside an internal span named ``name``."""
+
+    def decorate(fn: F) -> F:
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            tracer = get_tracer()
+            if not tracer.enabled or _current.get() is None:
+                return fn(*args, **kwargs)
+            with tracer.span(name):
+                return fn(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
+
+
+def format_traceparent(context: SpanContext) -> str:
+    return f"00-{context.trace_id}-{context.span_id}-01"
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[SpanContext]:
+    """Parse a W3C ``traceparent`` header; malformed values are ignored."""
+    if not value:
+        return None
+    parts = value.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        int(parts[1], 16), int(parts[2], 16)
+    except ValueError:
+        return None
+    return SpanContext(parts[1], parts[2])
+
+
+def inject_task_headers(headers: Optional[dict]) -> None:
+    """Carry the current span to the worker that runs a task being published."""
+    current = _current.get()
+    if headers is None or current is None:
+        return
+    headers[TRACEPARENT_HEADER] = format_traceparent(current.context)
+    headers[ENQUEUED_AT_HEADER] = time.time_ns()
+
+
+def job_id_from_args(args: Any) -> Optional[str]:
+    """``videos.generate`` takes ``(job_id, pubmed_id)``; stages take a context dict."""
+    if not args:
+        return None
+    first = args[0]
+    if isinstance(first, dict):
+        return first.get("job_id")
+    return first if isinstance(first, str) else None
+
+
+# Open consumer spans and their context tokens, by Celery task id.
+_task_spans: dict[str, tuple[Span, Optional[contextvars.Token]]] = {}
+
+
+def task_started(task_id: str, task: Any, args: Any) -> None:
+    """Open ``queue.wait`` and ``task <name>`` spans when a worker picks a task up."""
+    tracer = get_tracer()
+    if not tracer.enabled:
+        return
+    request = task.request
+    parent = parse_traceparent(request.get(TRACEPARENT_HEADER))
+    attributes = {"celery.task_id": task_id, "celery.task": task.name}
+    job_id = job_id_from_args(args)
+    if job_id:
+        attributes["job.id"] = job_id
+    if request.delivery_info:
+        attributes["celery.queue"] = request.delivery_info.get("routing_key")
+    enqueued_at = request.get(ENQUEUED_AT_HEADER)
+    now = time.time_ns()
+    if parent is not None and enqueued_at:
+        wait = tracer.start_span("queue.wait", parent=parent, attributes=dict(attributes), start_ns=int(enqueued_at))
+        wait.end(max(now, int(enqueued_at)))
+    span = tracer.start_span(f"task {task.name}", kind="consumer", parent=parent, attributes=attributes, start_ns=now)
+    _task_spans[task_id] = (span, activate(span))
+
+
+def task_finished(task_id: str, state: Optional[str], retval: Any = None) -> None:
+    entry = _task_spans.pop(task_id, None)
+    if entry is None:
+        return
+    span, token = entry
+    span.set_attribute("celery.state", state or "UNKNOWN")
+    if state in {"FAILURE", "RETRY"}:
+        span.record_error(retval if isinstance(retval, BaseException) else str(retval))
+    try:
+        deactivate(token)
+    except ValueError:
+        # Token created in another context (e.g. a thread-pool hand-off); drop it.
+        _current.set(None)
+    span.end()
+
+
+def _install_db_listeners() -> None:
+    """Trace every statement run while a span is current; installed once tracing is on."""
+    global _listeners_installed
+    with _listeners_lock:
+        if _listeners_installed:
+            return
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
+        _listeners_installed = True
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if _current.get() is None or not get_tracer().enabled:
+        return
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+    db_span = get_tracer().start_span(
+        f"db {operation}",
+        kind="client",
+        attributes={"db.system": conn.dialect.name, "db.statement": statement[:MAX_STATEMENT_LENGTH]},
+    )
+    conn.info.setdefault("trace_spans", []).append(db_span)
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    spans = conn.info.get("trace_spans")
+    if spans:
+        db_span = spans.pop()
+        if cursor.rowcount is not None and cursor.rowcount >= 0:
+            db_span.set_attribute("db.rowcount", cursor.rowcount)
+        db_span.end()
+
+
+def _handle_error(context) -> None:
+    if context.connection is None:
+        return
+    spans = context.connection.info.get("trace_spans")
+    if spans:
+        db_span = spans.pop()
+        db_span.record_error(context.original_exception)
+        db_span.end()
+
+
+class TracingMiddleware:
+    """ASGI middleware opening a server span per HTTP request."""
+
+    def __init__(self, app: Callable) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        tracer = get_tracer()
+        if scope["type"] != "http" or not tracer.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        parent = parse_traceparent(headers.get(b"traceparent", b"").decode("latin-1"))
+        span = tracer.start_span(
+            f"HTTP {scope['method']}",
+            kind="server",
+            parent=parent,
+            attributes={"http.method": scope["method"], "http.target": scope["path"]},
+        )
+        token = _current.set(span)
+
+        async def send_wrapper(message) -> None:
+            if message["type"] == "http.response.start":
+                span.set_attribute("http.status_code", message["status"])
+                if message["status"] >= 500:
+                    span.status = "error"
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException as exc:
+            span.record_error(exc)
+            raise
+        finally:
+            route = route_template(scope)
+            span.name = f"HTTP {scope['method']} {route}"
+            span.set_attribute("http.route", route)
+            job_id = (scope.get("path_params") or {}).get("job_id")
+            if job_id:
+                span.attributes.setdefault("job.id", job_id)
+            _current.reset(token)
+            span.end()
@@ -0,0 +1,140 @@
+"""Load-test ``GET /api/videos/{job_id}`` with the sync and async database layers.
+
+Run from ``backend/``::
+
+    python -m benchmarks.bench_async_status --concurrency 200 --duration 10
+
+Each mode starts its own uvicorn process (``DB_ASYNC=0`` then ``DB_ASYNC=1``)
+against the same seeded database and is hammered with concurrent status polls.
+Pass ``--database-url`` to benchmark PostgreSQL instead of a SQLite file.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def seed(database_url: str, jobs: int) -> list[str]:
+    os.environ["DATABASE_URL"] = database_url
+    from app.database import SessionLocal, get_engine
+    from app.migrations import upgrade_database
+    from app.models import Job, Video
+
+    upgrade_database(database_url)
+    session = SessionLocal()
+    job_ids = []
+    for index in range(jobs):
+        job = Job(video=Video(pubmed_id=f"PMC{index}"), status="processing", progress=index % 100)
+        session.add(job)
+        session.flush()
+        job_ids.append(job.id)
+    session.commit()
+    session.close()
+    get_engine().dispose()
+    return job_ids
+
+
+@contextmanager
+def serve(database_url: str, async_mode: bool) -> Iterator[str]:
+    port = _free_port()
+    env = dict(os.environ, DATABASE_URL=database_url, DB_ASYNC="1" if async_mode else "0")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 20
+        while time.monotonic() < deadline:
+            try:
+                httpx.get(f"{base_url}/", timeout=0.5)
+                break
+            except httpx.HTTPError:
+                time.sleep(0.1)
+        yield base_url
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+async def hammer(base_url: str, job_ids: list[str], concurrency: int, duration: float) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    deadline = time.monotonic() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+
+        async def user() -> None:
+            nonlocal errors
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                try:
+                    response = await client.get(f"/api/videos/{random.choice(job_ids)}")
+                    response.raise_for_status()
+                    latencies.append(time.perf_counter() - started)
+                except httpx.HTTPError:
+                    errors += 1
+
+        await asyncio.gather(*(user() for _ in range(concurrency)))
+
+    latencies.sort()
+
+    def percentile(p: float) -> float:
+        return round(latencies[min(int(len(latencies) * p), len(latencies) - 1)] * 1000, 2)
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "req_per_second": round(len(latencies) / duration, 1),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 2),
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per mode")
+    parser.add_argument("--jobs", type=int, default=1000, help="jobs to seed")
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = args.database_url or f"sqlite:///{Path(tmp) / 'bench.db'}"
+        job_ids = seed(database_url, args.jobs)
+        results = {"concurrency": args.concurrency, "duration": args.duration}
+        for mode, async_mode in (("sync", False), ("async", True)):
+            with serve(database_url, async_mode) as base_url:
+                results[mode] = asyncio.run(hammer(base_url, job_ids, args.concurrency, args.duration))
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Compare per-ID ``/generate`` calls against one ``/generate/batch`` request.
+
+Run from ``backend/``::
+
+    python -m benchmarks.bench_batch_generate --count 1000
+
+Uses a throwaway SQLite file and Kombu's in-memory broker, so the numbers
+include the real ORM writes and Celery message publishing but no worker.
+Each path submits as its own API key, like a bulk partner, against in-process
+token buckets; the queue-depth check is disabled, since nothing drains the broker.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from uuid import uuid4
+
+
+def _configure_env(db_path: str) -> None:
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ["CELERY_BROKER_URL"] = "memory://"
+    os.environ["CELERY_RESULT_BACKEND"] = "cache+memory://"
+    os.environ["CELERY_TASK_ALWAYS_EAGER"] = "false"
+    os.environ["RATE_LIMIT_BACKEND"] = "local"
+    os.environ["ADMISSION_MAX_QUEUE_DEPTH"] = "0"
+
+
+def run(count: int) -> dict:
+    from fastapi.testclient import TestClient
+
+    from app.migrations import upgrade_database
+    from main import app
+
+    upgrade_database()
+
+    client = TestClient(app)
+    prefix = uuid4().int % 10**8
+
+    started = time.perf_counter()
+    for index in range(count):
+        response = client.post(
+            "/api/videos/generate",
+            json={"pubmed_id": f"PMC{prefix}1{index:06d}"},
+            headers={"X-API-Key": "bench-single"},
+        )
+        response.raise_for_status()
+    single_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    response = client.post(
+        "/api/videos/generate/batch",
+        json={"pubmed_ids": [f"PMC{prefix}2{index:06d}" for index in range(count)]},
+        headers={"X-API-Key": "bench-batch"},
+    )
+    response.raise_for_status()
+    batch_seconds = time.perf_counter() - started
+
+    return {
+        "count": count,
+        "single_seconds": round(single_seconds, 4),
+        "batch_seconds": round(batch_seconds, 4),
+        "single_ids_per_second": round(count / single_seconds, 1),
+        "batch_ids_per_second": round(count / batch_seconds, 1),
+        "speedup": round(single_seconds / batch_seconds, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=500, help="number of PubMed IDs per path")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _configure_env(os.path.join(tmp, "bench.db"))
+        print(json.dumps(run(args.count), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""Measure Celery message size, encode/decode throughput and result-backend growth.
+
+Run from ``backend/``::
+
+    python -m benchmarks.bench_celery_payloads --jobs 2000 [--redis-url redis://localhost:6379/15]
+
+Every job sends seven messages: ``videos.generate`` and one per stage down to
+``videos.finalize``, each stage message carrying the context dict and the rest
+of the chain. Each variant runs in a fresh interpreter with its own
+``CELERY_*`` settings and publishes those messages with the real task
+definitions through the in-memory broker, whose stored envelope is exactly the
+value the Redis transport LPUSHes. ``baseline`` is the previous configuration
+(JSON, no compression, full argument reprs, every return value stored for a day); ``compact`` is
+the default one. With ``--redis-url`` the envelopes and result records are also
+written to that (scratch) database to report the memory Redis actually used.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Optional
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+VARIANTS = {
+    "baseline": {
+        "CELERY_SERIALIZER": "json",
+        "CELERY_STAGE_COMPRESSION": "",
+        "CELERY_TASK_IGNORE_RESULT": "false",
+        "CELERY_RESULT_EXPIRES_SECONDS": "86400",
+        "CELERY_ARGSREPR_MAXSIZE": "1024",
+    },
+    "compact": {
+        "CELERY_SERIALIZER": "msgpack",
+        "CELERY_STAGE_COMPRESSION": "zlib",
+        "CELERY_TASK_IGNORE_RESULT": "true",
+        "CELERY_RESULT_EXPIRES_SECONDS": "3600",
+        "CELERY_ARGSREPR_MAXSIZE": "128",
+    },
+}
+
+
+def _job_messages(job_id: str, pubmed_id: str) -> list[tuple[str, Any]]:
+    """The signatures published over one job's life, with realistic stage contexts."""
+    from app.pipeline.artifacts import ArtifactStore
+    from app.pipeline.stages import STAGE_OUTPUT_NAMES, STAGES
+    from app.queue.config import get_settings
+    from app.queue.tasks import build_pipeline, generate_video_task
+
+    lane = get_settings().lane_queues[0] if get_settings().lane_queues else None
+    messages = [("generate", generate_video_task.signature(args=(job_id, pubmed_id), queue=lane))]
+    artifacts: dict[str, str] = {}
+    for stage in (*STAGES, "finalize"):
+        messages.append((stage, build_pipeline(job_id, pubmed_id, dict(artifacts))))
+        if stage != "finalize":
+            input_hash = uuid.uuid4().hex
+            artifacts[stage] = ArtifactStore.ref_for(pubmed_id, stage, input_hash, STAGE_OUTPUT_NAMES[stage])
+    return messages
+
+
+def _stored_results(job_id: str, pubmed_id: str) -> list[tuple[str, bytes]]:
+    """Result-backend records one job leaves behind: stages return the context, finalize a summary."""
+    from app.queue.celery_app import celery_app
+    from app.queue.tasks import build_pipeline
+
+    if celery_app.conf.task_ignore_result:
+        return []
+    backend = celery_app.backend
+    ctx = build_pipeline(job_id, pubmed_id).tasks[0].args[0]
+    values = [ctx] * 5 + [{"job_id": job_id, "status": "completed"}]
+    records = []
+    for value in values:
+        task_id = str(uuid.uuid4())
+        meta = backend._get_result_meta(value, "SUCCESS", None, None)
+        meta["task_id"] = task_id
+        records.append((f"celery-task-meta-{task_id}", backend.encode(meta)))
+    return records
+
+
+def probe(jobs: int, redis_url: Optional[str]) -> dict[str, Any]:
+    """Measure the current interpreter's configuration (its settings come from the environment)."""
+    from queue import Empty
+
+    from kombu.serialization import prepare_accept_content
+    from kombu.utils.json import dumps
+
+    from app.queue.celery_app import celery_app
+    from app.queue.config import get_settings
+
+    plan = []
+    for _ in range(jobs):
+        job_id = str(uuid.uuid4())
+        plan.extend(_job_messages(job_id, f"PMC{uuid.uuid4().int % 10**8}"))
+
+    with celery_app.connection_for_write() as connection:
+        channel = connection.default_channel
+        started = time.perf_counter()
+        with celery_app.producer_or_acquire() as producer:
+            for _, signature in plan:
+                signature.apply_async(producer=producer)
+        published = time.perf_counter() - started
+
+        stored = []
+        for queue in get_settings().all_queues:
+            while True:
+                try:
+                    stored.append(channel._get(queue))
+                except Empty:
+                    break
+
+        accept = prepare_accept_content(celery_app.conf.accept_content)
+        started = time.perf_counter()
+        for payload in stored:
+            channel.Message(payload, channel=channel, accept=accept).decode()
+        decoded = time.perf_counter() - started
+        envelopes = [(payload["headers"]["task"], dumps(payload)) for payload in stored]
+
+    by_task: dict[str, list[int]] = {}
+    for task, body in envelopes:
+        by_task.setdefault(task, []).append(len(body.encode()))
+    results = [record for _ in range(jobs) for record in _stored_results(str(uuid.uuid4()), "PMC12345678")]
+    report = {
+        "settings": {name: os.environ.get(name) for name in VARIANTS["compact"]},
+        "messages": len(envelopes),
+        "publish_per_second": round(len(plan) / published),
+        "decode_per_second": round(len(stored) / decoded),
+        "bytes_per_message": round(sum(sum(sizes) for sizes in by_task.values()) / len(envelopes)),
+        "bytes_by_task": {task: round(sum(sizes) / len(sizes)) for task, sizes in sorted(by_task.items())},
+        "result_keys_per_job": len(results) // jobs,
+        "result_bytes_per_job": sum(len(key) + len(value) for key, value in results) // jobs,
+        "result_ttl_seconds": int(get_settings().celery_result_expires_seconds),
+    }
+    if redis_url:
+        report["redis"] = _redis_memory(redis_url, [body for _, body in envelopes], results)
+    return report
+
+
+def _redis_memory(redis_url: str, envelopes: list[str], results: list[tuple[str, bytes]]) -> dict[str, int]:
+    """Bytes Redis used for the queued envelopes and the result records, measured and then deleted."""
+    import redis
+
+    client = redis.Redis.from_url(redis_url)
+    key = f"bench:celery-payloads:{uuid.uuid4().hex}"
+
+    def used() -> int:
+        return int(client.info("memory")["used_memory"])
+
+    before = used()
+    for start in range(0, len(envelopes), 1000):
+        client.lpush(key, *envelopes[start : start + 1000])
+    queued = used() - before
+    client.delete(key)
+
+    before = used()
+    with client.pipeline(transaction=False) as pipe:
+        for result_key, value in results:
+            pipe.set(f"bench:{result_key}", value)
+        pipe.execute()
+    stored = used() - before
+    for start in range(0, len(results), 1000):
+        client.delete(*(f"bench:{result_key}" for result_key, _ in results[start : start + 1000]))
+    return {"queue_bytes": queued, "result_bytes": stored}
+
+
+def measure(variant: str, jobs: int, redis_url: Optional[str]) -> dict[str, Any]:
+    """Run :func:`probe` in a fresh interpreter configured for ``variant``."""
+    env = dict(
+        os.environ,
+        CELERY_BROKER_URL="memory://",
+        CELERY_RESULT_BACKEND="cache+memory://",
+        CELERY_TASK_ALWAYS_EAGER="false",
+        PYTHONDONTWRITEBYTECODE="1",
+        **VARIANTS[variant],
+    )
+    command = [sys.executable, "-m", "benchmarks.bench_celery_payloads", "--probe", "--jobs", str(jobs)]
+    if redis_url:
+        command += ["--redis-url", redis_url]
+    result = subprocess.run(command, cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def _change(before: float, after: float) -> str:
+    return f"{(after - before) / before * 100:+.1f}%" if before else "n/a"
+
+
+def run(jobs: int, redis_url: Optional[str]) -> dict[str, Any]:
+    reports = {variant: measure(variant, jobs, redis_url) for variant in VARIANTS}
+    baseline, compact = reports["baseline"], reports["compact"]
+    change = {
+        metric: _change(baseline[metric], compact[metric])
+        for metric in ("bytes_per_message", "publish_per_second", "decode_per_second", "result_bytes_per_job")
+    }
+    if redis_url:
+        for metric in ("queue_bytes", "result_bytes"):
+            change[f"redis_{metric}"] = _change(baseline["redis"][metric], compact["redis"][metric])
+    return {"jobs": jobs, "variants": reports, "change": change}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=1000, help="jobs whose messages are published per variant")
+    parser.add_argument("--redis-url", help="scratch Redis database to measure memory in (keys are deleted)")
+    parser.add_argument("--probe", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.probe:
+        print(json.dumps(probe(args.jobs, args.redis_url)))
+        return
+    print(json.dumps(run(args.jobs, args.redis_url), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""Measure the hot listing/lookup queries with and without the schema indexes.
+
+Run from ``backend/``::
+
+    python -m benchmarks.bench_indexes --rows 1000000
+
+Seeds a throwaway SQLite file (or ``--database-url``) migrated to head, then
+for each query prints the query plan and median latency first with the
+secondary indexes dropped and again after recreating them.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy import Index, text
+from sqlalchemy.engine import Engine
+
+STATUSES = ("queued", "processing", "completed", "completed", "completed", "failed")
+
+QUERIES: dict[str, tuple[str, dict[str, Any]]] = {
+    "recent_videos": (
+        "SELECT id, pubmed_id, status FROM videos ORDER BY created_at DESC, id DESC LIMIT 50",
+        {},
+    ),
+    "videos_by_pubmed_id": (
+        "SELECT id, status FROM videos WHERE pubmed_id = :pubmed_id",
+        {"pubmed_id": "PMC424242"},
+    ),
+    "videos_by_status_recent": (
+        "SELECT id FROM videos WHERE status = :status ORDER BY created_at DESC LIMIT 50",
+        {"status": "failed"},
+    ),
+    "user_history": (
+        "SELECT id, pubmed_id FROM videos WHERE user_id = :user_id "
+        "ORDER BY created_at DESC, id DESC LIMIT 50",
+        {"user_id": 7},
+    ),
+    "stale_jobs": (
+        "SELECT id FROM jobs WHERE status = :status AND created_at < :cutoff LIMIT 500",
+        {"status": "processing", "cutoff": "2020-01-01 00:10:00"},
+    ),
+    "job_by_video_id": (
+        "SELECT id, status, progress FROM jobs WHERE video_id = :video_id",
+        {"video_id": "v-00424242"},
+    ),
+    "job_by_celery_task_id": (
+        "SELECT id FROM jobs WHERE celery_task_id = :task_id",
+        {"task_id": "t-00424242"},
+    ),
+}
+
+
+def _secondary_indexes() -> list[Index]:
+    from app.models import Job, Video
+
+    return [index for table in (Video.__table__, Job.__table__) for index in table.indexes]
+
+
+def seed(engine: Engine, rows: int, users: int = 1000, batch: int = 20_000) -> None:
+    started_at = datetime(2020, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(
+            text("INSERT INTO users (id, email, created_at) VALUES (:id, :email, :created_at)"),
+            [{"id": u, "email": f"user{u}@example.com", "created_at": started_at} for u in range(users)],
+        )
+    for offset in range(0, rows, batch):
+        videos, jobs = [], []
+        for n in range(offset, min(offset + batch, rows)):
+            created_at = started_at + timedelta(seconds=n)
+            status = STATUSES[n % len(STATUSES)]
+            videos.append(
+                {
+                    "id": f"v-{n:08d}",
+                    "user_id": n % users,
+                    "pubmed_id": f"PMC{n}",
+                    "status": status,
+                    "created_at": created_at,
+                    "updated_at": created_at,
+                }
+            )
+            jobs.append(
+                {
+                    "id": f"j-{n:08d}",
+                    "video_id": f"v-{n:08d}",
+                    "status": status,
+                    "progress": 100 if status == "completed" else 0,
+                    "celery_task_id": f"t-{n:08d}",
+                    "attempts": 1,
+                    "created_at": created_at,
+                }
+            )
+        with engine.begin() as conn:
+            conn.execute(
+                text(
+                    "INSERT INTO videos (id, user_id, pubmed_id, status, created_at, updated_at) "
+                    "VALUES (:id, :user_id, :pubmed_id, :status, :created_at, :updated_at)"
+                ),
+                videos,
+            )
+            conn.execute(
+                text(
+                    "INSERT INTO jobs (id, video_id, status, progress, celery_task_id, attempts, created_at) "
+                    "VALUES (:id, :video_id, :status, :progress, :celery_task_id, :attempts, :created_at)"
+                ),
+                jobs,
+            )
+
+
+def _plan(conn, sql: str, params: dict[str, Any]) -> list[str]:
+    if conn.dialect.name == "sqlite":
+        return [row[-1] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"), params)]
+    return [row[0] for row in conn.execute(text(f"EXPLAIN {sql}"), params)]
+
+
+def measure(engine: Engine, repeat: int) -> dict[str, dict[str, Any]]:
+    results: dict[str, dict[str, Any]] = {}
+    with engine.connect() as conn:
+        for name, (sql, params) in QUERIES.items():
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                conn.execute(text(sql), params).fetchall()
+                timings.append(time.perf_counter() - started)
+            results[name] = {
+                "median_ms": round(statistics.median(timings) * 1000, 3),
+                "plan": _plan(conn, sql, params),
+            }
+    return results
+
+
+def run(database_url: str, rows: int, repeat: int) -> dict[str, Any]:
+    from app.database import create_db_engine
+    from app.migrations import upgrade_database
+
+    upgrade_database(database_url)
+    engine = create_db_engine(database_url)
+    indexes = _secondary_indexes()
+
+    started = time.perf_counter()
+    seed(engine, rows)
+    seed_seconds = time.perf_counter() - started
+
+    with engine.begin() as conn:
+        for index in indexes:
+            index.drop(conn)
+        if conn.dialect.name == "sqlite":
+            conn.execute(text("ANALYZE"))
+    without = measure(engine, repeat)
+
+    with engine.begin() as conn:
+        for index in indexes:
+            index.create(conn)
+        if conn.dialect.name == "sqlite":
+            conn.execute(text("ANALYZE"))
+    with_indexes = measure(engine, repeat)
+    engine.dispose()
+
+    return {
+        "rows": rows,
+        "seed_seconds": round(seed_seconds, 2),
+        "queries": {
+            name: {
+                "without_indexes": without[name],
+                "with_indexes": with_indexes[name],
+                "speedup": round(
+                    without[name]["median_ms"] / max(with_indexes[name]["median_ms"], 0.001), 1
+                ),
+            }
+            for name in QUERIES
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000, help="videos (and jobs) to seed")
+    parser.add_argument("--repeat", type=int, default=5, help="timed executions per query")
+    parser.add_argument("--database-url", help="empty database to use instead of a temporary SQLite file")
+    args = parser.parse_args()
+
+    if args.database_url:
+        print(json.dumps(run(args.database_url, args.rows, args.repeat), indent=2))
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        print(json.dumps(run(url, args.rows, args.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Compare OFFSET paging with the keyset-paginated video listing at increasing depth.
+
+Run from ``backend/``::
+
+    python -m benchmarks.bench_list_videos --rows 1000000
+
+Seeds a throwaway SQLite file with the same data as ``bench_indexes`` and times
+fetching one page at each depth, both with ``OFFSET`` and with the cursor that
+``crud.list_videos`` would have returned for the previous page.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+from typing import Any
+
+from sqlalchemy.orm import Session
+
+from benchmarks.bench_indexes import seed
+
+
+def _median_ms(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return round(statistics.median(timings) * 1000, 3)
+
+
+def run(database_url: str, rows: int, page_size: int, repeat: int) -> dict[str, Any]:
+    from app import crud
+    from app.database import create_db_engine
+    from app.migrations import upgrade_database
+
+    upgrade_database(database_url)
+    engine = create_db_engine(database_url)
+    seed(engine, rows)
+
+    depths = [depth for depth in (0, 10, 100, 1_000, 10_000) if depth * page_size < rows]
+    results = []
+    with Session(engine) as db:
+        for depth in depths:
+            offset = depth * page_size
+            offset_query = crud.video_page_query(page_size).offset(offset)
+            if depth:
+                previous = db.execute(crud.video_page_query(1).offset(offset - 1)).one()
+                cursor = crud.VideoCursor(previous.created_at, previous.id)
+            else:
+                cursor = None
+
+            offset_ms = _median_ms(lambda: db.execute(offset_query).all(), repeat)
+            keyset_ms = _median_ms(lambda: crud.list_videos(db, page_size, after=cursor), repeat)
+            results.append({"page": depth, "offset_ms": offset_ms, "keyset_ms": keyset_ms})
+    engine.dispose()
+
+    return {"rows": rows, "page_size": page_size, "pages": results}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000, help="videos (and jobs) to seed")
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5, help="timed executions per page")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        print(json.dumps(run(url, args.rows, args.page_size, args.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,340 @@
+"""Mixed-traffic load test of the API and queue path, with regression checks.
+
+Run from ``backend/``::
+
+    python -m benchmarks.bench_load --concurrency 50 --duration 20 --output load.json
+    python -m benchmarks.bench_load --baseline load.json      # exit 1 on regression
+
+Starts the app under uvicorn against a scratch SQLite database seeded with
+completed videos, then drives ``generate`` / ``status`` / ``download`` traffic
+in the ``--mix`` ratio from ``--concurrency`` clients. By default Celery runs
+eagerly inside the API process with in-process progress and rate limiting and
+the fake PubMed transport, so no Redis or network is needed; pass
+``--broker-url`` to dispatch to a real local worker instead.
+
+Per endpoint it reports req/s, p50/p95/p99 latency and database queries per
+request (read from the API's own ``/metrics`` histograms). ``--baseline``
+compares against an earlier ``--output`` file and flags endpoints whose p95
+or query count grew, or whose throughput fell, by more than ``--tolerance``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+import httpx
+from prometheus_client.parser import text_string_to_metric_families
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Endpoint name -> route template used as the ``route`` label in /metrics.
+ROUTES = {
+    "generate": "/api/videos/generate",
+    "status": "/api/videos/{job_id}",
+    "download": "/api/videos/{job_id}/download",
+}
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_mix(value: str) -> dict[str, int]:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in ROUTES:
+            raise argparse.ArgumentTypeError(f"unknown endpoint {name!r} (choose from {', '.join(ROUTES)})")
+        mix[name] = int(weight or 1)
+    return mix
+
+
+def bench_env(tmp: Path, broker_url: Optional[str]) -> dict[str, str]:
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{tmp / 'bench.db'}",
+        ARTIFACT_DIR=str(tmp / "artifacts"),
+        STORAGE_BACKEND="local",
+        STORAGE_LOCAL_DIR=str(tmp / "media"),
+        PUBMED_TRANSPORT="fake",
+        PUBMED_CACHE_DIR=str(tmp / "pubmed"),
+        PUBMED_REQUESTS_PER_SECOND="1000",
+        PROGRESS_BUS="local",
+        RATE_LIMIT_BACKEND="local",
+        STATUS_CACHE_BACKEND="local",
+        RATE_LIMIT_USER_PER_MINUTE="100000000",
+        RATE_LIMIT_USER_BURST="100000000",
+        ADMISSION_MAX_QUEUE_DEPTH="0",
+        METRICS_ENABLED="true",
+        WORKER_METRICS_PORT="0",
+        REAPER_INTERVAL_SECONDS="0",
+    )
+    if broker_url:
+        env.update(CELERY_BROKER_URL=broker_url, CELERY_RESULT_BACKEND=broker_url, CELERY_TASK_ALWAYS_EAGER="false")
+    else:
+        env.update(CELERY_TASK_ALWAYS_EAGER="true", CELERY_TASK_EAGER_PROPAGATES="false")
+    return env
+
+
+def seed(env: dict[str, str], videos: int, video_bytes: int) -> list[str]:
+    """Create ``videos`` completed jobs whose files exist in local storage; returns their job IDs."""
+    os.environ.update(env)
+    from app.database import SessionLocal, get_engine
+    from app.migrations import upgrade_database
+    from app.models import Job, Video
+
+    upgrade_database(env["DATABASE_URL"])
+    media = Path(env["STORAGE_LOCAL_DIR"]) / "videos"
+    media.mkdir(parents=True, exist_ok=True)
+    payload = os.urandom(video_bytes)
+    session = SessionLocal()
+    job_ids = []
+    for index in range(videos):
+        video = Video(pubmed_id=f"PMC9{index:06d}", status="completed")
+        job = Job(video=video, status="completed", progress=100)
+        session.add(job)
+        session.flush()
+        video.storage_key = f"videos/{video.id}.mp4"
+        video.video_url = f"local://{video.storage_key}"
+        (media / f"{video.id}.mp4").write_bytes(payload)
+        job_ids.append(job.id)
+    session.commit()
+    session.close()
+    get_engine().dispose()
+    return job_ids
+
+
+def _wait_until_up(base_url: str, timeout: float = 20) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"{base_url}/api/health/live", timeout=0.5).raise_for_status()
+            return
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    raise RuntimeError(f"API at {base_url} did not start")
+
+
+@contextmanager
+def serve(env: dict[str, str], worker: bool) -> Iterator[str]:
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    with ExitStack() as stack:
+        processes = [
+            subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+                cwd=BACKEND_DIR,
+                env=env,
+            )
+        ]
+        if worker:
+            from app.queue.config import get_settings
+
+            processes.append(
+                subprocess.Popen(
+                    [sys.executable, "-m", "celery", "-A", "app.queue.celery_app", "worker", "--loglevel=warning",
+                     "-Q", ",".join(get_settings().all_queues)],
+                    cwd=BACKEND_DIR,
+                    env=env,
+                )
+            )
+        for process in processes:
+            stack.callback(process.wait, timeout=30)
+            stack.callback(process.terminate)
+        _wait_until_up(base_url)
+        yield base_url
+
+
+def scrape_db_queries(base_url: str) -> dict[str, tuple[float, float]]:
+    """``route -> (request count, query total)`` from the API's query-count histogram."""
+    totals: dict[str, list[float]] = {}
+    text = httpx.get(f"{base_url}/metrics", timeout=10).text
+    for family in text_string_to_metric_families(text):
+        if family.name != "hidden_hill_http_request_db_queries":
+            continue
+        for sample in family.samples:
+            entry = totals.setdefault(sample.labels.get("route", ""), [0.0, 0.0])
+            if sample.name.endswith("_count"):
+                entry[0] += sample.value
+            elif sample.name.endswith("_sum"):
+                entry[1] += sample.value
+    return {route: (count, total) for route, (count, total) in totals.items()}
+
+
+def _summarize(latencies: list[float], errors: int, duration: float) -> dict:
+    latencies = sorted(latencies)
+
+    def percentile(p: float) -> Optional[float]:
+        if not latencies:
+            return None
+        return round(latencies[min(int(len(latencies) * p), len(latencies) - 1)] * 1000, 2)
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "req_per_second": round(len(latencies) / duration, 1),
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+    }
+
+
+async def drive(
+    base_url: str,
+    job_ids: list[str],
+    mix: dict[str, int],
+    concurrency: int,
+    duration: float,
+    papers: int,
+) -> dict[str, dict]:
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    latencies: dict[str, list[float]] = {name: [] for name in names}
+    errors = dict.fromkeys(names, 0)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    rng = random.Random(0)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+
+        async def request(name: str) -> httpx.Response:
+            if name == "generate":
+                # A bounded pool of papers: early requests generate, later ones hit the cache.
+                body = {"pubmed_id": f"PMID{rng.randrange(papers)}"}
+                return await client.post("/api/videos/generate", json=body)
+            job_id = rng.choice(job_ids)
+            if name == "status":
+                return await client.get(f"/api/videos/{job_id}")
+            return await client.get(f"/api/videos/{job_id}/download")
+
+        async def user(deadline: float) -> None:
+            while time.monotonic() < deadline:
+                name = rng.choices(names, weights)[0]
+                started = time.perf_counter()
+                try:
+                    response = await request(name)
+                    if response.status_code >= 400:
+                        errors[name] += 1
+                        continue
+                except httpx.HTTPError:
+                    errors[name] += 1
+                    continue
+                latencies[name].append(time.perf_counter() - started)
+
+        deadline = time.monotonic() + duration
+        await asyncio.gather(*(user(deadline) for _ in range(concurrency)))
+
+    results = {name: _summarize(latencies[name], errors[name], duration) for name in names}
+    results["total"] = _summarize(
+        [value for values in latencies.values() for value in values], sum(errors.values()), duration
+    )
+    return results
+
+
+def run(args: argparse.Namespace) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        env = bench_env(Path(tmp), args.broker_url)
+        job_ids = seed(env, args.videos, args.video_bytes)
+        with serve(env, worker=bool(args.broker_url)) as base_url:
+            if args.warmup:
+                asyncio.run(drive(base_url, job_ids, args.mix, args.concurrency, args.warmup, args.papers))
+            before = scrape_db_queries(base_url)
+            endpoints = asyncio.run(drive(base_url, job_ids, args.mix, args.concurrency, args.duration, args.papers))
+            after = scrape_db_queries(base_url)
+
+    for name, route in ROUTES.items():
+        if name not in endpoints:
+            continue
+        count = after.get(route, (0, 0))[0] - before.get(route, (0, 0))[0]
+        queries = after.get(route, (0, 0))[1] - before.get(route, (0, 0))[1]
+        endpoints[name]["db_queries_per_request"] = round(queries / count, 2) if count else None
+
+    return {
+        "commit": _git_commit(),
+        "config": {
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "mix": args.mix,
+            "videos": args.videos,
+            "video_bytes": args.video_bytes,
+            "papers": args.papers,
+            "celery": "worker" if args.broker_url else "eager",
+        },
+        "endpoints": endpoints,
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Human-readable regressions of ``current`` against ``baseline``; empty when within tolerance."""
+    regressions = []
+    if baseline.get("config") != current["config"]:
+        regressions.append(f"config differs from the baseline: {baseline.get('config')}")
+    for name, now in current["endpoints"].items():
+        before = baseline.get("endpoints", {}).get(name)
+        if not before:
+            continue
+        if before.get("p95_ms") and now.get("p95_ms") and now["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {before['p95_ms']}ms -> {now['p95_ms']}ms")
+        if before.get("req_per_second") and now["req_per_second"] < before["req_per_second"] * (1 - tolerance):
+            regressions.append(f"{name}: {before['req_per_second']} -> {now['req_per_second']} req/s")
+        queries_before = before.get("db_queries_per_request")
+        queries_now = now.get("db_queries_per_request")
+        if (
+            queries_before is not None
+            and queries_now is not None
+            and queries_now > max(queries_before * (1 + tolerance), queries_before + 0.5)
+        ):
+            regressions.append(f"{name}: {queries_before} -> {queries_now} DB queries/request")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds of measured traffic")
+    parser.add_argument("--warmup", type=float, default=2.0, help="seconds of unmeasured traffic first")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("generate=1,status=8,download=1"))
+    parser.add_argument("--videos", type=int, default=500, help="completed videos to seed")
+    parser.add_argument("--video-bytes", type=int, default=256 * 1024)
+    parser.add_argument("--papers", type=int, default=200, help="distinct papers generate requests draw from")
+    parser.add_argument("--broker-url", default=None, help="dispatch to a real worker via this broker")
+    parser.add_argument("--output", type=Path, default=None, help="also write the JSON results here")
+    parser.add_argument("--baseline", type=Path, default=None, help="earlier --output file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative change before failing")
+    args = parser.parse_args()
+
+    results = run(args)
+    if args.baseline:
+        regressions = compare(results, json.loads(args.baseline.read_text()), args.tolerance)
+        results["baseline"] = {"file": str(args.baseline), "regressions": regressions}
+    print(json.dumps(results, indent=2))
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2) + "\n")
+    if args.baseline and results["baseline"]["regressions"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Time-to-start per priority class while a bulk backlog drains.
+
+Run from ``backend/`` against a scratch Redis database (the queue is purged)::
+
+    python -m benchmarks.bench_priority --broker-url redis://localhost:6379/15
+
+Enqueues ``--bulk`` low-priority probe tasks, starts one in-process worker with
+the app's Celery settings (priority lists, prefetch, late acks), then submits
+high and normal probes while the backlog drains. Each mode reports p50/p95
+time from enqueue to task start per class; ``fifo`` sends everything at the
+default priority as the baseline. Requires Redis: the in-memory transport has
+no priority support.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from typing import Any
+
+QUEUE = "hidden-hill.bench-priority"
+
+_started: dict[str, float] = {}
+
+
+def _configure_env(broker_url: str, db_path: str) -> None:
+    os.environ["CELERY_BROKER_URL"] = broker_url
+    os.environ["CELERY_RESULT_BACKEND"] = "cache+memory://"
+    os.environ["CELERY_TASK_ALWAYS_EAGER"] = "false"
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ["WORKER_METRICS_PORT"] = "0"
+
+
+def _percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def _summarize(enqueued: dict[str, tuple[str, float]]) -> dict[str, Any]:
+    waits: dict[str, list[float]] = {}
+    for label, (priority_class, sent_at) in enqueued.items():
+        if label in _started:
+            waits.setdefault(priority_class, []).append(_started[label] - sent_at)
+    return {
+        priority_class: {
+            "count": len(values),
+            "p50_ms": round(_percentile(values, 0.50) * 1000, 1),
+            "p95_ms": round(_percentile(values, 0.95) * 1000, 1),
+            "max_ms": round(max(values) * 1000, 1),
+        }
+        for priority_class, values in sorted(waits.items())
+    }
+
+
+def run_mode(fifo: bool, bulk: int, interactive: int, work_ms: float, timeout: float) -> dict[str, Any]:
+    from celery.contrib.testing.worker import start_worker
+
+    from app.queue.celery_app import celery_app
+    from app.queue.config import DEFAULT_PRIORITY, PRIORITY_LEVELS
+
+    probe = celery_app.tasks["bench.priority_probe"]
+    with celery_app.connection_for_write() as conn:
+        conn.default_channel.queue_purge(QUEUE)
+    _started.clear()
+    enqueued: dict[str, tuple[str, float]] = {}
+
+    def send(label: str, priority_class: str) -> None:
+        level = PRIORITY_LEVELS[DEFAULT_PRIORITY if fifo else priority_class]
+        enqueued[label] = (priority_class, time.time())
+        probe.apply_async(args=(label, work_ms), queue=QUEUE, priority=level)
+
+    for index in range(bulk):
+        send(f"low-{index}", "low")
+
+    with start_worker(celery_app, pool="solo", queues=[QUEUE], perform_ping_check=False, loglevel="WARNING"):
+        for index in range(interactive):
+            send(f"high-{index}", "high")
+            send(f"normal-{index}", "normal")
+            time.sleep(work_ms * 3 / 1000)
+        deadline = time.monotonic() + timeout
+        while len(_started) < len(enqueued) and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+    return _summarize(enqueued)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--broker-url", default="redis://localhost:6379/15")
+    parser.add_argument("--bulk", type=int, default=300, help="low-priority backlog enqueued up front")
+    parser.add_argument("--interactive", type=int, default=30, help="high and normal probes each")
+    parser.add_argument("--work-ms", type=float, default=10.0, help="simulated run time per task")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _configure_env(args.broker_url, os.path.join(tmp, "bench.db"))
+        from app.queue.celery_app import celery_app
+
+        @celery_app.task(name="bench.priority_probe")
+        def priority_probe(label: str, work_ms: float) -> None:
+            _started[label] = time.time()
+            time.sleep(work_ms / 1000)
+
+        results = {
+            mode: run_mode(mode == "fifo", args.bulk, args.interactive, args.work_ms, args.timeout)
+            for mode in ("priority", "fifo")
+        }
+        print(json.dumps({"bulk": args.bulk, "interactive": args.interactive, **results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
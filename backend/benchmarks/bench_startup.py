@@ -0,0 +1,119 @@
+"""Measure API cold start: importing ``main`` and serving the first request.
+
+Run from ``backend/``::
+
+    python -m benchmarks.bench_startup --runs 5 --max-import-seconds 3
+
+Each run starts a fresh interpreter, imports ``main`` and sends one request
+straight to the ASGI app (no server, no HTTP client). Reports the median
+timings plus the heavy modules that were loaded by the import alone; the API
+should load none of them, since Celery, Redis, the PubMed HTTP client and the
+database engine are all created on first use. ``--max-import-seconds`` turns
+the run into a check that exits 1 when the median import is slower.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Worker-side or lazily created dependencies that importing the API must not pull in.
+LAZY_MODULES = ("celery", "kombu", "redis", "httpx", "boto3", "app.queue.celery_app", "app.queue.tasks")
+
+PROBE = r"""
+import asyncio, json, sys, time
+
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+
+async def first_request(path):
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"",
+        "root_path": "", "headers": [], "client": ("127.0.0.1", 1), "server": ("testserver", 80),
+    }
+    await main.app(scope, receive, send)
+    return sent[0]["status"]
+
+status = asyncio.run(first_request(sys.argv[1]))
+served = time.perf_counter()
+
+import app.database
+
+print(json.dumps({
+    "import_seconds": imported - started,
+    "first_request_seconds": served - imported,
+    "status": status,
+    "loaded": [name for name in json.loads(sys.argv[2]) if name in sys.modules],
+    "engine_created": app.database._engine is not None,
+}))
+"""
+
+
+def measure(path: str = "/api/health/live") -> dict[str, Any]:
+    """One cold start in a fresh interpreter, against a throwaway SQLite database."""
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(
+            os.environ,
+            DATABASE_URL=f"sqlite:///{Path(tmp) / 'startup.db'}",
+            METRICS_ENABLED="true",
+            PYTHONDONTWRITEBYTECODE="1",
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", PROBE, path, json.dumps(LAZY_MODULES)],
+            cwd=BACKEND_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def run(runs: int, path: str) -> dict[str, Any]:
+    samples = [measure(path) for _ in range(runs)]
+    return {
+        "runs": runs,
+        "path": path,
+        "import_ms": round(statistics.median(s["import_seconds"] for s in samples) * 1000, 1),
+        "first_request_ms": round(statistics.median(s["first_request_seconds"] for s in samples) * 1000, 1),
+        "status": samples[-1]["status"],
+        "loaded": samples[-1]["loaded"],
+        "engine_created": samples[-1]["engine_created"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters to start")
+    parser.add_argument("--path", default="/api/health/live", help="path of the first request")
+    parser.add_argument("--max-import-seconds", type=float, default=None, help="fail above this median import time")
+    args = parser.parse_args()
+
+    report = run(args.runs, args.path)
+    print(json.dumps(report, indent=2))
+    if args.max_import_seconds is not None and report["import_ms"] > args.max_import_seconds * 1000:
+        print(f"import took {report['import_ms']} ms, budget {args.max_import_seconds * 1000:.0f} ms", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
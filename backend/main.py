@@ -1,22 +1,82 @@
-from fastapi import FastAPI
+"""ASGI entry point: ``uvicorn main:app`` (or ``uvicorn --factory main:create_app``).
 
-from app.database import Base, engine
+Importing this module builds the FastAPI app and nothing else: the database
+engine, Redis pool and Celery app are created on first use, and the resources
+that need a shutdown hook are owned by :func:`lifespan`.
+"""
+
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from fastapi import FastAPI, Response
+
+from app.admission import check_batch_limits
+from app.database import async_db_enabled, dispose_engines
+from app.health import get_health_monitor
+from app.queue.config import env_bool, get_settings, load_environment
+from app.redis_client import close_redis
 from app.routers import health, videos
 
-# Ensure tables exist during early development; migrations will replace this later.
-Base.metadata.create_all(bind=engine)
 
-app = FastAPI(
-    title="Hidden Hill API",
-    version="0.1.0",
-    description="Backend service for converting PubMed papers into shareable videos.",
-)
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    """Migrate when DB_AUTO_MIGRATE is set (local development), run the health monitor, and
+    close database and Redis pools on shutdown."""
+    if env_bool("DB_AUTO_MIGRATE"):
+        from app.migrations import upgrade_database
 
-app.include_router(health.router)
-app.include_router(videos.router)
+        upgrade_database()
+    monitor = get_health_monitor()
+    monitor.start()
+    try:
+        yield
+    finally:
+        monitor.stop()
+        await dispose_engines()
+        close_redis()
 
 
-@app.get("/", tags=["root"])
 def read_root() -> dict[str, str]:
     """Simple sanity endpoint for local development."""
     return {"message": "Hidden Hill API is running"}
+
+
+def create_app() -> FastAPI:
+    """Build the API from the current environment."""
+    load_environment()
+    check_batch_limits()
+    app = FastAPI(
+        title="Hidden Hill API",
+        version="0.1.0",
+        description="Backend service for converting PubMed papers into shareable videos.",
+        lifespan=lifespan,
+    )
+
+    if get_settings().metrics_enabled:
+        from app.metrics import CONTENT_TYPE_LATEST, MetricsMiddleware, render_latest
+
+        app.add_middleware(MetricsMiddleware)
+
+        @app.get("/metrics", include_in_schema=False)
+        def metrics() -> Response:
+            """Prometheus scrape endpoint."""
+            return Response(render_latest(), media_type=CONTENT_TYPE_LATEST)
+
+    if get_settings().tracing_enabled:
+        from app.tracing import TracingMiddleware
+
+        # Added last so its server span encloses the metrics middleware and every route.
+        app.add_middleware(TracingMiddleware)
+
+    app.include_router(health.router)
+    if async_db_enabled():
+        from app.routers import videos_async
+
+        # Registered first so its routes take precedence over the sync equivalents.
+        app.include_router(videos_async.router)
+    app.include_router(videos.router)
+    app.add_api_route("/", read_root, methods=["GET"], tags=["root"])
+    return app
+
+
+app = create_app()
@@ -0,0 +1,83 @@
+"""Initial schema with query indexes.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+    op.create_index("ix_users_id", "users", ["id"])
+
+    op.create_table(
+        "videos",
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=True),
+        sa.Column("pubmed_id", sa.String(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("video_url", sa.String(), nullable=True),
+        sa.Column("error_message", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_videos_pubmed_id", "videos", ["pubmed_id"])
+    op.create_index("ix_videos_created_at_id", "videos", ["created_at", "id"])
+    op.create_index("ix_videos_status_created_at", "videos", ["status", "created_at"])
+    op.create_index("ix_videos_user_id_created_at", "videos", ["user_id", "created_at", "id"])
+
+    op.create_table(
+        "jobs",
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("video_id", sa.String(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("progress", sa.Integer(), nullable=False),
+        sa.Column("celery_task_id", sa.String(), nullable=True),
+        sa.Column("last_stage", sa.String(), nullable=True),
+        sa.Column("checkpoint", sa.Text(), nullable=True),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["video_id"], ["videos.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("uq_jobs_video_id", "jobs", ["video_id"], unique=True)
+    op.create_index("ix_jobs_status_created_at", "jobs", ["status", "created_at"])
+    op.create_index("ix_jobs_celery_task_id", "jobs", ["celery_task_id"])
+
+    op.create_table(
+        "generation_cache",
+        sa.Column("cache_key", sa.String(), nullable=False),
+        sa.Column("job_id", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["job_id"], ["jobs.id"]),
+        sa.PrimaryKeyConstraint("cache_key"),
+    )
+    op.create_index("ix_generation_cache_job_id", "generation_cache", ["job_id"])
+
+
+def downgrade() -> None:
+    op.drop_table("generation_cache")
+    op.drop_table("jobs")
+    op.drop_table("videos")
+    op.drop_index("ix_users_id", table_name="users")
+    op.drop_index("ix_users_email", table_name="users")
+    op.drop_table("users")
@@ -0,0 +1,26 @@
+"""Record where each finished video is stored.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("videos") as batch_op:
+        batch_op.add_column(sa.Column("storage_key", sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("videos") as batch_op:
+        batch_op.drop_column("storage_key")
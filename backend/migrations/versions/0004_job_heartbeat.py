@@ -0,0 +1,29 @@
+"""Add a heartbeat timestamp to jobs for the stale-job reaper.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("jobs") as batch_op:
+        batch_op.add_column(sa.Column("updated_at", sa.DateTime(), nullable=True))
+    op.execute("UPDATE jobs SET updated_at = created_at")
+    op.create_index("ix_jobs_status_updated_at", "jobs", ["status", "updated_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_jobs_status_updated_at", table_name="jobs")
+    with op.batch_alter_table("jobs") as batch_op:
+        batch_op.drop_column("updated_at")
@@ -0,0 +1,29 @@
+"""Add the id tiebreak to the status listing index and normalize stored PubMed IDs.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.drop_index("ix_videos_status_created_at", table_name="videos")
+    op.create_index("ix_videos_status_created_at_id", "videos", ["status", "created_at", "id"])
+    # Same canonical form as crud.normalize_pubmed_id: upper-case, no spaces, no PMID prefix.
+    op.execute("UPDATE videos SET pubmed_id = UPPER(REPLACE(pubmed_id, ' ', ''))")
+    op.execute("UPDATE videos SET pubmed_id = SUBSTR(pubmed_id, 6) WHERE pubmed_id LIKE 'PMID:%'")
+    op.execute("UPDATE videos SET pubmed_id = SUBSTR(pubmed_id, 5) WHERE pubmed_id LIKE 'PMID%'")
+
+
+def downgrade() -> None:
+    op.drop_index("ix_videos_status_created_at_id", table_name="videos")
+    op.create_index("ix_videos_status_created_at", "videos", ["status", "created_at"])
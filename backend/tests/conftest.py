@@ -7,24 +7,68 @@ from typing import Generator
 import pytest
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 
-from app.database import Base, get_db
+from app.admission import get_queue_depth_gate, get_rate_limiter
+from app.database import Base, SessionLocal, get_db
 from app.models import Job, User, Video
+from app.pipeline.artifacts import get_artifact_store
+from app.pipeline.pubmed import get_pubmed_client
+from app.queue.config import get_settings
+from app.status_cache import get_status_cache
+from app.storage import get_storage
+
+
+@pytest.fixture(autouse=True)
+def artifact_dir(tmp_path, monkeypatch):
+    """Keep pipeline artifacts, fetched papers and stored videos in per-test temporary directories."""
+    monkeypatch.setenv("ARTIFACT_DIR", str(tmp_path / "artifacts"))
+    monkeypatch.setenv("PUBMED_CACHE_DIR", str(tmp_path / "pubmed"))
+    monkeypatch.setenv("STORAGE_LOCAL_DIR", str(tmp_path / "media"))
+    get_settings.cache_clear()
+    get_artifact_store.cache_clear()
+    get_pubmed_client.cache_clear()
+    get_storage.cache_clear()
+    yield tmp_path / "artifacts"
+    get_settings.cache_clear()
+    get_artifact_store.cache_clear()
+    get_pubmed_client.cache_clear()
+    get_storage.cache_clear()
+
+
+@pytest.fixture(autouse=True)
+def fresh_admission_state():
+    """Start every test with full token buckets, no cached queue depth and no cached job status."""
+    get_rate_limiter.cache_clear()
+    get_queue_depth_gate.cache_clear()
+    get_status_cache.cache_clear()
+    yield
+    get_rate_limiter.cache_clear()
+    get_queue_depth_gate.cache_clear()
+    get_status_cache.cache_clear()
 
 
 @pytest.fixture(scope="function")
 def db_session() -> Generator:
     """Create an in-memory SQLite database session for testing."""
-    # Use in-memory SQLite for tests
-    engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+    # Use in-memory SQLite for tests; StaticPool keeps a single connection so the
+    # request thread and eager Celery tasks all see the same database.
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
     Base.metadata.create_all(engine)
     TestingSessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+    # Workers open their own sessions via SessionLocal; point them at the test DB.
+    SessionLocal.configure(bind=engine)
 
     session = TestingSessionLocal()
     try:
         yield session
     finally:
         session.close()
+        SessionLocal.configure(bind=None)
         Base.metadata.drop_all(engine)
 
 
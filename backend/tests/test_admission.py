@@ -0,0 +1,149 @@
+"""Tests for rate limiting, queue-depth admission and fair-share lanes."""
+
+from __future__ import annotations
+
+from unittest.mock import patch
+
+import pytest
+
+from app.admission import LocalRateLimiter, QueueDepthGate, lane_for
+from app.queue.config import get_settings
+
+
+@pytest.fixture
+def tight_limits(monkeypatch):
+    monkeypatch.setenv("RATE_LIMIT_USER_BURST", "2")
+    monkeypatch.setenv("RATE_LIMIT_USER_PER_MINUTE", "6")
+    monkeypatch.setenv("RATE_LIMIT_API_KEY_BURST", "3")
+    monkeypatch.setenv("RATE_LIMIT_API_KEY_PER_MINUTE", "6")
+    get_settings.cache_clear()
+    yield
+    get_settings.cache_clear()
+
+
+def test_token_bucket_refills_over_time():
+    limiter = LocalRateLimiter()
+    with patch("app.admission.time.monotonic", return_value=100.0):
+        assert limiter.acquire("k", capacity=2, per_second=0.5).allowed
+        assert limiter.acquire("k", capacity=2, per_second=0.5).allowed
+        denied = limiter.acquire("k", capacity=2, per_second=0.5)
+    assert not denied.allowed
+    assert denied.retry_after == pytest.approx(2.0)
+    with patch("app.admission.time.monotonic", return_value=102.0):
+        assert limiter.acquire("k", capacity=2, per_second=0.5).allowed
+
+
+def test_user_rate_limit_returns_429_with_retry_after(test_client, tight_limits):
+    for index in range(2):
+        response = test_client.post(
+            "/api/videos/generate", json={"pubmed_id": f"PMC70{index}", "user_email": "a@example.com"}
+        )
+        assert response.status_code == 201
+
+    limited = test_client.post("/api/videos/generate", json={"pubmed_id": "PMC702", "user_email": "a@example.com"})
+    assert limited.status_code == 429
+    assert int(limited.headers["Retry-After"]) == 10
+
+    # Another user has their own bucket.
+    other = test_client.post("/api/videos/generate", json={"pubmed_id": "PMC702", "user_email": "b@example.com"})
+    assert other.status_code == 201
+
+
+def test_api_key_bucket_is_shared_across_users(test_client, tight_limits):
+    headers = {"X-API-Key": "partner-key"}
+    statuses = [
+        test_client.post(
+            "/api/videos/generate",
+            json={"pubmed_id": f"PMC80{index}", "user_email": f"u{index}@example.com"},
+            headers=headers,
+        ).status_code
+        for index in range(4)
+    ]
+    assert statuses == [201, 201, 201, 429]
+
+
+def test_batch_takes_one_token_per_paper(test_client, tight_limits):
+    oversized = test_client.post("/api/videos/generate/batch", json={"pubmed_ids": ["PMC601", "PMC602", "PMC603"]})
+    assert oversized.status_code == 413
+
+    # Duplicates of one paper are charged once.
+    admitted = test_client.post("/api/videos/generate/batch", json={"pubmed_ids": ["PMC601", "pmc601", "PMC602"]})
+    assert admitted.status_code == 201
+    limited = test_client.post("/api/videos/generate", json={"pubmed_id": "PMC604"})
+    assert limited.status_code == 429
+
+
+def test_api_key_requests_are_charged_to_the_key_only(test_client, tight_limits):
+    # Above the user burst of 2, within the key's burst of 3.
+    batch = test_client.post(
+        "/api/videos/generate/batch",
+        json={"pubmed_ids": ["PMC621", "PMC622", "PMC623"]},
+        headers={"X-API-Key": "partner-key"},
+    )
+    assert batch.status_code == 201
+    # The client address still has its own full bucket.
+    assert test_client.post("/api/videos/generate", json={"pubmed_id": "PMC624"}).status_code == 201
+
+
+def test_startup_refuses_batches_larger_than_the_key_burst(monkeypatch):
+    from app.admission import check_batch_limits
+
+    monkeypatch.setenv("MAX_BATCH_SIZE", "200")
+    monkeypatch.setenv("RATE_LIMIT_API_KEY_BURST", "100")
+    get_settings.cache_clear()
+    with pytest.raises(RuntimeError, match="MAX_BATCH_SIZE"):
+        check_batch_limits()
+
+
+def test_batch_must_fit_under_the_queue_depth_limit(test_client, monkeypatch):
+    monkeypatch.setenv("ADMISSION_MAX_QUEUE_DEPTH", "100")
+    get_settings.cache_clear()
+    with patch.object(QueueDepthGate, "depth", return_value=98):
+        full = test_client.post("/api/videos/generate/batch", json={"pubmed_ids": ["PMC611", "PMC612", "PMC613"]})
+        fits = test_client.post("/api/videos/generate/batch", json={"pubmed_ids": ["PMC611", "PMC612"]})
+    assert full.status_code == 429
+    assert fits.status_code == 201
+
+
+def test_full_queue_rejects_new_generations(test_client, monkeypatch):
+    monkeypatch.setenv("ADMISSION_MAX_QUEUE_DEPTH", "100")
+    get_settings.cache_clear()
+    with patch.object(QueueDepthGate, "depth", return_value=100):
+        response = test_client.post("/api/videos/generate/batch", json={"pubmed_ids": ["PMC901"]})
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == str(get_settings().admission_retry_after_seconds)
+
+
+def test_tenants_hash_onto_stable_lanes():
+    lanes = get_settings().lane_queues
+    assert len(lanes) == get_settings().fair_share_lanes
+    assert lane_for("user:abc") == lane_for("user:abc")
+    assert {lane_for(f"user:{index}") for index in range(200)} == set(lanes)
+
+
+def test_generation_is_dispatched_to_the_tenant_lane(test_client, db_session):
+    from app import crud
+    from app.queue.tasks import generate_video_task
+
+    with patch.object(generate_video_task, "apply_async") as apply_async:
+        response = test_client.post("/api/videos/generate", json={"pubmed_id": "PMC910"}, headers={"X-API-Key": "k"})
+    assert response.status_code == 201
+    queue = apply_async.call_args.kwargs["queue"]
+    assert queue in get_settings().lane_queues
+    # Recorded so a reaped job is requeued on the same lane.
+    assert crud.get_job_with_video(db_session, response.json()["job_id"]).queue == queue
+
+
+def test_anonymous_idempotency_keys_are_scoped_by_client_address():
+    from starlette.requests import Request
+
+    from app.admission import idempotency_scope
+
+    def request(host: str, headers: tuple = ()) -> Request:
+        return Request({"type": "http", "headers": list(headers), "client": (host, 5000)})
+
+    assert idempotency_scope(request("10.0.0.1"), None) != idempotency_scope(request("10.0.0.2"), None)
+    # Signed-in callers keep their scope across networks.
+    assert idempotency_scope(request("10.0.0.1"), "a@example.com") == idempotency_scope(
+        request("10.0.0.2"), "a@example.com"
+    )
@@ -28,7 +28,7 @@ def test_api_generate_and_poll_eager(test_client, db_session):
 
         if data["status"] == "completed":
             assert data["progress"] == 100
-            assert data["video"]["video_url"] == "s3://fake/video.mp4"
+            assert data["video"]["video_url"] == f"local://videos/{data['video']['id']}.mp4"
             assert data["video"]["status"] == "completed"
             break
 
@@ -38,3 +38,237 @@ def test_api_generate_and_poll_eager(test_client, db_session):
     else:
         pytest.fail(f"Job {job_id} did not complete within {max_attempts} attempts")
 
+
+def test_generate_reuses_existing_job_for_same_paper(test_client, db_session):
+    """Repeat requests for a normalized pubmed_id return the original job."""
+    first = test_client.post("/api/videos/generate", json={"pubmed_id": "PMC10979640"})
+    assert first.status_code == 201
+    assert first.json()["cached"] is False
+
+    second = test_client.post("/api/videos/generate", json={"pubmed_id": " pmc10979640 "})
+    assert second.status_code == 200
+    data = second.json()
+    assert data["cached"] is True
+    assert data["job_id"] == first.json()["job_id"]
+    assert data["status"] == "completed"
+
+
+def test_generate_replaces_failed_cached_job(test_client, db_session):
+    """A failed job is not served from the cache; a fresh job replaces it."""
+    from app import crud
+
+    first = test_client.post("/api/videos/generate", json={"pubmed_id": "PMID:123456"})
+    crud.update_job(db_session, first.json()["job_id"], status="failed", error_message="boom")
+
+    second = test_client.post("/api/videos/generate", json={"pubmed_id": "123456"})
+    assert second.status_code == 201
+    assert second.json()["cached"] is False
+    assert second.json()["job_id"] != first.json()["job_id"]
+
+    third = test_client.post("/api/videos/generate", json={"pubmed_id": "123456"})
+    assert third.json()["job_id"] == second.json()["job_id"]
+
+
+def test_generate_batch_creates_jobs_and_reuses_cache(test_client, db_session):
+    """Batch submissions create one job per new paper and reuse cached ones."""
+    existing = test_client.post("/api/videos/generate", json={"pubmed_id": "PMC111"}).json()
+
+    response = test_client.post(
+        "/api/videos/generate/batch",
+        json={"pubmed_ids": ["PMC111", "PMC222", "pmc222", "PMC333"]},
+    )
+    assert response.status_code == 201
+    data = response.json()
+    assert data["created"] == 2
+
+    jobs = data["jobs"]
+    assert [job["pubmed_id"] for job in jobs] == ["PMC111", "PMC222", "pmc222", "PMC333"]
+    assert jobs[0]["job_id"] == existing["job_id"]
+    assert jobs[0]["cached"] is True
+    assert jobs[1]["job_id"] == jobs[2]["job_id"]
+    assert [job["cached"] for job in jobs[1:]] == [False, True, False]
+
+    for job in jobs:
+        status_response = test_client.get(f"/api/videos/{job['job_id']}")
+        assert status_response.json()["status"] == "completed"
+
+
+def test_generate_batch_rejects_empty_list(test_client):
+    response = test_client.post("/api/videos/generate/batch", json={"pubmed_ids": []})
+    assert response.status_code == 422
+
+
+def test_generate_batch_rejects_more_than_max_batch_size(test_client, monkeypatch):
+    from app.queue.config import get_settings
+
+    monkeypatch.setenv("MAX_BATCH_SIZE", "2")
+    get_settings.cache_clear()
+    response = test_client.post("/api/videos/generate/batch", json={"pubmed_ids": ["PMC1", "PMC2", "PMC3"]})
+    assert response.status_code == 422
+
+
+@pytest.fixture
+def listed_videos(db_session):
+    """Twelve videos a second apart, alternating owners and statuses; two share a timestamp."""
+    from datetime import datetime, timedelta
+
+    from app.models import Job, User, Video
+
+    alice, bob = User(email="alice@example.com"), User(email="bob@example.com")
+    base = datetime(2024, 1, 1)
+    for index in range(12):
+        created_at = base + timedelta(seconds=min(index, 10))
+        video = Video(
+            id=f"video-{index:02d}",
+            pubmed_id=f"PMC{index % 4}",
+            user=alice if index % 2 == 0 else bob,
+            status="completed" if index % 3 else "failed",
+            created_at=created_at,
+        )
+        db_session.add(Job(id=f"job-{index:02d}", video=video, progress=index))
+    db_session.commit()
+
+
+def _collect_pages(test_client, **params):
+    ids, cursor, pages = [], None, 0
+    while True:
+        query = dict(params, **({"cursor": cursor} if cursor else {}))
+        response = test_client.get("/api/videos", params=query)
+        assert response.status_code == 200
+        body = response.json()
+        ids.extend(item["id"] for item in body["items"])
+        pages += 1
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return ids, pages
+
+
+def test_list_videos_keyset_pagination(test_client, listed_videos):
+    ids, pages = _collect_pages(test_client, limit=5)
+    # Newest first; the two rows sharing a timestamp are ordered by id.
+    assert ids == [f"video-{index:02d}" for index in reversed(range(12))]
+    assert pages == 3
+
+    first = test_client.get("/api/videos", params={"limit": 1}).json()["items"][0]
+    assert first["job_id"] == "job-11"
+    assert first["progress"] == 11
+
+
+def test_list_videos_filters(test_client, listed_videos):
+    ids, _ = _collect_pages(test_client, limit=2, user_email="alice@example.com")
+    assert ids == [f"video-{index:02d}" for index in (10, 8, 6, 4, 2, 0)]
+
+    ids, _ = _collect_pages(test_client, status="failed", pubmed_id="PMC1")
+    assert ids == ["video-09"]
+    # Filtered the way generate normalizes IDs.
+    ids, _ = _collect_pages(test_client, status="failed", pubmed_id=" pmc1 ")
+    assert ids == ["video-09"]
+
+    ids, _ = _collect_pages(test_client, user_email="nobody@example.com")
+    assert ids == []
+
+
+def test_list_videos_rejects_bad_cursor_and_limit(test_client, listed_videos):
+    assert test_client.get("/api/videos", params={"cursor": "not-a-cursor"}).status_code == 400
+    assert test_client.get("/api/videos", params={"limit": 0}).status_code == 422
+
+
+def test_generate_dispatches_with_job_priority(test_client, db_session):
+    from unittest.mock import patch
+
+    from app.queue.config import PRIORITY_LEVELS
+    from app.queue.tasks import generate_video_task
+
+    with patch.object(generate_video_task, "apply_async") as apply_async:
+        response = test_client.post("/api/videos/generate", json={"pubmed_id": "PMC31", "priority": "high"})
+    assert response.status_code == 201
+    assert apply_async.call_args.kwargs["priority"] == PRIORITY_LEVELS["high"]
+    assert test_client.get(f"/api/videos/{response.json()['job_id']}").json()["priority"] == "high"
+
+    with patch("app.queue.tasks.group") as group:
+        response = test_client.post("/api/videos/generate/batch", json={"pubmed_ids": ["PMC32"], "priority": "low"})
+    assert response.status_code == 201
+    (signature,) = list(group.call_args.args[0])
+    assert signature.options["priority"] == PRIORITY_LEVELS["low"]
+
+    urgent = test_client.post("/api/videos/generate", json={"pubmed_id": "PMC33", "priority": "urgent"})
+    assert urgent.status_code == 422
+
+
+def test_cancel_job_revokes_its_task(test_client, db_session, sample_job):
+    from unittest.mock import patch
+
+    sample_job.status, sample_job.celery_task_id = "processing", "task-1"
+    db_session.commit()
+
+    with patch("app.queue.tasks.revoke_job_task") as revoke:
+        response = test_client.post(f"/api/videos/{sample_job.id}/cancel")
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "cancelled"
+    revoke.assert_called_once_with("task-1")
+    assert test_client.post(f"/api/videos/{sample_job.id}/cancel").status_code == 409
+    assert test_client.post("/api/videos/missing/cancel").status_code == 404
+
+    retried = test_client.post(f"/api/videos/{sample_job.id}/retry")
+    assert retried.status_code == 202
+    db_session.refresh(sample_job)
+    assert sample_job.status == "completed"
+
+
+def test_generate_replays_idempotency_key(test_client, db_session):
+    from datetime import datetime, timedelta
+    from unittest.mock import patch
+
+    from app import models
+    from app.queue.tasks import generate_video_task
+
+    headers = {"Idempotency-Key": "retry-1"}
+    body = {"pubmed_id": "PMC41", "user_email": "idem@example.com"}
+    with patch.object(generate_video_task, "apply_async") as apply_async:
+        first = test_client.post("/api/videos/generate", json=body, headers=headers)
+        again = test_client.post("/api/videos/generate", json=body, headers=headers)
+    assert first.status_code == again.status_code == 201
+    assert again.headers["Idempotent-Replayed"] == "true"
+    assert again.json()["job_id"] == first.json()["job_id"]
+    apply_async.assert_called_once()
+
+    other = test_client.post("/api/videos/generate", json={**body, "pubmed_id": "PMC42"}, headers=headers)
+    assert other.status_code == 422
+    too_long = test_client.post("/api/videos/generate", json=body, headers={"Idempotency-Key": "x" * 256})
+    assert too_long.status_code == 400
+
+    db_session.query(models.IdempotencyKey).update({"expires_at": datetime.utcnow() - timedelta(seconds=1)})
+    db_session.commit()
+    reused = test_client.post("/api/videos/generate", json={**body, "pubmed_id": "PMC42"}, headers=headers)
+    assert reused.status_code == 201
+    assert "Idempotent-Replayed" not in reused.headers
+    assert reused.json()["job_id"] != first.json()["job_id"]
+
+
+def test_job_status_etag_and_read_cache(test_client, db_session, sample_job):
+    from app import crud
+    from app.events import publish_progress
+
+    first = test_client.get(f"/api/videos/{sample_job.id}")
+    assert first.status_code == 200
+    assert first.headers["cache-control"] == "no-cache"
+    etag = first.headers["etag"]
+    not_modified = test_client.get(f"/api/videos/{sample_job.id}", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+
+    # Unpublished writes are only seen once the cached payload expires ...
+    crud.set_job_progress(db_session, sample_job.id, progress=40, status="processing")
+    assert test_client.get(f"/api/videos/{sample_job.id}").json()["progress"] == 0
+    # ... while a progress event drops it straight away.
+    publish_progress(sample_job.id, progress=40, status="processing")
+    changed = test_client.get(f"/api/videos/{sample_job.id}", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.json()["progress"] == 40
+    assert changed.headers["etag"] != etag
+
+    crud.update_job(db_session, sample_job.id, status="completed", progress=100)
+    publish_progress(sample_job.id, progress=100, status="completed")
+    done = test_client.get(f"/api/videos/{sample_job.id}")
+    assert done.headers["cache-control"] == "public, max-age=86400"
@@ -0,0 +1,106 @@
+"""Tests for the async database layer and async status route."""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import crud_async
+from app.database import Base, get_async_db, to_async_url
+from app.models import Job, Video
+from app.queue.config import get_settings
+from app.routers import videos_async
+from app.status_cache import get_status_cache
+
+
+@pytest.fixture
+def async_db_url(tmp_path):
+    """A file-backed SQLite database shared by a sync seeding engine and an async engine."""
+    url = f"sqlite:///{tmp_path / 'async.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add(Job(id="job-1", video=Video(pubmed_id="PMC1"), progress=10))
+    session.commit()
+    session.close()
+    engine.dispose()
+    return to_async_url(url)
+
+
+def test_to_async_url_maps_drivers():
+    assert to_async_url("sqlite:///./x.db") == "sqlite+aiosqlite:///./x.db"
+    assert to_async_url("postgresql+psycopg2://u:p@h/db") == "postgresql+asyncpg://u:p@h/db"
+    with pytest.raises(ValueError):
+        to_async_url("oracle://h/db")
+
+
+def test_async_job_read_loads_video(async_db_url):
+    async def scenario():
+        engine = create_async_engine(async_db_url)
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+        async with session_factory() as db:
+            job = await crud_async.get_job_with_video(db, "job-1")
+            result = (job.progress, job.video.pubmed_id)
+        await engine.dispose()
+        return result
+
+    assert asyncio.run(scenario()) == (10, "PMC1")
+
+
+def test_async_status_route(async_db_url):
+    engine = create_async_engine(async_db_url)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with session_factory() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(videos_async.router)
+    app.dependency_overrides[get_async_db] = override_get_async_db
+
+    with TestClient(app) as client:
+        response = client.get("/api/videos/job-1")
+        assert response.status_code == 200
+        assert response.json()["progress"] == 10
+        assert client.get("/api/videos/missing").status_code == 404
+
+        listing = client.get("/api/videos", params={"pubmed_id": "PMC1"})
+        assert listing.status_code == 200
+        assert [item["job_id"] for item in listing.json()["items"]] == ["job-1"]
+
+
+def test_async_status_route_keeps_etag_and_cache_headers(async_db_url, monkeypatch):
+    monkeypatch.setenv("DB_ASYNC", "1")
+    monkeypatch.setenv("STATUS_CACHE_TTL_SECONDS", "60")
+    get_settings.cache_clear()
+    from main import create_app
+
+    engine = create_async_engine(async_db_url)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with session_factory() as db:
+            yield db
+
+    app = create_app()
+    app.dependency_overrides[get_async_db] = override_get_async_db
+
+    with TestClient(app) as client:
+        response = client.get("/api/videos/job-1")
+        assert response.status_code == 200
+        assert response.json()["progress"] == 10
+        assert response.headers["etag"] == '"job-1.1"'
+        assert response.headers["cache-control"] == "no-cache"
+        # The rendered body is cached for the next poll, as on the sync route.
+        assert get_status_cache().get("job-1").etag == '"job-1.1"'
+
+        revalidated = client.get("/api/videos/job-1", headers={"If-None-Match": response.headers["etag"]})
+        assert revalidated.status_code == 304
+        assert revalidated.headers["etag"] == response.headers["etag"]
@@ -0,0 +1,43 @@
+"""Tests for engine configuration and pool reporting."""
+
+from __future__ import annotations
+
+from app.database import create_db_engine, engine_options, pool_status
+
+
+def test_engine_options_from_env(monkeypatch):
+    monkeypatch.setenv("DB_POOL_SIZE", "12")
+    monkeypatch.setenv("DB_MAX_OVERFLOW", "3")
+    monkeypatch.setenv("DB_POOL_PRE_PING", "false")
+    monkeypatch.setenv("DB_STATEMENT_TIMEOUT_MS", "2500")
+
+    options = engine_options("postgresql://u:p@localhost/db")
+    assert options["pool_size"] == 12
+    assert options["max_overflow"] == 3
+    assert options["pool_pre_ping"] is False
+    assert options["connect_args"] == {"options": "-c statement_timeout=2500"}
+
+    async_options = engine_options("postgresql+asyncpg://u:p@localhost/db")
+    assert async_options["connect_args"] == {"server_settings": {"statement_timeout": "2500"}}
+
+
+def test_memory_sqlite_skips_pool_tuning():
+    options = engine_options("sqlite:///:memory:")
+    assert "pool_size" not in options
+    assert options["connect_args"] == {"check_same_thread": False}
+
+
+def test_sqlite_file_uses_wal_and_reports_pool(tmp_path):
+    db_engine = create_db_engine(f"sqlite:///{tmp_path / 'wal.db'}")
+    with db_engine.connect() as connection:
+        assert connection.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        assert connection.exec_driver_sql("PRAGMA synchronous").scalar() == 1  # NORMAL
+        assert pool_status(db_engine)["checkedout"] == 1
+    assert pool_status(db_engine)["checkedin"] == 1
+    db_engine.dispose()
+
+
+def test_health_db_endpoint(test_client):
+    response = test_client.get("/api/health/db")
+    assert response.status_code == 200
+    assert "pool" in response.json()
@@ -0,0 +1,49 @@
+"""Tests for progress event publishing and the SSE stream."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+
+from app.events import LocalProgressBus
+
+
+def test_local_bus_delivers_events_across_threads():
+    """Events published from a worker thread reach the subscriber's event loop."""
+    bus = LocalProgressBus()
+
+    async def scenario():
+        with bus.subscribe("job-1") as subscription:
+            publisher = threading.Thread(
+                target=bus.publish, args=("job-1", {"job_id": "job-1", "progress": 40})
+            )
+            publisher.start()
+            publisher.join()
+            return await subscription.get(timeout=1)
+
+    assert asyncio.run(scenario()) == {"job_id": "job-1", "progress": 40}
+    assert bus._subscribers == {}
+
+
+def test_stream_sends_snapshot_and_closes_for_terminal_job(test_client, sample_job, db_session):
+    """A finished job yields one snapshot event and the stream ends."""
+    sample_job.status = "completed"
+    sample_job.progress = 100
+    db_session.commit()
+
+    with test_client.stream("GET", f"/api/videos/{sample_job.id}/events") as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        body = "".join(response.iter_text())
+
+    data_lines = [line for line in body.splitlines() if line.startswith("data: ")]
+    assert len(data_lines) == 1
+    event = json.loads(data_lines[0][len("data: "):])
+    assert event["status"] == "completed"
+    assert event["progress"] == 100
+
+
+def test_stream_unknown_job_returns_404(test_client):
+    response = test_client.get("/api/videos/missing/events")
+    assert response.status_code == 404
@@ -0,0 +1,89 @@
+"""Tests for the cached health checks and probe endpoints."""
+
+from __future__ import annotations
+
+import time
+
+import pytest
+
+from app.health import HealthMonitor, get_health_monitor
+
+
+class CountingCheck:
+    def __init__(self, result: bool = True) -> None:
+        self.result = result
+        self.calls = 0
+
+    def __call__(self) -> bool:
+        self.calls += 1
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+
+@pytest.fixture
+def checks():
+    return {"database": CountingCheck(), "redis": CountingCheck(), "celery_ping": CountingCheck(False)}
+
+
+@pytest.fixture
+def monitor(checks):
+    monitor = HealthMonitor(checks, interval=60, ttl=60)
+    yield monitor
+    monitor.stop()
+
+
+@pytest.fixture
+def health_client(test_client, monitor):
+    from main import app
+
+    app.dependency_overrides[get_health_monitor] = lambda: monitor
+    yield test_client
+
+
+def test_probes_are_served_from_the_cached_snapshot(health_client, checks):
+    for _ in range(5):
+        response = health_client.get("/api/health/")
+        assert response.status_code == 200
+        data = response.json()
+        assert (data["database"], data["redis"], data["celery_ping"]) == (True, True, False)
+        assert data["ready"] is True
+    assert health_client.get("/api/health/ready").status_code == 200
+
+    # One refresh from the background thread and at most one inline first refresh.
+    assert checks["redis"].calls <= 2
+
+
+def test_liveness_touches_no_dependencies(health_client, checks):
+    assert health_client.get("/api/health/live").json() == {"status": "ok"}
+    assert all(check.calls == 0 for check in checks.values())
+
+
+def test_readiness_fails_when_a_required_check_fails(health_client, monitor, checks):
+    checks["redis"].result = ConnectionError("down")
+    monitor.refresh()
+    response = health_client.get("/api/health/ready")
+    assert response.status_code == 503
+    assert response.json()["redis"] is False
+
+
+def test_stale_snapshot_fails_readiness(checks):
+    monitor = HealthMonitor(checks, interval=60, ttl=0.01)
+    try:
+        snapshot = monitor.snapshot()
+        time.sleep(0.02)
+        assert monitor.is_stale(snapshot)
+    finally:
+        monitor.stop()
+
+
+def test_background_thread_refreshes(checks):
+    monitor = HealthMonitor(checks, interval=0.01, ttl=60)
+    monitor.start()
+    try:
+        deadline = time.monotonic() + 2
+        while checks["database"].calls < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert checks["database"].calls >= 3
+    finally:
+        monitor.stop()
@@ -116,7 +116,7 @@ def test_integration_generate_and_poll_real_worker(integration_client):
 
         if data["status"] == "completed":
             assert data["progress"] == 100
-            assert data["video"]["video_url"] == "s3://fake/video.mp4"
+            assert data["video"]["video_url"] == f"local://videos/{data['video']['id']}.mp4"
             assert data["video"]["status"] == "completed"
             return  # Success!
 
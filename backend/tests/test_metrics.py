@@ -0,0 +1,48 @@
+"""Tests for the Prometheus metrics surface."""
+
+from __future__ import annotations
+
+from prometheus_client import REGISTRY
+
+
+def _value(name: str, **labels: str) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_metrics_cover_requests_tasks_and_caches(test_client, db_session):
+    route = {"route": "/api/videos/generate"}
+    before = {
+        "requests": _value("hidden_hill_http_request_duration_seconds_count", method="POST", status="201", **route),
+        "queries": _value("hidden_hill_http_request_db_queries_sum", **route),
+        "fetch": _value("hidden_hill_task_duration_seconds_count", task="fetch", state="SUCCESS"),
+        "writes": _value("hidden_hill_progress_writes_total", kind="progress"),
+        "miss": _value("hidden_hill_generation_cache_lookups_total", result="miss"),
+        "hit": _value("hidden_hill_generation_cache_lookups_total", result="hit"),
+        "artifact_miss": _value("hidden_hill_artifact_cache_lookups_total", stage="fetch", result="miss"),
+    }
+
+    assert test_client.post("/api/videos/generate", json={"pubmed_id": "PMC555"}).status_code == 201
+    assert test_client.post("/api/videos/generate", json={"pubmed_id": "PMC555"}).status_code == 200
+
+    requests = _value("hidden_hill_http_request_duration_seconds_count", method="POST", status="201", **route)
+    assert requests == before["requests"] + 1
+    assert _value("hidden_hill_http_request_db_queries_sum", **route) > before["queries"]
+    assert _value("hidden_hill_task_duration_seconds_count", task="fetch", state="SUCCESS") == before["fetch"] + 1
+    assert _value("hidden_hill_progress_writes_total", kind="progress") > before["writes"]
+    assert _value("hidden_hill_generation_cache_lookups_total", result="miss") == before["miss"] + 1
+    assert _value("hidden_hill_generation_cache_lookups_total", result="hit") == before["hit"] + 1
+    artifact_misses = _value("hidden_hill_artifact_cache_lookups_total", stage="fetch", result="miss")
+    assert artifact_misses == before["artifact_miss"] + 1
+
+
+def test_metrics_endpoint_uses_route_templates(test_client, sample_job):
+    test_client.get(f"/api/videos/{sample_job.id}")
+    test_client.get("/no/such/path")
+
+    response = test_client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'route="/api/videos/{job_id}"' in body
+    assert sample_job.id not in body
+    assert 'route="unmatched"' in body
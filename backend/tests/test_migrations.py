@@ -0,0 +1,35 @@
+"""Tests that Alembic migrations match the ORM models."""
+
+from __future__ import annotations
+
+import pytest
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from sqlalchemy import create_engine, inspect
+
+from app.database import Base
+from app.migrations import upgrade_database
+
+
+def test_migrations_match_models(tmp_path):
+    url = f"sqlite:///{tmp_path / 'migrated.db'}"
+    upgrade_database(url)
+
+    engine = create_engine(url)
+    with engine.connect() as connection:
+        diff = compare_metadata(MigrationContext.configure(connection), Base.metadata)
+        indexes = {index["name"]: index for index in inspect(connection).get_indexes("jobs")}
+    engine.dispose()
+
+    assert diff == []
+    assert indexes["uq_jobs_video_id"]["unique"]
+
+
+def test_upgrade_refuses_unversioned_databases(tmp_path):
+    url = f"sqlite:///{tmp_path / 'legacy.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    engine.dispose()
+
+    with pytest.raises(RuntimeError, match="alembic stamp 0001"):
+        upgrade_database(url)
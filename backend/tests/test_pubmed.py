@@ -0,0 +1,199 @@
+"""Tests for the batched PubMed/PMC efetch client."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from unittest.mock import MagicMock
+
+import httpx
+import pytest
+
+from app.pipeline import TRANSIENT_ERRORS
+from app.pipeline.pubmed import PaperCache, PaperNotFound, PubMedClient, PubMedUnavailable, parse_paper
+from app.pipeline.pubmed_fake import fake_efetch
+
+
+class RecordingEUtils:
+    """Fake E-utilities that records the UIDs of each request and how many overlap."""
+
+    def __init__(self, status_code: int = 200, delay: float = 0.0) -> None:
+        self.status_code = status_code
+        self.delay = delay
+        self.batches: list[list[str]] = []
+        self.active = 0
+        self.max_active = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+            self.batches.append(dict(httpx.QueryParams(request.content.decode()))["id"].split(","))
+            if self.status_code != 200:
+                return httpx.Response(self.status_code)
+            return fake_efetch(request)
+        finally:
+            self.active -= 1
+
+
+def make_client(tmp_path, handler, **options) -> PubMedClient:
+    options.setdefault("requests_per_second", 1000)
+    return PubMedClient(PaperCache(tmp_path / "papers"), transport=httpx.MockTransport(handler), **options)
+
+
+def test_concurrent_fetches_share_one_batched_request(tmp_path):
+    eutils = RecordingEUtils()
+
+    async def scenario():
+        client = make_client(tmp_path, eutils)
+        try:
+            return await asyncio.gather(*(client.fetch(f"PMID:{pmid}") for pmid in ("11", "12", "13", "11")))
+        finally:
+            await client.aclose()
+
+    papers = asyncio.run(scenario())
+
+    assert sorted(eutils.batches[0]) == ["11", "12", "13"]
+    assert len(eutils.batches) == 1
+    assert parse_paper("pubmed", papers[0])["title"] == "Paper 11"
+    assert papers[0] == papers[3]
+
+
+def test_fetched_papers_are_served_from_disk_cache(tmp_path):
+    eutils = RecordingEUtils()
+
+    async def fetch_twice():
+        first = make_client(tmp_path, eutils)
+        await first.fetch("PMC10979640")
+        await first.aclose()
+        second = make_client(tmp_path, eutils)
+        try:
+            return await second.fetch("pmc10979640")
+        finally:
+            await second.aclose()
+
+    xml = asyncio.run(fetch_twice())
+
+    assert eutils.batches == [["10979640"]]
+    assert parse_paper("pmc", xml) == {
+        "title": "Paper PMC10979640",
+        "abstract": "Synthetic abstract for PMC10979640.",
+    }
+
+
+def test_batches_are_capped_and_concurrency_is_bounded(tmp_path):
+    eutils = RecordingEUtils(delay=0.02)
+
+    async def scenario():
+        client = make_client(tmp_path, eutils, batch_size=2, max_concurrency=2)
+        try:
+            return await client.fetch_many([str(pmid) for pmid in range(21, 28)] + ["099"])
+        finally:
+            await client.aclose()
+
+    papers = asyncio.run(scenario())
+
+    assert sorted(papers) == [str(pmid) for pmid in range(21, 28)]
+    assert max(len(batch) for batch in eutils.batches) == 2
+    assert len(eutils.batches) == 4
+    assert eutils.max_active == 2
+
+
+def test_missing_and_rate_limited_papers(tmp_path):
+    async def fetch(handler, pubmed_id):
+        client = make_client(tmp_path, handler)
+        try:
+            return await client.fetch(pubmed_id)
+        finally:
+            await client.aclose()
+
+    with pytest.raises(PaperNotFound):
+        asyncio.run(fetch(RecordingEUtils(), "0123"))
+    with pytest.raises(PubMedUnavailable) as excinfo:
+        asyncio.run(fetch(RecordingEUtils(status_code=429), "123"))
+    assert isinstance(excinfo.value, TRANSIENT_ERRORS)
+
+
+def test_fetch_stage_stores_the_fetched_paper():
+    from app.pipeline import run_stage
+    from app.pipeline.artifacts import get_artifact_store
+
+    store = get_artifact_store()
+    ctx = run_stage("fetch", {"job_id": "j", "pubmed_id": "PMC10979640", "artifacts": {}}, store)
+
+    paper = json.loads(store.read_bytes(ctx["artifacts"]["fetch"]))
+    assert paper["source"] == "pmc"
+    assert paper["title"] == "Paper PMC10979640"
+
+
+def test_rate_limiter_is_called_off_the_event_loop(tmp_path, monkeypatch):
+    import threading
+
+    from app.admission import LocalRateLimiter
+    from app.pipeline import pubmed
+
+    threads = []
+
+    class RecordingLimiter(LocalRateLimiter):
+        def acquire(self, *args, **kwargs):
+            threads.append(threading.current_thread())
+            return super().acquire(*args, **kwargs)
+
+    monkeypatch.setattr(pubmed, "get_rate_limiter", RecordingLimiter)
+
+    async def scenario():
+        client = make_client(tmp_path, RecordingEUtils())
+        try:
+            await client.fetch("PMC42")
+        finally:
+            await client.aclose()
+        return threading.current_thread()
+
+    loop_thread = asyncio.run(scenario())
+
+    assert threads and loop_thread not in threads
+
+
+def test_identifiers_that_are_not_pmids_are_rejected(tmp_path, test_client):
+    from app.pipeline.pubmed import database_for
+
+    with pytest.raises(PaperNotFound):
+        database_for("PMID: ../../../../tmp/x")
+    with pytest.raises(ValueError):
+        PaperCache(tmp_path).path("pubmed", "../../x")
+    assert database_for(" pmid: 123 ") == ("pubmed", "123")
+
+    response = test_client.post("/api/videos/generate", json={"pubmed_id": "PMID: ../../../../tmp/x"})
+    assert response.status_code == 422
+    batch = test_client.post("/api/videos/generate/batch", json={"pubmed_ids": ["PMC123", "PMC12;3"]})
+    assert batch.status_code == 422
+
+
+def test_a_failing_cache_write_resolves_every_request_in_the_batch(tmp_path, monkeypatch):
+    async def scenario():
+        client = make_client(tmp_path, RecordingEUtils())
+        monkeypatch.setattr(client.cache, "put", MagicMock(side_effect=OSError("disk full")))
+        try:
+            return await asyncio.wait_for(
+                asyncio.gather(*(client.fetch(pmid) for pmid in ("31", "32", "33")), return_exceptions=True), 5
+            )
+        finally:
+            await client.aclose()
+
+    results = asyncio.run(scenario())
+
+    assert [type(result) for result in results] == [OSError] * 3
+
+
+def test_worker_fetch_gives_up_after_the_fetch_timeout(tmp_path, monkeypatch):
+    from app.pipeline import pubmed
+    from app.queue.config import get_settings
+
+    monkeypatch.setenv("PUBMED_FETCH_TIMEOUT_SECONDS", "0.05")
+    get_settings.cache_clear()
+    slow = make_client(tmp_path, RecordingEUtils(delay=1))
+    monkeypatch.setattr(pubmed, "get_pubmed_client", lambda: slow)
+
+    with pytest.raises(PubMedUnavailable):
+        pubmed.fetch_paper_xml("PMC41")
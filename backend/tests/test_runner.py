@@ -0,0 +1,76 @@
+"""Tests for the production command lines built by ``python -m backend``."""
+
+from __future__ import annotations
+
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+from app.queue.config import get_settings
+
+spec = importlib.util.spec_from_file_location("backend_cli", Path(__file__).resolve().parent.parent / "__main__.py")
+cli = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(cli)
+
+
+@pytest.fixture
+def runner_env(monkeypatch):
+    def configure(**env: str):
+        for name, value in env.items():
+            monkeypatch.setenv(name, value)
+        get_settings.cache_clear()
+        return get_settings()
+
+    yield configure
+    get_settings.cache_clear()
+
+
+def test_api_command_sizes_workers_and_drains(runner_env, monkeypatch):
+    monkeypatch.setattr(cli, "cpu_count", lambda: 6)
+    settings = runner_env(API_GRACEFUL_TIMEOUT_SECONDS="20", API_MAX_REQUESTS="1000")
+
+    command = cli.api_command(settings)
+    assert command[:2] == ["uvicorn", "main:app"]
+    assert command[command.index("--workers") + 1] == "6"
+    assert command[command.index("--timeout-graceful-shutdown") + 1] == "20"
+
+    command = cli.api_command(settings, server="gunicorn", workers=3, port=9000)
+    assert command[command.index("--worker-class") + 1] == "uvicorn.workers.UvicornWorker"
+    assert command[command.index("--bind") + 1] == "0.0.0.0:9000"
+    assert command[command.index("--workers") + 1] == "3"
+    assert command[command.index("--max-requests") + 1] == "1000"
+
+    command = cli.api_command(settings, reload=True)
+    assert "--reload" in command
+    assert command[command.index("--host") + 1] == "127.0.0.1"
+    command = cli.api_command(settings, reload=True, host="0.0.0.0")
+    assert command[command.index("--host") + 1] == "0.0.0.0"
+
+
+def test_worker_command_uses_per_stage_pools(runner_env, monkeypatch):
+    monkeypatch.setattr(cli, "cpu_count", lambda: 2)
+    settings = runner_env(
+        CELERY_CONCURRENCY_RENDER="1",
+        CELERY_WORKER_MAX_TASKS_PER_CHILD="50",
+        CELERY_WORKER_MAX_MEMORY_PER_CHILD="512000",
+    )
+
+    fetch = cli.worker_command(settings, "fetch")
+    assert fetch[fetch.index("-Q") + 1] == settings.stage_queues["fetch"]
+    assert fetch[fetch.index("--pool") + 1] == "threads"
+    assert fetch[fetch.index("--concurrency") + 1] == "8"
+    assert not any(arg.startswith("--max-tasks-per-child") for arg in fetch)
+
+    render = cli.worker_command(settings, "render")
+    assert render[render.index("--pool") + 1] == "prefork"
+    assert render[render.index("--concurrency") + 1] == "1"
+    assert "--max-tasks-per-child=50" in render
+    assert "--max-memory-per-child=512000" in render
+
+    intake = cli.worker_command(settings, "intake", pool="gevent", concurrency=200)
+    assert intake[intake.index("-Q") + 1].split(",") == [settings.celery_default_queue, *settings.lane_queues]
+    assert intake[intake.index("--concurrency") + 1] == "200"
+
+    with pytest.raises(ValueError):
+        cli.worker_command(settings, "upload")
@@ -0,0 +1,20 @@
+"""Cold-start checks: importing the API must stay free of worker-side dependencies."""
+
+from __future__ import annotations
+
+from benchmarks.bench_startup import measure
+
+
+def test_api_import_is_lazy_and_serves_first_request():
+    result = measure("/api/health/live")
+
+    assert result["status"] == 200
+    assert result["loaded"] == []
+    assert result["engine_created"] is False
+
+
+def test_first_database_request_creates_the_engine():
+    result = measure("/api/health/db")
+
+    assert result["status"] == 200
+    assert result["engine_created"] is True
@@ -0,0 +1,182 @@
+"""Tests for video storage backends and ranged downloads."""
+
+from __future__ import annotations
+
+import pytest
+
+from app.storage import LocalStorage, get_storage
+from app.streaming import RangeNotSatisfiable, parse_range
+
+
+@pytest.mark.parametrize(
+    ("header", "expected"),
+    [
+        (None, None),
+        ("bytes=0-9", (0, 9)),
+        ("bytes=5-", (5, 99)),
+        ("bytes=-10", (90, 99)),
+        ("bytes=90-500", (90, 99)),
+        ("bytes=0-1,5-6", None),
+        ("items=0-1", None),
+        ("bytes=a-b", None),
+    ],
+)
+def test_parse_range(header, expected):
+    assert parse_range(header, 100) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=100-", "bytes=7-3", "bytes=-0"])
+def test_parse_range_unsatisfiable(header):
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range(header, 100)
+
+
+def test_local_storage_rejects_escaping_keys(tmp_path):
+    with pytest.raises(ValueError):
+        LocalStorage(tmp_path).path("../outside.mp4")
+
+
+def test_incomplete_backends_cannot_be_instantiated():
+    from app.storage.base import StorageBackend
+
+    class NoDelete(StorageBackend):
+        def put_file(self, key, source, content_type="video/mp4"):
+            raise AssertionError
+
+        def stat(self, key):
+            return None
+
+    with pytest.raises(TypeError, match="delete"):
+        NoDelete()
+
+
+@pytest.fixture
+def completed_job(test_client):
+    job_id = test_client.post("/api/videos/generate", json={"pubmed_id": "PMC4242"}).json()["job_id"]
+    video = test_client.get(f"/api/videos/{job_id}").json()["video"]
+    content = get_storage().local_path(f"videos/{video['id']}.mp4").read_bytes()
+    return job_id, content
+
+
+def test_download_streams_full_file_and_ranges(test_client, completed_job):
+    job_id, content = completed_job
+    url = f"/api/videos/{job_id}/download"
+
+    full = test_client.get(url)
+    assert full.status_code == 200
+    assert full.content == content
+    assert full.headers["accept-ranges"] == "bytes"
+    assert full.headers["content-type"] == "video/mp4"
+    etag = full.headers["etag"]
+
+    partial = test_client.get(url, headers={"Range": "bytes=4-11"})
+    assert partial.status_code == 206
+    assert partial.content == content[4:12]
+    assert partial.headers["content-range"] == f"bytes 4-11/{len(content)}"
+    assert partial.headers["content-length"] == "8"
+
+    suffix = test_client.get(url, headers={"Range": "bytes=-3"})
+    assert suffix.content == content[-3:]
+
+    unsatisfiable = test_client.get(url, headers={"Range": f"bytes={len(content)}-"})
+    assert unsatisfiable.status_code == 416
+    assert unsatisfiable.headers["content-range"] == f"bytes */{len(content)}"
+
+    not_modified = test_client.get(url, headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+
+    stale_if_range = test_client.get(url, headers={"Range": "bytes=0-1", "If-Range": '"old"'})
+    assert stale_if_range.status_code == 200
+    assert stale_if_range.content == content
+
+    head = test_client.head(url)
+    assert head.status_code == 200
+    assert head.headers["content-length"] == str(len(content))
+    assert head.content == b""
+
+
+def test_download_hands_off_to_nginx_when_configured(test_client, completed_job, monkeypatch):
+    from app.queue.config import get_settings
+
+    job_id, content = completed_job
+    monkeypatch.setenv("STORAGE_ACCEL_REDIRECT_PREFIX", "/protected-media/")
+    get_settings.cache_clear()
+
+    response = test_client.get(f"/api/videos/{job_id}/download")
+    assert response.status_code == 200
+    assert response.headers["x-accel-redirect"].startswith("/protected-media/videos/")
+    assert response.content == b""
+
+
+def test_download_rejects_unfinished_jobs(test_client, sample_job):
+    assert test_client.get(f"/api/videos/{sample_job.id}/download").status_code == 409
+    assert test_client.get("/api/videos/missing/download").status_code == 404
+
+
+@pytest.fixture
+def s3_storage(monkeypatch):
+    moto = pytest.importorskip("moto")
+    import boto3
+
+    from app.queue.config import get_settings
+
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("STORAGE_BACKEND", "s3")
+    monkeypatch.setenv("S3_BUCKET", "videos-test")
+    monkeypatch.setenv("S3_REGION", "us-east-1")
+    get_settings.cache_clear()
+    get_storage.cache_clear()
+    with moto.mock_s3():
+        boto3.client("s3", region_name="us-east-1").create_bucket(Bucket="videos-test")
+        yield get_storage()
+
+
+def test_s3_storage_round_trip(s3_storage, tmp_path):
+    source = tmp_path / "video.mp4"
+    source.write_bytes(b"\x00" * 1024)
+
+    stored = s3_storage.put_file("videos/v1.mp4", source)
+    assert (stored.size, stored.content_type) == (1024, "video/mp4")
+    assert s3_storage.stat("videos/missing.mp4") is None
+    assert s3_storage.uri("videos/v1.mp4") == "s3://videos-test/videos/v1.mp4"
+
+    url = s3_storage.presigned_url("videos/v1.mp4", expires_in=60)
+    assert "videos/v1.mp4" in url and "Signature" in url
+
+
+def test_s3_download_redirects_to_presigned_url(test_client, s3_storage):
+    job_id = test_client.post("/api/videos/generate", json={"pubmed_id": "PMC5151"}).json()["job_id"]
+    video = test_client.get(f"/api/videos/{job_id}").json()["video"]
+    assert video["video_url"] == f"s3://videos-test/videos/{video['id']}.mp4"
+
+    response = test_client.get(f"/api/videos/{job_id}/download", follow_redirects=False)
+    assert response.status_code == 307
+    assert f"videos/{video['id']}.mp4" in response.headers["location"]
+
+
+def test_file_range_response_uses_zerocopysend_when_offered(tmp_path):
+    import asyncio
+
+    from app.streaming import FileRangeResponse
+
+    storage = LocalStorage(tmp_path)
+    source = tmp_path / "src.mp4"
+    source.write_bytes(b"0123456789")
+    obj = storage.put_file("videos/v.mp4", source)
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    response = FileRangeResponse(storage.path("videos/v.mp4"), obj, (2, 5))
+    scope = {"type": "http", "method": "GET", "extensions": {"http.response.zerocopysend": {}}}
+    asyncio.run(response(scope, None, send))
+
+    assert messages[0]["status"] == 206
+    assert {key: messages[1][key] for key in ("type", "offset", "count")} == {
+        "type": "http.response.zerocopysend",
+        "offset": 2,
+        "count": 4,
+    }
@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+import os
+from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 import pytest
@@ -34,5 +36,372 @@ def test_generate_video_task_sets_status_and_url(db_session, sample_job):
     assert sample_job.status == "completed"
     assert sample_job.progress == 100
     assert sample_job.video.status == "completed"
-    assert sample_job.video.video_url == "s3://fake/video.mp4"
+    assert sample_job.video.storage_key == f"videos/{sample_job.video_id}.mp4"
+    assert sample_job.video.video_url == f"local://videos/{sample_job.video_id}.mp4"
 
+
+def test_progress_reporter_merges_fast_updates(db_session, sample_job):
+    """Rapid progress updates are merged; status changes and terminal states flush."""
+    from app.queue.progress import JobProgressReporter
+
+    reporter = JobProgressReporter(sample_job.id, session=db_session, min_interval=60)
+
+    reporter.update(progress=10)
+    reporter.update(progress=20)
+    reporter.update(progress=30)
+    db_session.refresh(sample_job)
+    assert sample_job.progress == 10
+
+    reporter.update(progress=40, status="processing")
+    db_session.refresh(sample_job)
+    assert (sample_job.progress, sample_job.status, sample_job.video.status) == (40, "processing", "processing")
+
+    reporter.update(progress=50)
+    reporter.close()
+    db_session.refresh(sample_job)
+    assert sample_job.progress == 50
+
+    reporter.update(progress=100, status="completed")
+    db_session.refresh(sample_job)
+    assert (sample_job.progress, sample_job.status) == (100, "completed")
+
+
+def test_stage_tasks_route_to_their_own_queues():
+    """Each pipeline stage is routed to a dedicated queue."""
+    from app.queue.celery_app import celery_app
+    from app.queue.config import get_settings
+    from app.queue.tasks import build_pipeline
+
+    settings = get_settings()
+    for stage, queue in settings.stage_queues.items():
+        route = celery_app.amqp.router.route({}, f"videos.stage.{stage}")
+        assert route["queue"].name == queue
+
+    pipeline = build_pipeline("job-1", "PMC1")
+    assert [task.task for task in pipeline.tasks] == [
+        "videos.stage.fetch",
+        "videos.stage.script",
+        "videos.stage.audio",
+        "videos.stage.render",
+        "videos.stage.captions",
+        "videos.finalize",
+    ]
+    # Only references travel between stages.
+    assert pipeline.tasks[0].args == ({"job_id": "job-1", "pubmed_id": "PMC1", "artifacts": {}},)
+
+
+def test_priority_scheduling_configuration():
+    """Priorities map onto Redis priority lists and workers never hoard prefetched bulk work."""
+    from app.queue.celery_app import celery_app
+    from app.queue.config import PRIORITY_LEVELS, PRIORITY_STEPS
+
+    conf = celery_app.conf
+    assert conf.worker_prefetch_multiplier == 1
+    assert conf.task_acks_late is True
+    assert conf.task_inherit_parent_priority is True
+    assert conf.task_default_priority == PRIORITY_LEVELS["normal"]
+    assert conf.broker_transport_options["priority_steps"] == list(PRIORITY_STEPS)
+    assert PRIORITY_LEVELS["high"] < PRIORITY_LEVELS["normal"] < PRIORITY_LEVELS["low"]
+    assert set(PRIORITY_LEVELS.values()) <= set(PRIORITY_STEPS)
+
+
+def test_task_messages_are_compact():
+    """msgpack messages, compressed pipeline messages, short argument reprs and no stored results."""
+    from kombu.serialization import dumps, loads
+
+    from app.queue.celery_app import celery_app
+    from app.queue.tasks import STAGE_TASKS, build_pipeline, finalize_video_task, generate_video_task
+
+    conf = celery_app.conf
+    assert conf.task_serializer == conf.result_serializer == "msgpack"
+    assert set(conf.accept_content) == {"msgpack", "json"}
+    assert conf.task_ignore_result is True
+    assert conf.result_expires == 3600
+    assert celery_app.amqp.argsrepr_maxsize == 128
+    assert {task.compression for task in STAGE_TASKS.values()} == {"zlib"}
+    assert finalize_video_task.compression == "zlib"
+    assert getattr(generate_video_task, "compression", None) is None
+
+    ctx = build_pipeline("job-1", "PMC1", {"fetch": "fetch/ab/abc/paper.json"}).tasks[0].args[0]
+    content_type, encoding, body = dumps(ctx, serializer="msgpack")
+    assert loads(body, content_type, encoding, accept=["application/x-msgpack"]) == ctx
+
+
+def test_queue_depths_include_priority_lists():
+    from app.admission import PRIORITY_SEPARATOR, queue_depths
+
+    lengths = {"q": 2, f"q{PRIORITY_SEPARATOR}3": 5, f"q{PRIORITY_SEPARATOR}6": 1, "r": 4}
+
+    class Pipeline:
+        def __init__(self):
+            self.keys = []
+
+        def llen(self, key):
+            self.keys.append(key)
+
+        def execute(self):
+            return [lengths.get(key, 0) for key in self.keys]
+
+    class Client:
+        def pipeline(self, transaction=True):
+            return Pipeline()
+
+    with patch("app.admission.get_redis", return_value=Client()):
+        assert queue_depths(["q", "r"]) == {"q": 8, "r": 4}
+
+
+def test_regeneration_reuses_cached_stage_artifacts(db_session, sample_job):
+    """A second job for the same paper skips every stage via the artifact cache."""
+    from app.models import Job, Video
+    from app.pipeline.artifacts import get_artifact_store
+
+    store = get_artifact_store()
+    generate_video_task.apply(args=(sample_job.id, sample_job.video.pubmed_id)).get()
+    assert store.stats()["misses"] == 5
+    assert store.stats()["hits"] == 0
+
+    rerun = Job(video=Video(pubmed_id=sample_job.video.pubmed_id))
+    db_session.add(rerun)
+    db_session.commit()
+    with patch.dict("app.pipeline.stages.STAGE_FUNCTIONS", {"render": MagicMock()}) as functions:
+        generate_video_task.apply(args=(rerun.id, rerun.video.pubmed_id)).get()
+        functions["render"].assert_not_called()
+
+    stats = store.stats()
+    assert stats["hits"] == 5
+    assert stats["by_stage"]["render"] == {"hits": 1, "misses": 1}
+
+
+def test_artifact_store_evicts_least_recently_used(tmp_path):
+    from app.pipeline.artifacts import ArtifactStore
+
+    store = ArtifactStore(tmp_path, max_bytes=25, protect_seconds=0)
+    first = store.put_bytes("PMC1", "fetch", "a", "paper.json", b"x" * 10)
+    second = store.put_bytes("PMC2", "fetch", "a", "paper.json", b"x" * 10)
+    os.utime(store.path(first), (1, 1))
+    os.utime(store.path(second), (2, 2))
+    assert store.lookup("PMC1", "fetch", "a", "paper.json") == first  # bumps recency
+
+    store.put_bytes("PMC3", "fetch", "a", "paper.json", b"x" * 10)
+
+    assert store.path(first).exists()
+    assert not store.path(second).exists()
+    assert store.lookup("PMC2", "fetch", "a", "paper.json") is None
+
+
+def test_artifact_store_skips_rescans_while_everything_is_protected(tmp_path, monkeypatch):
+    from app.pipeline.artifacts import ArtifactStore
+
+    store = ArtifactStore(tmp_path, max_bytes=15, protect_seconds=600)
+    assert store.ref_for("PMID: 123", "fetch", "a", "paper.json") == store.ref_for("123", "fetch", "a", "paper.json")
+    store.put_bytes("PMC1", "fetch", "a", "paper.json", b"x" * 10)
+    store.put_bytes("PMC2", "fetch", "a", "paper.json", b"x" * 10)  # over budget, nothing evictable
+
+    scans = []
+    monkeypatch.setattr(Path, "rglob", lambda self, pattern: scans.append(self) or iter(()))
+    store.put_bytes("PMC3", "fetch", "a", "paper.json", b"x" * 10)
+    assert scans == []
+    assert store.lookup("PMC1", "fetch", "a", "paper.json") is not None
+
+
+def test_stage_failure_marks_job_failed(db_session, sample_job):
+    crash = MagicMock(side_effect=RuntimeError("renderer crashed"))
+    with patch.dict("app.pipeline.stages.STAGE_FUNCTIONS", {"render": crash}):
+        with pytest.raises(RuntimeError):
+            generate_video_task.apply(args=(sample_job.id, sample_job.video.pubmed_id)).get()
+
+    db_session.refresh(sample_job)
+    assert sample_job.status == "failed"
+    assert sample_job.video.error_message == "renderer crashed"
+
+
+def test_transient_stage_error_is_retried(db_session, sample_job):
+    """Transient errors retry the stage instead of failing the job."""
+    from app.pipeline import TransientStageError
+
+    flaky = MagicMock(side_effect=[TransientStageError("TTS rate limited"), b"RIFFaudio"])
+    with patch.dict("app.pipeline.stages.STAGE_FUNCTIONS", {"audio": flaky}):
+        result = generate_video_task.apply(args=(sample_job.id, sample_job.video.pubmed_id)).get()
+
+    assert result["status"] == "completed"
+    assert flaky.call_count == 2
+
+
+def test_failed_job_resumes_from_last_checkpoint(test_client, db_session, sample_job):
+    """A manual retry keeps the job ID and skips stages that already finished."""
+    crash = MagicMock(side_effect=RuntimeError("renderer crashed"))
+    with patch.dict("app.pipeline.stages.STAGE_FUNCTIONS", {"render": crash}):
+        with pytest.raises(RuntimeError):
+            generate_video_task.apply(args=(sample_job.id, sample_job.video.pubmed_id)).get()
+
+    db_session.refresh(sample_job)
+    assert sample_job.status == "failed"
+    assert sample_job.last_stage == "audio"
+
+    with patch.dict("app.pipeline.stages.STAGE_FUNCTIONS", {"fetch": MagicMock(), "script": MagicMock()}) as functions:
+        response = test_client.post(f"/api/videos/{sample_job.id}/retry")
+        functions["fetch"].assert_not_called()
+        functions["script"].assert_not_called()
+
+    assert response.status_code == 202
+    assert response.json()["job_id"] == sample_job.id
+    db_session.refresh(sample_job)
+    assert sample_job.status == "completed"
+    assert sample_job.attempts == 2
+    assert sample_job.video.error_message is None
+
+
+def test_retry_rejects_jobs_that_have_not_failed(test_client, sample_job):
+    assert test_client.post(f"/api/videos/{sample_job.id}/retry").status_code == 409
+    assert test_client.post("/api/videos/missing/retry").status_code == 404
+
+
+def _make_stale(db_session, job, attempts):
+    from datetime import datetime, timedelta
+
+    from sqlalchemy import update
+
+    from app.models import Job
+
+    db_session.execute(
+        update(Job)
+        .where(Job.id == job.id)
+        .values(status="processing", attempts=attempts, updated_at=datetime.utcnow() - timedelta(hours=1))
+    )
+    db_session.commit()
+
+
+def test_reaper_requeues_stale_jobs(db_session, sample_job):
+    from app.queue.tasks import reap_stale_jobs_task
+
+    _make_stale(db_session, sample_job, attempts=1)
+
+    result = reap_stale_jobs_task.apply().get()
+
+    assert result == {"requeued": [sample_job.id], "failed": []}
+    db_session.refresh(sample_job)
+    assert (sample_job.status, sample_job.attempts) == ("completed", 2)
+
+
+def test_reaper_requeues_on_the_original_lane_after_claiming(db_session, sample_job):
+    from app import crud
+    from app.queue import tasks
+    from app.queue.config import get_settings
+
+    lane = get_settings().lane_queues[1]
+    sample_job.queue, sample_job.celery_task_id = lane, "lost-task"
+    db_session.commit()
+    _make_stale(db_session, sample_job, attempts=1)
+
+    with patch.object(tasks, "revoke_job_task") as revoke, patch.object(
+        crud, "claim_stale_job", return_value=False
+    ):
+        assert tasks.reap_stale_jobs_task.apply().get() == {"requeued": [], "failed": []}
+    revoke.assert_not_called()
+
+    with patch.object(tasks, "revoke_job_task") as revoke, patch.object(
+        tasks.generate_video_task, "apply_async"
+    ) as apply_async:
+        assert tasks.reap_stale_jobs_task.apply().get()["requeued"] == [sample_job.id]
+    revoke.assert_called_once_with("lost-task")
+    assert apply_async.call_args.kwargs["queue"] == lane
+
+
+def test_reaper_publishes_requeues_and_fails_jobs_it_cannot_dispatch(db_session, sample_job):
+    from app.queue import tasks
+    from app.status_cache import CachedStatus, get_status_cache
+
+    _make_stale(db_session, sample_job, attempts=1)
+    get_status_cache().set(sample_job.id, CachedStatus('"stale"', "processing", b"{}"))
+
+    with patch.object(tasks, "publish_progress", wraps=tasks.publish_progress) as publish, patch.object(
+        tasks.generate_video_task, "apply_async", side_effect=ConnectionError("broker down")
+    ):
+        result = tasks.reap_stale_jobs_task.apply().get()
+
+    assert result == {"requeued": [], "failed": [sample_job.id]}
+    assert [call.kwargs["status"] for call in publish.call_args_list] == ["queued", "failed"]
+    assert get_status_cache().get(sample_job.id) is None
+    db_session.refresh(sample_job)
+    assert sample_job.status == "failed"
+    assert sample_job.video.error_message == "Unable to enqueue job"
+
+
+def test_reaper_fails_jobs_out_of_attempts(db_session, sample_job):
+    from app.queue.tasks import reap_stale_jobs_task
+
+    _make_stale(db_session, sample_job, attempts=3)
+
+    result = reap_stale_jobs_task.apply().get()
+
+    assert result == {"requeued": [], "failed": [sample_job.id]}
+    db_session.refresh(sample_job)
+    assert sample_job.status == "failed"
+    assert sample_job.video.error_message == "Worker stopped responding after 3 attempts"
+
+
+def test_reaper_leaves_heartbeating_jobs_alone(db_session, sample_job):
+    from app import crud
+    from app.queue.progress import JobHeartbeat
+    from app.queue.tasks import reap_stale_jobs_task
+
+    _make_stale(db_session, sample_job, attempts=1)
+    assert JobHeartbeat(sample_job.id).beat()
+
+    assert reap_stale_jobs_task.apply().get() == {"requeued": [], "failed": []}
+
+    crud.cancel_job(db_session, sample_job.id)
+    heartbeat = JobHeartbeat(sample_job.id)
+    assert not heartbeat.beat()
+    assert heartbeat.stopped.is_set()
+
+
+def test_cancelled_job_skips_remaining_stages(db_session, sample_job):
+    from app import crud
+    from app.database import SessionLocal
+
+    def cancel_mid_script(*_):
+        session = SessionLocal()
+        try:
+            crud.cancel_job(session, sample_job.id)
+        finally:
+            session.close()
+        return b"Narration."
+
+    audio = MagicMock()
+    with patch.dict("app.pipeline.stages.STAGE_FUNCTIONS", {"script": cancel_mid_script, "audio": audio}):
+        result = generate_video_task.apply(args=(sample_job.id, sample_job.video.pubmed_id)).get()
+
+    assert result["status"] == "cancelled"
+    audio.assert_not_called()
+    db_session.refresh(sample_job)
+    assert (sample_job.status, sample_job.video.status) == ("cancelled", "cancelled")
+    assert sample_job.video.video_url is None
+
+
+def test_retry_that_cannot_be_dispatched_drops_the_cached_status(test_client, db_session, sample_job):
+    from app import crud
+
+    crud.update_job(db_session, sample_job.id, status="failed", error_message="boom")
+    polled = []
+
+    def broker_down(*args, **kwargs):
+        # A client polls between the retry's reset and the failed dispatch, caching "queued".
+        polled.append(test_client.get(f"/api/videos/{sample_job.id}"))
+        raise ConnectionError("broker down")
+
+    with patch.object(generate_video_task, "apply_async", side_effect=broker_down):
+        assert test_client.post(f"/api/videos/{sample_job.id}/retry").status_code == 503
+
+    assert polled[0].json()["status"] == "queued"
+    response = test_client.get(f"/api/videos/{sample_job.id}", headers={"If-None-Match": polled[0].headers["etag"]})
+    assert response.status_code == 200
+    assert response.json()["status"] == "failed"
+    assert response.json()["video"]["error_message"] == "Unable to enqueue job"
+
+
+def test_finalize_skips_a_job_deleted_mid_chain(db_session):
+    from app.queue.tasks import finalize_video_task
+
+    ctx = {"job_id": "deleted-job", "pubmed_id": "PMC1", "artifacts": {}}
+    assert finalize_video_task.apply(args=(ctx,)).get() == {"job_id": "deleted-job", "status": "missing"}
@@ -0,0 +1,135 @@
+"""Tests for span tracing and task profiling."""
+
+from __future__ import annotations
+
+import json
+import pstats
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import tracing
+from app.database import get_db
+from app.profiling import get_task_profiler
+
+
+@pytest.fixture
+def traced_client(db_session, tmp_path, monkeypatch):
+    """An app built with tracing and task profiling enabled, exporting under tmp_path."""
+    monkeypatch.setenv("TRACING_ENABLED", "true")
+    monkeypatch.setenv("TRACE_DIR", str(tmp_path / "traces"))
+    monkeypatch.setenv("TASK_PROFILING", "true")
+    monkeypatch.setenv("TASK_PROFILE_DIR", str(tmp_path / "profiles"))
+    tracing.get_tracer.cache_clear()
+    get_task_profiler.cache_clear()
+    from main import create_app
+
+    app = create_app()
+    app.dependency_overrides[get_db] = lambda: db_session
+    yield TestClient(app)
+    tracing.get_tracer.cache_clear()
+    get_task_profiler.cache_clear()
+
+
+def _spans(directory) -> list[dict]:
+    return [json.loads(line) for path in directory.glob("*.jsonl") for line in path.read_text().splitlines()]
+
+
+def test_generation_is_traced_end_to_end(traced_client, tmp_path):
+    parent = "00-" + "a" * 32 + "-" + "b" * 16 + "-01"
+    response = traced_client.post(
+        "/api/videos/generate", json={"pubmed_id": "PMC777"}, headers={"traceparent": parent}
+    )
+    assert response.status_code == 201
+    job_id = response.json()["job_id"]
+
+    spans = _spans(tmp_path / "traces")
+    by_name = {span["name"]: span for span in spans}
+    server = by_name["HTTP POST /api/videos/generate"]
+    assert server["kind"] == "server"
+    assert server["parent_span_id"] == "b" * 16
+    assert server["attributes"]["http.status_code"] == 201
+    assert by_name["enqueue"]["parent_span_id"] == server["span_id"]
+    assert by_name["task videos.generate"]["kind"] == "consumer"
+    assert {"task videos.stage.fetch", "task videos.stage.render", "crud.update_job"} <= by_name.keys()
+    assert any(span["kind"] == "client" and span["name"].startswith("db ") for span in spans)
+    # One trace, and everything after the job row exists is tagged with its id.
+    assert {span["trace_id"] for span in spans} == {"a" * 32}
+    assert server["attributes"]["job.id"] == job_id
+    assert all(span["attributes"]["job.id"] == job_id for span in spans if span["name"].startswith("task "))
+
+    profiles = sorted((tmp_path / "profiles" / job_id).glob("*.prof"))
+    assert [path.name.split("-")[0] for path in profiles] == ["videos.generate"]
+    assert pstats.Stats(str(profiles[0])).total_calls > 0
+
+
+def test_worker_task_continues_the_published_trace(monkeypatch, tmp_path):
+    monkeypatch.setenv("TRACING_ENABLED", "true")
+    monkeypatch.setenv("TRACE_DIR", str(tmp_path))
+    tracing.get_tracer.cache_clear()
+    try:
+        headers: dict = {}
+        with tracing.span("enqueue", kind="producer") as producer:
+            tracing.inject_task_headers(headers)
+        assert tracing.parse_traceparent(headers["traceparent"]) == producer.context
+
+        class Request(dict):
+            delivery_info = {"routing_key": "video-render"}
+
+        class Task:
+            name = "videos.stage.render"
+            request = Request(headers)
+
+        tracing.task_started("task-1", Task, ({"job_id": "job-9"},))
+        with tracing.span("render frames"):
+            pass
+        tracing.task_finished("task-1", "FAILURE", RuntimeError("boom"))
+    finally:
+        tracing.get_tracer.cache_clear()
+
+    spans = {span["name"]: span for span in _spans(tmp_path)}
+    wait, task = spans["queue.wait"], spans["task videos.stage.render"]
+    assert wait["parent_span_id"] == task["parent_span_id"] == producer.context.span_id
+    assert task["status"] == "error" and task["attributes"]["error.type"] == "RuntimeError"
+    assert task["attributes"]["celery.queue"] == "video-render"
+    assert spans["render frames"]["parent_span_id"] == task["span_id"]
+    assert spans["render frames"]["attributes"]["job.id"] == "job-9"
+    assert tracing.current_span() is tracing.NOOP_SPAN
+
+
+def test_exporter_buffers_spans_and_never_duplicates_them_across_fork(tmp_path):
+    import os
+
+    exporter = tracing.JsonlSpanExporter(tmp_path, "svc")
+    tracer = tracing.Tracer(exporter)
+    with tracer.span("db SELECT", kind="client"):
+        pass
+    assert exporter.path().read_text() == ""
+
+    pid = os.fork()
+    if pid == 0:  # pragma: no cover - child process
+        with tracer.span("task videos.generate", kind="consumer"):
+            pass
+        os._exit(0)
+    os.waitpid(pid, 0)
+
+    assert [span["name"] for span in _spans(tmp_path) if span["resource"]["process.pid"] == os.getpid()] == [
+        "db SELECT"
+    ]
+    child = json.loads((tmp_path / f"svc-{pid}.jsonl").read_text())
+    assert child["name"] == "task videos.generate"
+    assert len(_spans(tmp_path)) == 2
+
+
+def test_importing_tracing_leaves_metrics_and_process_hooks_alone():
+    import os
+    import subprocess
+    import sys
+
+    probe = (
+        "import sys, app.crud, app.tracing; app.tracing.get_tracer(); "
+        "print('app.metrics' in sys.modules, app.tracing._hooks_installed)"
+    )
+    env = {**os.environ, "TRACING_ENABLED": "false"}
+    output = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True, check=True, env=env).stdout
+    assert output.split() == ["False", "False"]